@@ -1,6 +1,8 @@
 import streamlit as st
-from src.utils.styling import StyleManager
-from src.database.connection import DatabaseConnection
+from src.utils.app_context import get_app_context
+from src.utils.cache_warmer import get_cache_warmer
+from src.utils.anomaly_detector import get_anomaly_detector
+from src.database.migrations import run_startup_migrations
 from src.dashboard.template import render_dashboard
 from src.auth.authenticator import (
     show_login_form, 
@@ -20,9 +22,29 @@ st.set_page_config(
 def main():
     """Función principal de la aplicación"""
     
+    # Recursos compartidos del proceso (configuración, sesiones, pool de BD)
+    app_context = get_app_context()
+    
     # Aplicar styling personalizado
-    style_manager = StyleManager()
-    style_manager.apply_custom_css()
+    app_context.style_manager.apply_custom_css()
+    
+    # Bootstrap del esquema (una vez por proceso; un fallo se reintenta con backoff)
+    migration_error = run_startup_migrations()
+    if migration_error and st.session_state.get('migration_error_shown') != migration_error:
+        st.session_state.migration_error_shown = migration_error
+        st.error(f"Error aplicando migraciones de base de datos: {migration_error}")
+    
+    # Precalentamiento de caché en segundo plano (una vez por proceso)
+    try:
+        get_cache_warmer()
+    except Exception as e:
+        print(f"No se pudo iniciar el precalentamiento de caché: {e}")
+    
+    # Detector de anomalías en segundo plano (una vez por proceso)
+    try:
+        get_anomaly_detector()
+    except Exception as e:
+        print(f"No se pudo iniciar el detector de anomalías: {e}")
     
     # Verificar autenticación
     if not check_authentication():
@@ -33,6 +55,8 @@ def main():
     user_info = get_user_info()
     
     # Sidebar con info del usuario y logout
+    overview_mode = False
+    
     with st.sidebar:
         st.title("Proyecto OCD")
         st.write(f"**Usuario:** {user_info['user']['name']}")
@@ -43,6 +67,13 @@ def main():
             st.divider()
             st.write("**🔑 Acceso Super Usuario**")
             
+            overview_mode = st.radio(
+                "Vista",
+                options=["Dashboard", "Resumen de dashboards"],
+                horizontal=True,
+                key="super_user_view"
+            ) == "Resumen de dashboards"
+            
             available_dashboards = user_info.get('available_dashboards', [])
             all_dashboards = user_info.get('all_dashboards', {})
             
@@ -64,14 +95,56 @@ def main():
                 if all_dashboards and selected_dashboard in all_dashboards:
                     user_info['dashboard'] = dict(all_dashboards[selected_dashboard])
                 else:
-                    # Fallback - obtener directamente de secrets
-                    user_info['dashboard'] = dict(st.secrets['dashboards'][selected_dashboard])
+                    # Fallback - obtener del registro del proceso
+                    user_info['dashboard'] = dict(app_context.get_dashboard(selected_dashboard))
+                
+                # Registrar el cambio (alimenta la precarga de dashboards más visitados)
+                from src.utils.logger import get_user_logger
+                get_user_logger().log_dashboard_switch(st.session_state.get('username'), user_info)
                 
                 # Invalidar caché para recargar datos
                 from src.utils.data_cache import invalidate_social_cache
                 invalidate_social_cache()
                 
                 st.rerun()
+            
+            # Métricas de sesiones del proceso
+            with st.expander("🔐 Sesiones"):
+                metrics = app_context.session_manager.get_session_metrics()
+                st.write(f"Activas: {metrics['active_sessions']}")
+                st.write(f"Persistidas: {metrics['persisted_sessions']}")
+                st.write(f"Expiradas eliminadas: {metrics['evicted_total']}")
+            
+            # Estado del precalentamiento de caché
+            warmer = get_cache_warmer()
+            if warmer is not None:
+                with st.expander("🔥 Precalentamiento"):
+                    warm_stats = warmer.get_stats()
+                    st.write(f"Ciclos: {warm_stats['cycles']} • Aciertos: {warm_stats['hits']}")
+                    st.write(f"Tiempo de query ahorrado: {warm_stats['seconds_saved']:.1f} s")
+                    for warmed in warm_stats['warmed']:
+                        st.caption(
+                            f"{', '.join(warmed['dashboards'])}: {warmed['rows']:,} filas • "
+                            f"carga {warmed['full_load_seconds']} s • delta {warmed['last_delta_seconds']} s"
+                        )
+            
+            # Estado del detector de anomalías
+            detector = get_anomaly_detector()
+            if detector is not None:
+                with st.expander("🚨 Detector de anomalías"):
+                    detector_stats = detector.get_stats()
+                    st.write(f"Alertas: {detector_stats['alerts']} • Anomalías: {detector_stats['anomalies']}")
+                    st.write(f"Horas procesadas: {detector_stats['buckets_processed']:,} • "
+                             f"Último ciclo: {detector_stats['last_cycle_seconds']:.2f} s")
+                    if detector_stats['processed_until']:
+                        st.caption(f"Procesado hasta {detector_stats['processed_until'].strftime('%Y-%m-%d %H:%M')}")
+            
+            # Aciertos del caché de figuras de esta sesión
+            with st.expander("🖼️ Caché de gráficos"):
+                from src.dashboard.figure_cache import FigureCache
+                figure_stats = FigureCache().get_stats()
+                st.write(f"Aciertos: {figure_stats['hits']} • Fallos: {figure_stats['misses']}")
+                st.write(f"Tasa de aciertos: {figure_stats['hit_rate']:.0%} • Figuras: {figure_stats['entries']}")
         
         st.divider()
         
@@ -86,8 +159,16 @@ def main():
         
         st.divider()
             
+    db = app_context.get_db()
+    
+    # Vista comparativa de todos los dashboards (super usuarios)
+    if overview_mode:
+        from src.dashboard.overview import DashboardOverview
+        all_dashboards = user_info.get('all_dashboards') or app_context.dashboards
+        DashboardOverview(db).render(all_dashboards)
+        return
+    
     # Renderizar dashboard completo
-    db = DatabaseConnection()
     filter_manager = render_dashboard(user_info, db, super_editor_mode)
 
 
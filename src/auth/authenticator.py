@@ -1,29 +1,29 @@
 import streamlit as st
-from src.utils.logger import UserLogger
-from .session_manager import SessionManager
+from src.utils.logger import get_user_logger
+from src.utils.app_context import get_app_context
 
 
 class AuthManager:
     def __init__(self):
-        self.config = self._load_config()
-        self.session_manager = SessionManager()
+        self.context = self._load_context()
+        self.session_manager = self.context.session_manager if self.context else None
     
-    def _load_config(self):
-        """Carga la configuración desde Streamlit secrets"""
+    def _load_context(self):
+        """Obtiene el contexto del proceso (configuración ya parseada y sesiones)"""
         try:
-            return st.secrets
+            return get_app_context()
         except Exception as e:
             st.error(f"Error cargando configuración: {e}")
             return None
     
     def authenticate(self, username, password):
         """Autentica un usuario y retorna info del dashboard"""
-        if not self.config:
+        if not self.context:
             return False, None
             
         try:
-            users = self.config["users"]
-            dashboards = self.config["dashboards"]
+            users = self.context.users
+            dashboards = self.context.dashboards
             
             if username in users:
                 user_data = dict(users[username])
@@ -65,12 +65,11 @@ class AuthManager:
         
         if username and user_info:
             # Registrar logout en logs
-            logger = UserLogger()
-            logger.log_logout(username, user_info)
+            get_user_logger().log_logout(username, user_info)
         
         # Eliminar sesión persistente
         token = st.session_state.get('session_token')
-        if token:
+        if token and self.session_manager:
             self.session_manager.delete_session(token)
         
         # Limpiar session_state
@@ -86,18 +85,17 @@ class AuthManager:
 
 def check_authentication():
     """Verifica si el usuario está autenticado, incluyendo restauración de sesión"""
-    auth_manager = AuthManager()
+    session_manager = get_app_context().session_manager
     
-    # Verificar sesión activa o restaurar desde archivo
+    # Camino rápido: sesión activa, solo se actualiza la actividad en memoria
     if st.session_state.get('authenticated', False):
-        # Actualizar actividad de sesión existente
         token = st.session_state.get('session_token')
         if token:
-            auth_manager.session_manager.update_activity(token)
+            session_manager.update_activity(token)
         return True
     
     # Intentar restaurar sesión persistente
-    if auth_manager.session_manager.restore_session_if_valid():
+    if session_manager.restore_session_if_valid():
         return True
     
     return False
@@ -130,8 +128,19 @@ def show_login_form():
                     
                     if success:
                         # Registrar login en logs
-                        logger = UserLogger()
-                        logger.log_login(username, user_info)
+                        get_user_logger().log_login(username, user_info)
+                        
+                        # Precargar los datos por defecto mientras se renderiza el dashboard;
+                        # los filtros se fijan aquí para que la clave coincida con la del render
+                        from src.dashboard.filters import FilterManager
+                        from src.utils.prefetch import start_login_prefetch
+                        
+                        st.session_state.filters = FilterManager.get_default_filters()
+                        context = auth_manager.context
+                        start_login_prefetch(
+                            username, user_info, st.session_state.filters,
+                            context.get_db(), context.dashboards
+                        )
                         
                         st.success("✅ Login exitoso")
                         st.rerun()
@@ -1,16 +1,16 @@
-import os
-import json
 import time
 import hashlib
-from datetime import datetime, timedelta
 from pathlib import Path
 import streamlit as st
 
+from .session_store import get_session_store, SESSION_TIMEOUT
+
 class SessionManager:
     def __init__(self):
         self.sessions_dir = Path("sessions")
-        self.session_timeout = 600  # 10 minutos en segundos
+        self.session_timeout = SESSION_TIMEOUT  # 10 minutos en segundos
         self._ensure_sessions_directory()
+        self.store = get_session_store()
     
     def _ensure_sessions_directory(self):
         """Crea el directorio de sesiones si no existe"""
@@ -20,7 +20,7 @@ class SessionManager:
         gitignore_path = self.sessions_dir / ".gitignore"
         if not gitignore_path.exists():
             with open(gitignore_path, 'w') as f:
-                f.write("*.json\n")
+                f.write("*.json\n*.db\n*.db-wal\n*.db-shm\n")
     
     def generate_session_token(self, username):
         """Genera un token único para la sesión"""
@@ -28,19 +28,10 @@ class SessionManager:
         return hashlib.md5(f"{username}_{timestamp}".encode()).hexdigest()
     
     def save_session(self, username, user_info):
-        """Guarda la sesión en archivo"""
+        """Guarda la sesión en el almacén de sesiones"""
         token = self.generate_session_token(username)
-        session_data = {
-            'token': token,
-            'username': username,
-            'user_info': user_info,
-            'created_at': time.time(),
-            'last_activity': time.time()
-        }
-        
-        session_file = self.sessions_dir / f"{token}.json"
-        with open(session_file, 'w') as f:
-            json.dump(session_data, f, default=str)
+        now = time.time()
+        self.store.save(token, username, user_info, created_at=now, last_activity=now)
         
         # Guardar token en session_state para referencia
         st.session_state.session_token = token
@@ -51,52 +42,30 @@ class SessionManager:
         return token
     
     def load_session(self, token):
-        """Carga sesión desde archivo"""
-        session_file = self.sessions_dir / f"{token}.json"
-        
-        if not session_file.exists():
-            return None
-        
-        try:
-            with open(session_file, 'r') as f:
-                session_data = json.load(f)
-            return session_data
-        except:
-            return None
+        """Carga sesión desde el almacén"""
+        return self.store.load(token)
     
     def is_session_valid(self, token):
         """Verifica si la sesión es válida"""
-        session_data = self.load_session(token)
+        last_activity = self.store.get_last_activity(token)
         
-        if not session_data:
+        if last_activity is None:
             return False
         
         # Verificar timeout
-        current_time = time.time()
-        last_activity = session_data.get('last_activity', 0)
-        
-        if current_time - last_activity > self.session_timeout:
+        if time.time() - last_activity > self.session_timeout:
             self.delete_session(token)
             return False
         
         return True
     
     def update_activity(self, token):
-        """Actualiza timestamp de actividad"""
-        session_data = self.load_session(token)
-        
-        if session_data:
-            session_data['last_activity'] = time.time()
-            session_file = self.sessions_dir / f"{token}.json"
-            
-            with open(session_file, 'w') as f:
-                json.dump(session_data, f, default=str)
+        """Actualiza timestamp de actividad (en memoria; se persiste con coalescencia)"""
+        self.store.touch(token)
     
     def delete_session(self, token):
         """Elimina sesión"""
-        session_file = self.sessions_dir / f"{token}.json"
-        if session_file.exists():
-            session_file.unlink()
+        self.store.delete(token)
         
         if 'session_token' in st.session_state:
             del st.session_state.session_token
@@ -134,17 +103,9 @@ class SessionManager:
         return False
     
     def cleanup_expired_sessions(self):
-        """Limpia sesiones expiradas (llamar ocasionalmente)"""
-        current_time = time.time()
-        
-        for session_file in self.sessions_dir.glob("*.json"):
-            try:
-                with open(session_file, 'r') as f:
-                    session_data = json.load(f)
-                
-                last_activity = session_data.get('last_activity', 0)
-                if current_time - last_activity > self.session_timeout:
-                    session_file.unlink()
-            except:
-                # Si hay error leyendo, eliminar archivo corrupto
-                session_file.unlink()
\ No newline at end of file
+        """Limpia sesiones expiradas (el barrido periódico corre en segundo plano)"""
+        return self.store.purge_expired()
+    
+    def get_session_metrics(self):
+        """Conteos de sesiones para monitoreo"""
+        return self.store.get_metrics()
@@ -0,0 +1,300 @@
+import copy
+import heapq
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import streamlit as st
+
+from src.utils.state_backends import SQLiteStateBackend, StateBackend, get_state_backend
+
+
+# Inactividad máxima de una sesión en segundos
+SESSION_TIMEOUT = 600
+
+
+class SessionStore:
+    """Almacén de sesiones con capa caliente en memoria sobre un backend de estado compartido
+
+    La actividad de cada rerun solo se actualiza en memoria; last_activity se persiste en el
+    backend cuando avanza más de persist_threshold segundos respecto al último valor escrito.
+    Por eso el valor del backend puede ir hasta persist_threshold por detrás del real, y el
+    barrido (y el TTL) del backend agregan ese margen para no borrar sesiones aún activas.
+    Con un backend en red cualquier réplica puede restaurar un token ?session=.
+    """
+
+    TOKEN_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+    def __init__(self, sessions_dir: str = "sessions", persist_threshold: float = 60,
+                 session_timeout: float = SESSION_TIMEOUT, backend: Optional[StateBackend] = None):
+        """
+        Args:
+            sessions_dir: Directorio de sesiones JSON heredadas (y de la base SQLite local)
+            persist_threshold: Segundos mínimos entre escrituras de last_activity
+                               (debe ser menor que session_timeout)
+            session_timeout: Inactividad máxima antes de expirar una sesión
+            backend: Backend de estado (por defecto SQLite local en sessions_dir)
+        """
+        self.sessions_dir = Path(sessions_dir)
+        self.session_timeout = session_timeout
+
+        # El valor persistido puede ir hasta persist_threshold por detrás de la actividad real
+        # (de esta o de otra réplica): el backend conserva las sesiones ese margen adicional.
+        # La expiración la decide siempre last_activity, no la presencia en el backend.
+        self.persist_threshold = min(persist_threshold, session_timeout / 2)
+        self.backend_ttl = session_timeout + self.persist_threshold
+
+        self._lock = threading.Lock()
+        self._hot = {}
+        self._persisted_activity = {}
+
+        # Índice de expiración de la capa caliente: heap de (last_activity, token).
+        # Las entradas se invalidan de forma perezosa cuando la sesión tuvo actividad posterior.
+        self._expiry_heap = []
+        self._metrics = {
+            'evicted_total': 0,
+            'last_sweep_at': None,
+            'last_sweep_evicted': 0,
+            'legacy_files_removed': 0
+        }
+        self._sweeper = None
+
+        self.sessions_dir.mkdir(exist_ok=True)
+        self.backend = backend or SQLiteStateBackend(str(self.sessions_dir / "sessions.db"))
+
+    def is_valid_token(self, token: str) -> bool:
+        """Los tokens son hashes MD5: cualquier otra cosa se rechaza sin tocar el backend"""
+        return bool(token) and bool(self.TOKEN_PATTERN.match(token))
+
+    def save(self, token: str, username: str, user_info: Dict, created_at: float, last_activity: float):
+        """Guarda una sesión nueva en memoria y en el backend"""
+        record = {
+            'token': token,
+            'username': username,
+            'user_info': user_info,
+            'created_at': created_at,
+            'last_activity': last_activity
+        }
+
+        with self._lock:
+            self.backend.save_session(token, username, user_info, created_at, last_activity,
+                                      ttl=self.backend_ttl)
+            self._hot[token] = record
+            self._persisted_activity[token] = last_activity
+            heapq.heappush(self._expiry_heap, (last_activity, token))
+
+    def load(self, token: str) -> Optional[Dict]:
+        """Carga una sesión (copia independiente para el llamador)"""
+        if not self.is_valid_token(token):
+            return None
+
+        with self._lock:
+            record = self._hot.get(token)
+
+            if record is None:
+                record = self._load_persisted(token)
+                if record is None:
+                    return None
+                self._remember(token, record)
+
+            return copy.deepcopy(record)
+
+    def get_last_activity(self, token: str) -> Optional[float]:
+        """Última actividad conocida sin copiar la sesión completa"""
+        if not self.is_valid_token(token):
+            return None
+
+        with self._lock:
+            record = self._hot.get(token)
+            if record is not None:
+                if time.time() - record['last_activity'] <= self.session_timeout - self.persist_threshold:
+                    return record['last_activity']
+
+                # Cerca de expirar en esta réplica: otra réplica pudo haber registrado
+                # actividad más reciente (o cerrado la sesión)
+                return self._refresh_from_backend(token, record)
+
+        record = self.load(token)
+        return record['last_activity'] if record else None
+
+    def touch(self, token: str, now: Optional[float] = None):
+        """Actualiza la actividad en memoria y solo persiste si avanzó más del umbral"""
+        now = now or time.time()
+
+        with self._lock:
+            record = self._hot.get(token)
+            if record is None:
+                return
+
+            record['last_activity'] = now
+
+            if now - self._persisted_activity.get(token, 0) >= self.persist_threshold:
+                if self.backend.touch_session(token, now, ttl=self.backend_ttl):
+                    self._persisted_activity[token] = now
+                else:
+                    # La sesión fue cerrada o expirada desde otra réplica
+                    self._forget(token)
+
+    def delete(self, token: str):
+        """Elimina una sesión de memoria y del backend"""
+        with self._lock:
+            self._forget(token)
+            self.backend.delete_session(token)
+
+    def purge_expired(self, now: Optional[float] = None) -> int:
+        """
+        Elimina sesiones expiradas en O(expiradas) usando el heap y el índice del backend
+        
+        La capa caliente expira por last_activity real. En el backend solo se eliminan las
+        sesiones cuyo valor persistido quedó más de session_timeout + persist_threshold atrás:
+        como la actividad sin persistir nunca adelanta al valor escrito en más del umbral,
+        esas sesiones están expiradas en todas las réplicas.
+        
+        Returns:
+            Número de sesiones eliminadas del backend
+        """
+        now = now or time.time()
+        cutoff = now - self.session_timeout
+
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] < cutoff:
+                last_activity, token = heapq.heappop(self._expiry_heap)
+                record = self._hot.get(token)
+
+                if record is None:
+                    continue
+
+                if record['last_activity'] > last_activity:
+                    # Hubo actividad posterior: reprogramar con el valor actual
+                    heapq.heappush(self._expiry_heap, (record['last_activity'], token))
+                    continue
+
+                self._forget(token)
+
+            evicted = self.backend.purge_expired_sessions(now - self.backend_ttl)
+
+            self._metrics['evicted_total'] += evicted
+            self._metrics['last_sweep_at'] = now
+            self._metrics['last_sweep_evicted'] = evicted
+
+        return evicted
+
+    def purge_legacy_files(self, now: Optional[float] = None) -> int:
+        """Elimina archivos JSON heredados expirados usando mtime, sin parsearlos"""
+        cutoff = (now or time.time()) - self.session_timeout
+        removed = 0
+
+        with os.scandir(self.sessions_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".json") or not entry.is_file():
+                    continue
+
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.unlink(entry.path)
+                        removed += 1
+                except FileNotFoundError:
+                    continue
+
+        self._metrics['legacy_files_removed'] += removed
+        return removed
+
+    def start_sweeper(self, interval: float = 60):
+        """Lanza el barrido periódico de sesiones expiradas en un hilo de fondo"""
+        if self._sweeper is not None:
+            return
+
+        def sweep_loop():
+            try:
+                self.purge_legacy_files()
+            except Exception as e:
+                print(f"Error limpiando sesiones heredadas: {e}")
+
+            while True:
+                try:
+                    self.purge_expired()
+                except Exception as e:
+                    print(f"Error en barrido de sesiones: {e}")
+                time.sleep(interval)
+
+        self._sweeper = threading.Thread(target=sweep_loop, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def get_metrics(self) -> Dict:
+        """Métricas de sesiones para monitoreo"""
+        with self._lock:
+            persisted = self.backend.count_sessions()
+            cutoff = time.time() - self.session_timeout
+            active = sum(1 for record in self._hot.values() if record['last_activity'] >= cutoff)
+
+            return {
+                'active_sessions': active,
+                'hot_sessions': len(self._hot),
+                'persisted_sessions': persisted,
+                **self._metrics
+            }
+
+    def _remember(self, token: str, record: Dict):
+        self._hot[token] = record
+        self._persisted_activity[token] = record['last_activity']
+        heapq.heappush(self._expiry_heap, (record['last_activity'], token))
+
+    def _forget(self, token: str):
+        self._hot.pop(token, None)
+        self._persisted_activity.pop(token, None)
+
+    def _refresh_from_backend(self, token: str, record: Dict) -> Optional[float]:
+        """Sincroniza last_activity de la capa caliente con el backend"""
+        persisted = self.backend.load_session(token)
+
+        if persisted is None:
+            self._forget(token)
+            return None
+
+        if persisted['last_activity'] > record['last_activity']:
+            record['last_activity'] = persisted['last_activity']
+            self._persisted_activity[token] = persisted['last_activity']
+            heapq.heappush(self._expiry_heap, (persisted['last_activity'], token))
+
+        return record['last_activity']
+
+    def _load_persisted(self, token: str) -> Optional[Dict]:
+        record = self.backend.load_session(token)
+
+        if record:
+            return record
+
+        return self._import_legacy_session(token)
+
+    def _import_legacy_session(self, token: str) -> Optional[Dict]:
+        """Migra una sesión del formato anterior (un JSON por token) al backend"""
+        legacy_file = self.sessions_dir / f"{token}.json"
+
+        if not legacy_file.exists():
+            return None
+
+        try:
+            with open(legacy_file, 'r') as f:
+                record = json.load(f)
+
+            self.backend.save_session(
+                token, record['username'], record['user_info'],
+                record.get('created_at', time.time()), record.get('last_activity', 0),
+                ttl=self.backend_ttl
+            )
+            legacy_file.unlink()
+            return record
+        except Exception:
+            return None
+
+
+@st.cache_resource
+def get_session_store() -> SessionStore:
+    """Instancia única por proceso compartida por todas las sesiones de Streamlit"""
+    store = SessionStore(backend=get_state_backend())
+    store.start_sweeper()
+    return store
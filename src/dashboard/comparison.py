@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from src.dashboard.time_buckets import TimeBucketer
+
+
+class PeriodComparison:
+    """KPIs y series del periodo actual y del anterior equivalente desde una query agregada
+
+    El agregado trae ambos periodos en una sola consulta (ver
+    SocialListeningQueryBuilder.build_period_comparison_query). Las series del periodo
+    anterior se desplazan un periodo hacia adelante para dibujarse como "fantasma" sobre los
+    mismos buckets del timeline actual. El desplazamiento se redondea a buckets enteros del
+    date_trunc de la base: el largo crudo (p. ej. 6 días 23:59:59) dejaría cada punto un bucket
+    antes de su equivalente.
+
+    Es una consulta aparte de la del dashboard: esa trae filas crudas (tabla, filtros, editor)
+    y no hay un agregado que extender. Solo se ejecuta al activar el modo comparación y nunca
+    trae filas crudas del periodo anterior.
+    """
+
+    SENTIMENTS = ['POS', 'NEU', 'NEG']
+
+    # Rangos más largos se truncan por día en la base para acotar las filas del agregado
+    MAX_HOURLY_DAYS = 92
+
+    def __init__(self, aggregate: pd.DataFrame, start_date: datetime, end_date: datetime):
+        """
+        Args:
+            aggregate: Resultado de DatabaseConnection.get_period_comparison
+            start_date: Inicio del periodo actual
+            end_date: Fin del periodo actual
+        """
+        self.start_date = start_date
+        self.end_date = end_date
+        self.period = end_date - start_date
+        self.previous_start = start_date - self.period
+
+        unit = timedelta(hours=1) if self.sql_trunc(start_date, end_date) == 'hour' else timedelta(days=1)
+        self.shift = unit * max(1, round(self.period / unit))
+
+        if 'periodo' not in aggregate.columns:
+            aggregate = pd.DataFrame(columns=['periodo', 'bucket', 'alerta_id', 'origin', 'sentiment_pred',
+                                              'total', 'confidence_sum', 'confidence_count'])
+
+        self._periods = {
+            period: aggregate[aggregate['periodo'] == period]
+            for period in ('current', 'previous')
+        }
+        self.kpis = {period: self._kpis(data) for period, data in self._periods.items()}
+        self._ghosts = {}
+
+    @classmethod
+    def sql_trunc(cls, start_date: datetime, end_date: datetime) -> str:
+        return 'hour' if end_date - start_date <= timedelta(days=cls.MAX_HOURLY_DAYS) else 'day'
+
+    @property
+    def previous_label(self) -> str:
+        previous_end = self.start_date - timedelta(seconds=1)
+        return f"{self.previous_start.strftime('%d %b')} - {previous_end.strftime('%d %b')}"
+
+    def total_change_pct(self) -> Optional[float]:
+        """Variación porcentual de menciones respecto del periodo anterior"""
+        previous = self.kpis['previous']['total']
+        if not previous:
+            return None
+        return (self.kpis['current']['total'] - previous) / previous * 100
+
+    def share_delta(self, sentiment_code: str) -> float:
+        """Cambio en puntos porcentuales de la proporción de un sentimiento"""
+        current = self.kpis['current']['shares'].get(sentiment_code, 0.0)
+        previous = self.kpis['previous']['shares'].get(sentiment_code, 0.0)
+        return (current - previous) * 100
+
+    def ghost_timeline(self, bucketer: TimeBucketer) -> Dict:
+        """
+        Series del periodo anterior alineadas a los buckets del timeline actual
+
+        Returns:
+            Diccionario con 'total' y 'sentiment' (código -> array), del largo de bucketer.edges
+        """
+        if bucketer.key in self._ghosts:
+            return self._ghosts[bucketer.key]
+
+        previous = self._periods['previous']
+        result = {'total': np.zeros(bucketer.n_buckets, dtype=np.int64), 'sentiment': {}}
+
+        if not previous.empty:
+            shifted = pd.to_datetime(previous['bucket']) + self.shift
+            ids = bucketer.bucket_ids(shifted)
+            weights = previous['total'].to_numpy(dtype=np.float64)
+            codes = pd.Categorical(previous['sentiment_pred'], categories=self.SENTIMENTS).codes.astype(np.int64)
+
+            result['total'] = bucketer.count(ids, weights)
+            counts = bucketer.count_by(ids, codes, len(self.SENTIMENTS), weights)
+            result['sentiment'] = dict(zip(self.SENTIMENTS, counts))
+
+        self._ghosts[bucketer.key] = result
+        return result
+
+    def _kpis(self, data: pd.DataFrame) -> Dict:
+        total = int(data['total'].sum()) if not data.empty else 0
+        by_sentiment = data.groupby('sentiment_pred')['total'].sum() if total else pd.Series(dtype='int64')
+        confidence_count = data['confidence_count'].sum() if total else 0
+
+        return {
+            'total': total,
+            'shares': {code: by_sentiment.get(code, 0) / total for code in self.SENTIMENTS} if total else {},
+            'avg_confidence': (float(data['confidence_sum'].sum()) / confidence_count
+                               if confidence_count else None)
+        }
+
+
+def get_period_comparison(db_connection, alert_ids: List[int], origins: List[str],
+                          start_date: datetime, end_date: datetime, sentiment: Optional[str] = None,
+                          data_version: Optional[tuple] = None, max_entries: int = 4) -> PeriodComparison:
+    """
+    Comparación con el periodo anterior, memoizada en session_state
+
+    Args:
+        db_connection: Conexión a la base de datos
+        alert_ids: Alertas del dashboard
+        origins: Redes sociales filtradas
+        start_date: Inicio del periodo actual
+        end_date: Fin del periodo actual
+        sentiment: Sentimiento filtrado (código de BD)
+        data_version: Versión del caché de datos; una recarga o edición invalida la comparación
+        max_entries: Comparaciones que se conservan por sesión
+
+    Returns:
+        PeriodComparison
+    """
+    if 'period_comparisons' not in st.session_state:
+        st.session_state.period_comparisons = {}
+
+    comparisons = st.session_state.period_comparisons
+    key = (tuple(alert_ids), tuple(sorted(origins)), start_date.isoformat(), end_date.isoformat(),
+           sentiment, data_version)
+
+    comparison = comparisons.get(key)
+    if comparison is None:
+        aggregate = db_connection.get_period_comparison(
+            alert_ids, origins, start_date, end_date, sentiment,
+            trunc=PeriodComparison.sql_trunc(start_date, end_date)
+        )
+        comparison = PeriodComparison(aggregate, start_date, end_date)
+
+        while len(comparisons) >= max_entries:
+            comparisons.pop(next(iter(comparisons)))
+        comparisons[key] = comparison
+
+    return comparison
@@ -0,0 +1,82 @@
+import numpy as np
+from typing import Dict
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Índices de los puntos que conserva Largest-Triangle-Three-Buckets
+
+    Divide la serie en threshold - 2 buckets y de cada uno conserva el punto que forma el
+    triángulo de mayor área con el punto elegido anterior y el promedio del bucket siguiente,
+    lo que mantiene picos y valles que un promedio o un muestreo regular perderían.
+
+    Args:
+        x: Eje x (numérico o datetime64), ordenado
+        y: Valores
+        threshold: Cantidad de puntos a conservar
+
+    Returns:
+        Índices ordenados, incluyendo siempre el primer y el último punto
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = x.astype(np.int64).astype(np.float64) if np.issubdtype(x.dtype, np.datetime64) else x.astype(np.float64)
+    y = y.astype(np.float64)
+
+    # Límites de los buckets (el primer y último punto quedan fuera)
+    bounds = np.floor(np.arange(threshold - 1) * (n - 2) / (threshold - 2)).astype(np.int64) + 1
+    bounds[-1] = n - 1
+
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    selected = 0
+
+    for i in range(threshold - 2):
+        start, end = bounds[i], bounds[i + 1]
+
+        # Promedio del bucket siguiente (el último punto para el bucket final)
+        next_start = end
+        next_end = bounds[i + 2] if i + 2 < len(bounds) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        areas = np.abs(
+            (x[selected] - avg_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (avg_y - y[selected])
+        )
+        selected = start + int(np.argmax(areas))
+        indices[i + 1] = selected
+
+    return indices
+
+
+def downsample_series(x: np.ndarray, series: Dict, threshold: int, shared: bool = False):
+    """
+    Reduce varias series del mismo eje x
+
+    Args:
+        x: Eje x común
+        series: Nombre -> array de valores
+        threshold: Puntos máximos por serie
+        shared: Usar los mismos índices en todas las series (necesario para áreas apiladas);
+                se eligen con LTTB sobre la suma
+
+    Returns:
+        Diccionario nombre -> (x reducido, y reducido)
+    """
+    if len(x) <= threshold:
+        return {name: (x, values) for name, values in series.items()}
+
+    if shared:
+        total = np.sum(list(series.values()), axis=0)
+        indices = lttb_indices(x, total, threshold)
+        return {name: (x[indices], values[indices]) for name, values in series.items()}
+
+    result = {}
+    for name, values in series.items():
+        indices = lttb_indices(x, values, threshold)
+        result[name] = (x[indices], values[indices])
+    return result
@@ -0,0 +1,182 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from typing import Optional
+
+from src.dashboard.summary import DashboardSummary, summary_key
+
+
+class EngagementSummary:
+    """Engagement (likes + comentarios + shares) de un set de menciones
+
+    Las columnas vienen ya normalizadas por la query unificada (COALESCE por tabla). Los
+    totales por sentimiento y por red salen de bincount sobre códigos enteros; los top-N se
+    eligen con np.argpartition (tiempo lineal) y solo se ordenan los N elegidos.
+    """
+
+    ENGAGEMENT_COLUMNS = ('likes', 'comments', 'shares')
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Args:
+            df: Menciones con likes, comments, shares (y origin, author, sentiment_pred)
+        """
+        self.df = df
+        self.total_mentions = len(df)
+        self.available = self.total_mentions > 0 and any(c in df.columns for c in self.ENGAGEMENT_COLUMNS)
+
+        self.engagement = np.zeros(self.total_mentions, dtype=np.int64)
+        for column in self.ENGAGEMENT_COLUMNS:
+            if column in df.columns:
+                self.engagement += pd.to_numeric(df[column], errors='coerce').fillna(0).to_numpy(dtype=np.int64)
+
+        self.total = int(self.engagement.sum())
+        self.by_sentiment = self._weighted_counts('sentiment_pred', list(DashboardSummary.SENTIMENT_DISPLAY))
+        self.by_origin = self._by_origin()
+        self._top_authors = None
+
+    @property
+    def per_mention(self) -> float:
+        return self.total / self.total_mentions if self.total_mentions else 0.0
+
+    def sentiment_shares(self) -> pd.DataFrame:
+        """
+        Proporción de cada sentimiento en menciones y en engagement
+
+        Returns:
+            DataFrame indexado por código con 'mentions', 'engagement', 'mention_share' y
+            'engagement_share'
+        """
+        mentions = self._weighted_counts('sentiment_pred', list(DashboardSummary.SENTIMENT_DISPLAY), weighted=False)
+        result = pd.DataFrame({'mentions': mentions, 'engagement': self.by_sentiment})
+
+        result['mention_share'] = result['mentions'] / mentions.sum() if mentions.sum() else 0.0
+        result['engagement_share'] = result['engagement'] / self.by_sentiment.sum() if self.by_sentiment.sum() else 0.0
+        return result
+
+    def top_posts(self, n: int = 10) -> pd.DataFrame:
+        """Las n menciones con más engagement, de mayor a menor"""
+        n = min(n, self.total_mentions)
+        if not n:
+            return self.df.iloc[0:0].assign(engagement=pd.Series(dtype='int64'))
+
+        positions = np.argpartition(self.engagement, self.total_mentions - n)[self.total_mentions - n:]
+        positions = positions[np.argsort(-self.engagement[positions], kind='stable')]
+
+        return self.df.iloc[positions].assign(engagement=self.engagement[positions]).reset_index(drop=True)
+
+    def top_authors(self, n: int = 10) -> pd.DataFrame:
+        """
+        Autores con más engagement acumulado (un autor por red)
+
+        Returns:
+            DataFrame con origin, author, mentions y engagement, de mayor a menor
+        """
+        if self._top_authors is None:
+            self._top_authors = self._authors()
+
+        keys, mentions, totals = self._top_authors
+        n = min(n, len(totals))
+        if not n:
+            return pd.DataFrame({'origin': pd.Series(dtype='object'), 'author': pd.Series(dtype='object'),
+                                 'mentions': pd.Series(dtype='int64'), 'engagement': pd.Series(dtype='int64')})
+
+        groups = np.argpartition(totals, len(totals) - n)[len(totals) - n:]
+        groups = groups[np.argsort(-totals[groups], kind='stable')]
+        rows = keys[groups]
+
+        return pd.DataFrame({
+            'origin': self.df['origin'].to_numpy()[rows] if 'origin' in self.df.columns else None,
+            'author': self.df['author'].to_numpy()[rows],
+            'mentions': mentions[groups],
+            'engagement': totals[groups]
+        })
+
+    def _weighted_counts(self, column: str, categories: list, weighted: bool = True) -> pd.Series:
+        if column not in self.df.columns or not self.total_mentions:
+            return pd.Series(0, index=categories, dtype='int64')
+
+        codes = pd.Categorical(self.df[column], categories=categories).codes.astype(np.int64)
+        mask = codes >= 0
+        weights = self.engagement[mask] if weighted else None
+        counts = np.bincount(codes[mask], weights=weights, minlength=len(categories))
+        return pd.Series(counts.astype(np.int64), index=categories)
+
+    def _by_origin(self) -> pd.DataFrame:
+        """Menciones, engagement y engagement por mención de cada red"""
+        if 'origin' not in self.df.columns or not self.total_mentions:
+            return pd.DataFrame(columns=['mentions', 'engagement', 'per_mention'])
+
+        origins = pd.Categorical(self.df['origin'])
+        codes = origins.codes.astype(np.int64)
+        mask = codes >= 0
+        n = len(origins.categories)
+
+        result = pd.DataFrame({
+            'mentions': np.bincount(codes[mask], minlength=n),
+            'engagement': np.bincount(codes[mask], weights=self.engagement[mask], minlength=n).astype(np.int64)
+        }, index=list(origins.categories))
+        result['per_mention'] = result['engagement'] / result['mentions'].where(result['mentions'] > 0)
+        return result.sort_values('engagement', ascending=False)
+
+    def _authors(self):
+        """
+        Engagement por (red, autor) sin groupby: factorize a enteros y bincount
+
+        Returns:
+            Tupla (fila de ejemplo de cada grupo, menciones por grupo, engagement por grupo)
+        """
+        empty = (np.zeros(0, dtype=np.int64),) * 3
+        if 'author' not in self.df.columns or not self.total_mentions:
+            return empty
+
+        author_codes, _ = pd.factorize(self.df['author'], sort=False)
+        origin_codes = (pd.factorize(self.df['origin'], sort=False)[0]
+                        if 'origin' in self.df.columns else np.zeros(self.total_mentions, dtype=np.int64))
+
+        valid = author_codes >= 0
+        if not valid.any():
+            return empty
+
+        combined = origin_codes[valid].astype(np.int64) * (author_codes.max() + 1) + author_codes[valid]
+        groups, uniques = pd.factorize(combined, sort=False)
+        rows = np.flatnonzero(valid)
+
+        n_groups = len(uniques)
+        mentions = np.bincount(groups, minlength=n_groups)
+        totals = np.bincount(groups, weights=self.engagement[valid], minlength=n_groups).astype(np.int64)
+
+        # Una fila de cada grupo para recuperar red y autor de los elegidos
+        sample = np.empty(n_groups, dtype=np.int64)
+        sample[groups[::-1]] = rows[::-1]
+
+        return sample, mentions, totals
+
+
+def get_engagement_summary(df: pd.DataFrame, data_version: Optional[tuple] = None,
+                           max_entries: int = 4) -> EngagementSummary:
+    """
+    Resumen de engagement memoizado en session_state (misma clave que get_dashboard_summary)
+
+    Args:
+        df: Menciones a resumir
+        data_version: Versión del caché de datos; si se conoce, evita calcular la huella
+        max_entries: Resúmenes que se conservan por sesión
+
+    Returns:
+        EngagementSummary
+    """
+    if 'engagement_summaries' not in st.session_state:
+        st.session_state.engagement_summaries = {}
+
+    summaries = st.session_state.engagement_summaries
+    key = summary_key(df, data_version)
+
+    summary = summaries.get(key)
+    if summary is None:
+        summary = EngagementSummary(df)
+        while len(summaries) >= max_entries:
+            summaries.pop(next(iter(summaries)))
+        summaries[key] = summary
+
+    return summary
@@ -0,0 +1,78 @@
+import json
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional
+
+import streamlit as st
+
+
+class FigureCache:
+    """Caché por sesión de figuras Plotly terminadas
+
+    La clave combina la versión de los datos (entrada del caché de datos + generaciones de
+    edición) con los parámetros del gráfico, así que un rerun idéntico (p. ej. al escribir en
+    los filtros de la tabla) no repite ni el trabajo de pandas ni la construcción de la figura.
+    Se guarda el objeto Figure y no su JSON: reconstruir una figura desde JSON (o pasarle un
+    dict a st.plotly_chart, que la valida) cuesta lo mismo que construirla. Las figuras
+    cacheadas se tratan como de solo lectura.
+    """
+
+    def __init__(self, max_entries: int = 32):
+        """
+        Args:
+            max_entries: Figuras que se conservan por sesión (LRU)
+        """
+        self.max_entries = max_entries
+
+        if 'figure_cache' not in st.session_state:
+            st.session_state.figure_cache = OrderedDict()
+        if 'figure_cache_stats' not in st.session_state:
+            st.session_state.figure_cache_stats = {'hits': 0, 'misses': 0}
+
+    def get_or_build(self, chart: str, data_version: Optional[Hashable], params: Dict,
+                     build: Callable):
+        """
+        Figura cacheada o construida con build()
+
+        Args:
+            chart: Nombre del gráfico
+            data_version: Versión de los datos (None desactiva el caché)
+            params: Parámetros que cambian el gráfico (deben ser serializables a JSON)
+            build: Función sin argumentos que construye la figura
+
+        Returns:
+            Figura de Plotly
+        """
+        if data_version is None:
+            return build()
+
+        cache = st.session_state.figure_cache
+        stats = st.session_state.figure_cache_stats
+        key = (chart, data_version, json.dumps(params, sort_keys=True, default=str))
+
+        fig = cache.get(key)
+        if fig is not None:
+            cache.move_to_end(key)
+            stats['hits'] += 1
+            return fig
+
+        stats['misses'] += 1
+        fig = build()
+        cache[key] = fig
+
+        while len(cache) > self.max_entries:
+            cache.popitem(last=False)
+
+        return fig
+
+    def get_stats(self) -> Dict:
+        """Aciertos, fallos y figuras almacenadas en la sesión"""
+        stats = st.session_state.figure_cache_stats
+        total = stats['hits'] + stats['misses']
+        return {
+            **stats,
+            'entries': len(st.session_state.figure_cache),
+            'hit_rate': stats['hits'] / total if total else 0.0
+        }
+
+    def clear(self):
+        st.session_state.figure_cache = OrderedDict()
@@ -5,16 +5,22 @@ class FilterManager:
     def __init__(self):
         self.init_session_state()
     
+    @staticmethod
+    def get_default_filters():
+        """Filtros por defecto ("Este mes", todas las redes)"""
+        now = datetime.now()
+        return {
+            'origen': ['Facebook', 'X (Twitter)', 'Instagram', 'TikTok'],
+            'fecha_inicio': now.replace(day=1, hour=0, minute=0, second=0, microsecond=0),
+            'fecha_fin': now,
+            'polaridad': 'Todos',
+            'applied': True
+        }
+    
     def init_session_state(self):
         """Inicializa el estado de los filtros"""
         if 'filters' not in st.session_state:
-            st.session_state.filters = {
-                'origen': ['Facebook', 'X (Twitter)', 'Instagram', 'TikTok'],
-                'fecha_inicio': datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0),
-                'fecha_fin': datetime.now(),
-                'polaridad': 'Todos',
-                'applied': True
-            }
+            st.session_state.filters = self.get_default_filters()
     
     def render_filters(self):
         """Renderiza los filtros en la sidebar y maneja su estado"""
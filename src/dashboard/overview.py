@@ -0,0 +1,164 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+
+class DashboardOverview:
+    """Vista comparativa de todos los dashboards para super usuarios"""
+
+    ORIGINS = ['Facebook', 'X (Twitter)', 'Instagram', 'TikTok']
+
+    PERIODS = {
+        "Últimos 7 días": 7,
+        "Últimos 30 días": 30,
+        "Últimos 90 días": 90
+    }
+
+    def __init__(self, db_connection, max_concurrency: int = 4, columns: int = 3,
+                 cache_duration_minutes: int = 5):
+        """
+        Args:
+            db_connection: Conexión a la base de datos (idealmente con pool)
+            max_concurrency: Queries simultáneas como máximo
+            columns: Tarjetas por fila
+            cache_duration_minutes: Vigencia de los agregados en session_state
+        """
+        self.db_connection = db_connection
+        self.max_concurrency = max_concurrency
+        self.columns = columns
+        self.cache_duration = timedelta(minutes=cache_duration_minutes)
+
+        if 'overview_cache' not in st.session_state:
+            st.session_state.overview_cache = {}
+
+    def render(self, all_dashboards: Dict):
+        """Renderiza una tarjeta por dashboard a medida que terminan sus queries"""
+        st.header("🗂️ Resumen de Dashboards")
+
+        period = st.selectbox("Periodo", list(self.PERIODS.keys()), index=1, key="overview_period")
+        end_date = datetime.now()
+        start_date = (end_date - timedelta(days=self.PERIODS[period])).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+
+        dashboards = {
+            dashboard_id: dict(info) for dashboard_id, info in all_dashboards.items()
+            if info.get('alert_ids')
+        }
+
+        if not dashboards:
+            st.info("No hay dashboards con alertas configuradas")
+            return
+
+        placeholders = self._build_grid(list(dashboards.keys()))
+        pending = {}
+
+        for dashboard_id, info in dashboards.items():
+            cached = self._get_cached(dashboard_id, info['alert_ids'], start_date)
+            if cached is not None:
+                self._render_card(placeholders[dashboard_id], dashboard_id, info, cached)
+            else:
+                with placeholders[dashboard_id].container():
+                    st.caption(f"🔄 Cargando {info.get('title', dashboard_id)}...")
+                pending[dashboard_id] = info
+
+        if not pending:
+            return
+
+        # Un agregado por dashboard en paralelo; el executor limita la concurrencia
+        # para no agotar el pool de conexiones
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(pending))) as executor:
+            futures = {
+                executor.submit(
+                    self.db_connection.get_daily_sentiment_counts,
+                    info['alert_ids'], self.ORIGINS, start_date, end_date
+                ): dashboard_id
+                for dashboard_id, info in pending.items()
+            }
+
+            for future in as_completed(futures):
+                dashboard_id = futures[future]
+                info = pending[dashboard_id]
+
+                try:
+                    daily = future.result()
+                except Exception as e:
+                    placeholders[dashboard_id].error(f"{info.get('title', dashboard_id)}: {e}")
+                    continue
+
+                self._set_cached(dashboard_id, info['alert_ids'], start_date, daily)
+                self._render_card(placeholders[dashboard_id], dashboard_id, info, daily)
+
+    def _build_grid(self, dashboard_ids: List[str]) -> Dict:
+        placeholders = {}
+
+        for row_start in range(0, len(dashboard_ids), self.columns):
+            row_ids = dashboard_ids[row_start:row_start + self.columns]
+            cols = st.columns(self.columns)
+
+            for col, dashboard_id in zip(cols, row_ids):
+                with col:
+                    placeholders[dashboard_id] = st.empty()
+
+        return placeholders
+
+    def _render_card(self, placeholder, dashboard_id: str, info: Dict, daily: pd.DataFrame):
+        total = int(daily['total'].sum()) if not daily.empty else 0
+        by_sentiment = daily.groupby('sentiment_pred')['total'].sum() if not daily.empty else pd.Series(dtype=int)
+
+        def share(code):
+            return (by_sentiment.get(code, 0) / total * 100) if total else 0.0
+
+        with placeholder.container():
+            st.markdown(f"**{info.get('title', dashboard_id)}**")
+
+            col1, col2, col3 = st.columns(3)
+            col1.metric("Menciones", f"{total:,}")
+            col2.metric("Positivo", f"{share('POS'):.1f}%")
+            col3.metric("Negativo", f"{share('NEG'):.1f}%")
+
+            st.plotly_chart(self._create_sparkline(daily), use_container_width=True,
+                            config={'displayModeBar': False}, key=f"overview_spark_{dashboard_id}")
+
+    def _create_sparkline(self, daily: pd.DataFrame):
+        totals = daily.groupby('fecha')['total'].sum() if not daily.empty else pd.Series(dtype=int)
+
+        fig = go.Figure(go.Scatter(
+            x=totals.index,
+            y=totals.values,
+            mode='lines',
+            line=dict(color='#00D4FF', width=2),
+            fill='tozeroy',
+            fillcolor='rgba(0, 212, 255, 0.1)',
+            hovertemplate='%{x}: %{y}<extra></extra>'
+        ))
+        fig.update_layout(
+            height=110,
+            margin=dict(l=0, r=0, t=0, b=0),
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            xaxis=dict(visible=False),
+            yaxis=dict(visible=False),
+            showlegend=False
+        )
+        return fig
+
+    def _cache_key(self, dashboard_id: str, alert_ids: List[int], start_date: datetime):
+        return (dashboard_id, tuple(alert_ids), start_date.date().isoformat())
+
+    def _get_cached(self, dashboard_id: str, alert_ids: List[int], start_date: datetime):
+        entry = st.session_state.overview_cache.get(self._cache_key(dashboard_id, alert_ids, start_date))
+
+        if entry and datetime.now() - entry['timestamp'] < self.cache_duration:
+            return entry['data']
+
+        return None
+
+    def _set_cached(self, dashboard_id: str, alert_ids: List[int], start_date: datetime, data: pd.DataFrame):
+        st.session_state.overview_cache[self._cache_key(dashboard_id, alert_ids, start_date)] = {
+            'data': data,
+            'timestamp': datetime.now()
+        }
@@ -0,0 +1,375 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from typing import Dict, Optional
+
+from src.dashboard.time_buckets import TimeBucketer, bucketer_for_filters
+
+
+class DashboardSummary:
+    """Agregados de un set de menciones que consumen gráficos, KPIs y estadísticas de tabla
+
+    Se recorre el DataFrame una sola vez agrupando por (sentimiento, red, alerta). Ese cubo es
+    pequeño (3 × 4 × alertas), así que todas las distribuciones y desgloses se derivan de él
+    sin volver a tocar las filas. Las series temporales se calculan con un TimeBucketer sobre
+    códigos enteros ya preparados y se memorizan por granularidad y rango.
+    """
+
+    SENTIMENT_DISPLAY = {'POS': 'Positivo', 'NEU': 'Neutro', 'NEG': 'Negativo'}
+
+    # Porción de los datos (por tiempo) que compara el delta del sentimiento dominante
+    EDGE_FRACTION = 5
+
+    # Ventanas de comparación de la tendencia de sentimiento
+    TREND_WINDOWS = {
+        'edges': 'Primer vs último 20% de menciones',
+        'first_last_days': 'Primeros vs últimos N días',
+        'previous_days': 'Últimos N días vs N días anteriores'
+    }
+
+    def __init__(self, df: pd.DataFrame):
+        """
+        Args:
+            df: Menciones (created_time, sentiment_pred, origin, alerta_id, sentiment_confidence)
+        """
+        self.total = len(df)
+        self.has_dates = 'created_time' in df.columns
+        self.has_sentiment = 'sentiment_pred' in df.columns
+        self.has_origin = 'origin' in df.columns
+        self.has_alerts = 'alerta_id' in df.columns
+
+        created = pd.to_datetime(df['created_time']) if self.has_dates else None
+
+        dimensions = {}
+        if self.has_sentiment:
+            dimensions['sentiment_pred'] = df['sentiment_pred']
+        if self.has_origin:
+            dimensions['origin'] = df['origin']
+        if self.has_alerts:
+            dimensions['alerta_id'] = df['alerta_id']
+
+        # Única pasada sobre las filas
+        if dimensions and self.total:
+            self.cube = pd.DataFrame(dimensions).groupby(
+                list(dimensions), observed=True, dropna=False
+            ).size()
+        else:
+            self.cube = pd.Series(dtype='int64')
+
+        self.alert_sentiment = self._crosstab('alerta_id', 'sentiment_pred')
+        self._sentiment_all = self._marginal('sentiment_pred')
+        self.sentiment_counts = self._known(self._sentiment_all)
+        self.origin_counts = self._known(self._marginal('origin'))
+
+        if 'sentiment_confidence' in df.columns and self.total:
+            self.avg_confidence = float(df['sentiment_confidence'].mean())
+        else:
+            self.avg_confidence = None
+
+        if self.has_dates and self.total:
+            self.min_date = created.min().date()
+            self.max_date = created.max().date()
+        else:
+            self.min_date = self.max_date = None
+
+        # Códigos enteros para los bincount de las series temporales y la tendencia
+        self._created = created
+        self._sentiment_codes = (
+            pd.Categorical(df['sentiment_pred'], categories=list(self.SENTIMENT_DISPLAY)).codes.astype(np.int64)
+            if self.has_sentiment else None
+        )
+        self._alert_ids, self._alert_codes = [], None
+        if self.has_alerts:
+            alerts = pd.Categorical(df['alerta_id'])
+            self._alert_ids = list(alerts.categories)
+            self._alert_codes = alerts.codes.astype(np.int64)
+        self._origin_ids, self._origin_codes = [], None
+        if self.has_origin:
+            origins = pd.Categorical(df['origin'])
+            self._origin_ids = list(origins.categories)
+            self._origin_codes = origins.codes.astype(np.int64)
+        self._timelines = {}
+        self._hour_of_week = {}
+        self._edge_counts = None
+
+    @property
+    def alert_count(self) -> int:
+        return len(self.alert_sentiment.index)
+
+    @property
+    def dominant_sentiment(self) -> Optional[str]:
+        return self.sentiment_counts.index[0] if len(self.sentiment_counts) else None
+
+    def sentiment_display_counts(self, unknown_label: str = 'Desconocido') -> pd.Series:
+        """Conteo por polaridad con etiquetas legibles (códigos no mapeados van a unknown_label)"""
+        labels = [self.SENTIMENT_DISPLAY.get(code, unknown_label) for code in self._sentiment_all.index]
+        counts = self._sentiment_all.groupby(labels).sum()
+        return counts.sort_values(ascending=False)
+
+    def sentiment_delta(self, sentiment_code: str, window: str = 'edges', days: int = 7) -> float:
+        """
+        Cambio en puntos porcentuales de la proporción de un sentimiento entre dos ventanas
+
+        Args:
+            sentiment_code: 'POS', 'NEU' o 'NEG'
+            window: Clave de TREND_WINDOWS
+            days: Largo de las ventanas por días
+
+        Returns:
+            Proporción en la ventana final menos proporción en la inicial (pp)
+        """
+        if not (self.has_dates and self.has_sentiment) or not self.total:
+            return 0.0
+        if sentiment_code not in self.SENTIMENT_DISPLAY:
+            return 0.0
+
+        code = list(self.SENTIMENT_DISPLAY).index(sentiment_code)
+
+        if window == 'edges':
+            (first_counts, first_total), (last_counts, last_total) = self._edge_sentiment_counts()
+        else:
+            (first_counts, first_total), (last_counts, last_total) = self._day_window_counts(window, days)
+
+        first_share = first_counts[code] / first_total if first_total else 0.0
+        last_share = last_counts[code] / last_total if last_total else 0.0
+        return (last_share - first_share) * 100
+
+    def timeline(self, bucketer: TimeBucketer) -> Dict:
+        """
+        Series temporales con ceros en los buckets sin menciones
+
+        Returns:
+            Diccionario con 'edges' (datetime64), 'total', 'sentiment' (código -> array)
+            y 'alerts' (alerta -> array), todos arrays de NumPy del largo de edges
+        """
+        if bucketer.key in self._timelines:
+            return self._timelines[bucketer.key]
+
+        result = {'edges': bucketer.edges, 'label': bucketer.label, 'sentiment': {}, 'alerts': {}}
+
+        if self.has_dates and self.total:
+            ids = bucketer.bucket_ids(self._created)
+            result['total'] = bucketer.count(ids)
+
+            if self.has_sentiment:
+                counts = bucketer.count_by(ids, self._sentiment_codes, len(self.SENTIMENT_DISPLAY))
+                result['sentiment'] = dict(zip(self.SENTIMENT_DISPLAY, counts))
+
+            if self.has_alerts:
+                counts = bucketer.count_by(ids, self._alert_codes, len(self._alert_ids))
+                result['alerts'] = dict(zip(self._alert_ids, counts))
+        else:
+            result['total'] = np.zeros(bucketer.n_buckets, dtype=np.int64)
+
+        self._timelines[bucketer.key] = result
+        return result
+
+    def hour_of_week(self, bucketer: TimeBucketer, origin: Optional[str] = None,
+                     sentiment: Optional[str] = None) -> np.ndarray:
+        """
+        Menciones por día de la semana y hora (7 × 24, lunes a domingo)
+
+        El cubo red × sentimiento × 168 horas de la semana se calcula una vez por zona
+        horaria con un solo bincount sobre enteros (horas desde epoch, sin accesores .dt) y
+        cada combinación de red y sentimiento es una suma sobre ese cubo.
+
+        Args:
+            bucketer: Define la zona horaria de visualización
+            origin: Red (valor de la columna origin) o None para todas
+            sentiment: 'POS', 'NEU', 'NEG' o None para todos
+
+        Returns:
+            Matriz de 7 × 24 con los conteos
+        """
+        key = (bucketer.timezone, bucketer.source_timezone)
+        if key not in self._hour_of_week:
+            self._hour_of_week[key] = self._hour_of_week_cube(bucketer)
+
+        cube = self._hour_of_week[key]
+        if origin is not None:
+            cube = cube[self._origin_ids.index(origin)] if origin in self._origin_ids else np.zeros_like(cube[0])
+        else:
+            cube = cube.sum(axis=0)
+
+        if sentiment is not None:
+            sentiments = list(self.SENTIMENT_DISPLAY)
+            cube = cube[sentiments.index(sentiment)] if sentiment in sentiments else np.zeros_like(cube[0])
+        else:
+            cube = cube.sum(axis=0)
+
+        return cube.reshape(7, 24)
+
+    def _hour_of_week_cube(self, bucketer: TimeBucketer) -> np.ndarray:
+        """Conteos (redes + 1) × (sentimientos + 1) × 168; el último índice junta los nulos"""
+        n_origins = len(self._origin_ids) + 1
+        n_sentiments = len(self.SENTIMENT_DISPLAY) + 1
+        shape = (n_origins, n_sentiments, 7 * 24)
+
+        if not (self.has_dates and self.total):
+            return np.zeros(shape, dtype=np.int64)
+
+        hours = bucketer.localize(self._created).astype('datetime64[h]')
+        valid = ~np.isnat(hours)
+        hours = hours[valid].astype(np.int64)
+        # 1970-01-01 fue jueves: correr 3 días para que el día 0 sea lunes
+        slots = ((hours // 24 + 3) % 7) * 24 + hours % 24
+
+        origin_codes = self._origin_codes[valid] if self.has_origin else np.full(len(hours), -1)
+        sentiment_codes = self._sentiment_codes[valid] if self.has_sentiment else np.full(len(hours), -1)
+        origin_codes = np.where(origin_codes >= 0, origin_codes, n_origins - 1)
+        sentiment_codes = np.where(sentiment_codes >= 0, sentiment_codes, n_sentiments - 1)
+
+        flat = (origin_codes * n_sentiments + sentiment_codes) * (7 * 24) + slots
+        return np.bincount(flat, minlength=int(np.prod(shape))).reshape(shape)
+
+    def _marginal(self, level: str) -> pd.Series:
+        if self.cube.empty or level not in self.cube.index.names:
+            return pd.Series(dtype='int64')
+        return self.cube.groupby(level=level, observed=True, dropna=False).sum()
+
+    def _known(self, counts: pd.Series) -> pd.Series:
+        """Conteos sin la categoría nula, de mayor a menor (como value_counts)"""
+        return counts[counts.index.notna()].sort_values(ascending=False)
+
+    def _crosstab(self, rows: str, columns: str) -> pd.DataFrame:
+        names = self.cube.index.names
+        if self.cube.empty or rows not in names or columns not in names:
+            return pd.DataFrame()
+        return self.cube.groupby(level=[rows, columns], observed=True).sum().unstack(fill_value=0)
+
+    def _edge_sentiment_counts(self):
+        """
+        Conteos por sentimiento del primer y el último 20% de las menciones por tiempo
+
+        Selecciona los cuantiles con np.argpartition sobre los timestamps int64 (tiempo
+        lineal) en lugar de ordenar todo el DataFrame, y cuenta con bincount sobre los códigos
+        de sentimiento sin materializar sub-DataFrames.
+        """
+        if self._edge_counts is not None:
+            return self._edge_counts
+
+        timestamps = self._created.to_numpy(dtype='datetime64[ns]')
+        valid = ~np.isnat(timestamps)
+        timestamps = timestamps[valid].view(np.int64)
+        codes = self._sentiment_codes[valid]
+        n = len(timestamps)
+        n_sentiments = len(self.SENTIMENT_DISPLAY)
+
+        if not n:
+            empty = (np.zeros(n_sentiments, dtype=np.int64), 0)
+            self._edge_counts = (empty, empty)
+            return self._edge_counts
+
+        split_size = max(1, n // self.EDGE_FRACTION)
+        first = np.argpartition(timestamps, split_size - 1)[:split_size]
+        last = np.argpartition(timestamps, n - split_size)[n - split_size:]
+
+        def window_counts(positions):
+            window_codes = codes[positions]
+            counts = np.bincount(window_codes[window_codes >= 0], minlength=n_sentiments)
+            return counts, len(positions)
+
+        self._edge_counts = (window_counts(first), window_counts(last))
+        return self._edge_counts
+
+    def _local_day_bucketer(self) -> TimeBucketer:
+        """
+        Bucketer diario del rango de los datos en la hora de visualización
+
+        min_date/max_date están en la zona de origen; bucket_ids localiza las filas, así que el
+        rango se toma de los timestamps ya localizados para no dejar fuera los bordes.
+        """
+        bucketer = bucketer_for_filters({}, self, granularity='day')
+        if not self.has_dates or not self.total:
+            return bucketer
+
+        local = bucketer.localize(self._created)
+        local = local[~np.isnat(local)]
+        if not len(local):
+            return bucketer
+
+        return bucketer_for_filters({}, self, start=pd.Timestamp(local.min()).to_pydatetime(),
+                                    end=pd.Timestamp(local.max()).to_pydatetime(), granularity='day')
+
+    def _day_window_counts(self, window: str, days: int):
+        """Conteos de dos ventanas de días desde sumas acumuladas del timeline diario"""
+        daily = self.timeline(self._local_day_bucketer())
+        n_days = len(daily['edges'])
+        days = max(1, min(days, n_days))
+
+        sentiment_matrix = np.vstack([daily['sentiment'][code] for code in self.SENTIMENT_DISPLAY])
+        cumulative = np.concatenate(
+            [np.zeros((sentiment_matrix.shape[0] + 1, 1), dtype=np.int64),
+             np.cumsum(np.vstack([sentiment_matrix, daily['total']]), axis=1)],
+            axis=1
+        )
+
+        def window_counts(start, end):
+            counts = cumulative[:, end] - cumulative[:, start]
+            return counts[:-1], int(counts[-1])
+
+        last = (n_days - days, n_days)
+        if window == 'previous_days':
+            first = (max(0, n_days - 2 * days), n_days - days)
+        else:
+            first = (0, days)
+
+        return window_counts(*first), window_counts(*last)
+
+
+# Columnas que cambian el contenido del resumen
+SUMMARY_COLUMNS = ('created_time', 'sentiment_pred', 'origin', 'alerta_id', 'sentiment_confidence')
+
+
+def summary_key(df: pd.DataFrame, data_version: Optional[tuple] = None) -> tuple:
+    """
+    Clave de memo para resúmenes derivados de df
+
+    Args:
+        df: Menciones a resumir
+        data_version: Versión del caché de datos; si se conoce, evita calcular la huella
+
+    Returns:
+        Tupla hashable que cambia cuando cambia el contenido resumido
+    """
+    return ('version', data_version) if data_version is not None else _fingerprint(df)
+
+
+def _fingerprint(df: pd.DataFrame) -> tuple:
+    """Huella independiente del orden de filas (el editor puede corregir sentimientos en sitio)"""
+    present = tuple(c for c in SUMMARY_COLUMNS if c in df.columns)
+    columns = [c for c in ('table_source', 'id', 'sentiment_pred', 'alerta_id') if c in df.columns]
+    if df.empty or not columns:
+        return (len(df), present)
+
+    hashed = pd.util.hash_pandas_object(df[columns], index=False)
+    return (len(df), present, int(hashed.sum()))
+
+
+def get_dashboard_summary(df: pd.DataFrame, data_version: Optional[tuple] = None,
+                          max_entries: int = 4) -> DashboardSummary:
+    """
+    Resumen memoizado por huella de datos en session_state
+
+    Args:
+        df: Menciones a resumir
+        data_version: Versión del caché de datos; si se conoce, evita calcular la huella
+        max_entries: Resúmenes que se conservan por sesión
+
+    Returns:
+        DashboardSummary (el mismo objeto mientras los datos no cambien)
+    """
+    if 'dashboard_summaries' not in st.session_state:
+        st.session_state.dashboard_summaries = {}
+
+    summaries = st.session_state.dashboard_summaries
+    key = summary_key(df, data_version)
+
+    summary = summaries.get(key)
+    if summary is None:
+        summary = DashboardSummary(df)
+        while len(summaries) >= max_entries:
+            summaries.pop(next(iter(summaries)))
+        summaries[key] = summary
+
+    return summary
@@ -3,6 +3,7 @@ import pandas as pd
 from datetime import datetime, timedelta
 import random
 
+from src.dashboard.summary import DashboardSummary, get_dashboard_summary
 from src.utils.filter_utils import (
     FilterProcessor, FilterMapper, FilterConstants, 
     get_available_networks_from_data, get_available_sentiments_from_data,
@@ -13,7 +14,7 @@ class DataTableManager:
     def __init__(self):
         pass
     
-    def render_data_table(self, filters, df_completo):
+    def render_data_table(self, filters, df_completo, data_version=None):
         """Renderiza la tabla de datos con los filtros aplicados usando datos compartidos"""
         
         if not filters['applied']:
@@ -69,8 +70,8 @@ class DataTableManager:
         with col4:
             # Ordenar por
             sort_options = ['Fecha (Reciente)', 'Fecha (Antigua)', 'Confianza (Alta)', 'Confianza (Baja)']
-#            if 'likes' in df.columns:
-#                sort_options.extend(['Likes (Alto)', 'Likes (Bajo)'])
+            if 'likes' in df.columns:
+                sort_options.extend(['Likes (Alto)', 'Likes (Bajo)'])
             sort_by = st.selectbox(
                 "Ordenar por",
                 options=sort_options,
@@ -86,8 +87,9 @@ class DataTableManager:
 
         with col_date1:
             # Obtener rango de fechas de los datos
-            min_date = df['created_time'].min().date() if not df.empty else datetime.now().date()
-            max_date = df['created_time'].max().date() if not df.empty else datetime.now().date()
+            summary = get_dashboard_summary(df_completo, data_version)
+            min_date = summary.min_date or datetime.now().date()
+            max_date = summary.max_date or datetime.now().date()
             
             table_start_date = st.date_input(
                 "Desde",
@@ -215,18 +217,18 @@ class DataTableManager:
         }
         
         # Agregar columnas numéricas si existen
-#        if 'likes' in display_df.columns:
-#            display_df['likes'] = display_df['likes'].fillna(0).astype(int)
-#            display_columns['likes'] = 'Likes'
-#        
-#        if 'comments' in display_df.columns:
-#            display_df['comments'] = display_df['comments'].fillna(0).astype(int)
-#            display_columns['comments'] = 'Comentarios'
-#        
-#        if 'shares' in display_df.columns:
-#            display_df['shares'] = display_df['shares'].fillna(0).astype(int)
-#            display_columns['shares'] = 'Shares'
-#        
+        if 'likes' in display_df.columns:
+            display_df['likes'] = display_df['likes'].fillna(0).astype(int)
+            display_columns['likes'] = 'Likes'
+        
+        if 'comments' in display_df.columns:
+            display_df['comments'] = display_df['comments'].fillna(0).astype(int)
+            display_columns['comments'] = 'Comentarios'
+        
+        if 'shares' in display_df.columns:
+            display_df['shares'] = display_df['shares'].fillna(0).astype(int)
+            display_columns['shares'] = 'Shares'
+        
         if 'sentiment_confidence' in display_df.columns:
             display_df['confidence_formatted'] = display_df['sentiment_confidence'].apply(
                 lambda x: f"{x:.2f}" if pd.notnull(x) else "N/A"
@@ -263,14 +265,16 @@ class DataTableManager:
 #        if show_full_content:
 #            st.info("💡 Para ver el texto completo, active la opción y actualice la página")
         
-        # Información adicional
+        # Información adicional: los filtros de la tabla cambian en cada rerun, así que el
+        # resumen se calcula directo en lugar de ocupar el memo compartido de la sesión
         st.subheader("Estadísticas de la tabla")
+        table_summary = DashboardSummary(filtered_df)
         col1, col2 = st.columns(2)
         
         with col1:
             st.write("**Distribución por Red Social:**")
             if 'origin' in filtered_df.columns:
-                red_counts = filtered_df['origin'].value_counts()
+                red_counts = table_summary.origin_counts
                 
                 # Usar los mismos colores que en visualizations.py
                 social_colors = {
@@ -309,7 +313,7 @@ class DataTableManager:
             
         with col2:
             st.write("**Distribución por Polaridad:**")
-            pol_counts = filtered_df['polaridad_display'].value_counts()
+            pol_counts = table_summary.sentiment_display_counts()
             
             # Usar los mismos colores que en visualizations.py
             sentiment_colors = {
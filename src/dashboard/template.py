@@ -1,11 +1,15 @@
 import streamlit as st
-import time
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from .filters import FilterManager
 from .tables import DataTableManager
 from .visualizations import VisualizationManager
 from src.utils.data_cache import DataCacheManager, get_cached_social_data, cache_social_data
+from src.utils.prefetch import get_prefetcher
+from src.utils.cache_warmer import get_cache_warmer
+from src.utils.anomaly_detector import get_anomaly_detector
+from .comparison import get_period_comparison
+from .summary import get_dashboard_summary
 
 def render_dashboard_header(dashboard_info, last_update_str="No disponible"):
     """Renderiza el header del dashboard con styling profesional"""
@@ -39,12 +43,104 @@ def render_dashboard_header(dashboard_info, last_update_str="No disponible"):
     
     st.markdown(header_html, unsafe_allow_html=True)
 
-def render_main_content(filter_manager, user_info, db_connection, header_placeholder):
-    """Renderiza el contenido principal del dashboard"""
+def render_anomaly_sidebar(user_info, days=7, limit=10):
+    """Lista en el sidebar las anomalías recientes de las alertas del dashboard"""
+    try:
+        detector = get_anomaly_detector()
+    except Exception:
+        detector = None
+    
+    if detector is None:
+        return
+    
+    anomalies = detector.get_anomalies(
+        user_info['dashboard']['alert_ids'],
+        start_date=datetime.now() - timedelta(days=days)
+    )
+    
+    with st.sidebar:
+        with st.expander(f"🚨 Anomalías ({len(anomalies)})", expanded=not anomalies.empty):
+            if anomalies.empty:
+                st.caption(f"Sin picos ni giros de sentimiento en los últimos {days} días")
+                return
+            
+            for anomaly in anomalies.head(limit).itertuples():
+                st.markdown(f"**{anomaly.bucket.strftime('%d/%m %H:%M')}** · {anomaly.description}")
+            
+            if len(anomalies) > limit:
+                st.caption(f"... y {len(anomalies) - limit} más")
+
+def get_dashboard_anomalies(alerta_id, filters, sentiment_code):
+    """Anomalías de las alertas del dashboard dentro de los filtros (None si el detector está apagado)"""
+    try:
+        detector = get_anomaly_detector()
+    except Exception:
+        return None
+    
+    if detector is None:
+        return None
+    
+    return detector.get_anomalies(
+        alerta_id,
+        origins=filters['origen'],
+        start_date=filters['fecha_inicio'],
+        end_date=filters['fecha_fin'],
+        sentiment=sentiment_code
+    )
+
+@st.fragment(run_every=300)
+def render_header_fragment(dashboard_info, db_connection):
+    """Header: la hora de última actualización se consulta aquí y se refresca sola cada 5 minutos"""
+    last_update = db_connection.get_last_update_timestamp(list(dashboard_info['alert_ids']))
+    last_update_str = last_update.strftime('%Y-%m-%d %H:%M:%S') if last_update else "No disponible"
+    render_dashboard_header(dashboard_info, last_update_str)
+
+@st.fragment
+def render_kpis_fragment(filters, df_completo, filter_manager, data_version, comparison=None,
+                         split_by_alert=False):
+    """KPIs: la ventana de tendencia solo vuelve a ejecutar este bloque"""
+    viz_manager = VisualizationManager()
+    viz_manager.render_kpi_section(filters, df_completo, filter_manager, data_version, comparison,
+                                   split_by_alert)
+
+@st.fragment
+def render_charts_fragment(filters, df_completo, data_version, comparison=None, split_by_alert=False,
+                           anomalies=None):
+    """Gráficos: granularidad, acercamiento y filtros del mapa de calor solo vuelven a ejecutar este bloque"""
+    viz_manager = VisualizationManager()
+    viz_manager.render_chart_section(filters, df_completo, data_version, comparison, split_by_alert,
+                                     anomalies)
+
+@st.fragment
+def render_table_fragment(filters, df_completo, data_version=None):
+    """Tabla de registros: filtros, orden y filas a mostrar solo vuelven a ejecutar la tabla"""
+    st.subheader("📋 Tabla de Registros")
+    table_manager = DataTableManager()
+    return table_manager.render_data_table(filters, df_completo, data_version)
+
+@st.fragment
+def render_editor_fragment(filters, df_completo, user_info, db_connection):
+    """Super Editor: la edición y la paginación de la cola no redibujan el dashboard"""
+    from src.editor.super_editor import SuperEditor
+    
+    editor = SuperEditor()
+    editor.render_super_editor(filters, df_completo, user_info, db_connection)
+
+def render_main_content(filter_manager, user_info, db_connection):
+    """
+    Renderiza el contenido principal del dashboard
+    
+    Los datos se obtienen una vez por ejecución completa y se pasan explícitamente a cada
+    fragmento; una interacción dentro de un fragmento solo vuelve a ejecutar ese fragmento
+    con los mismos datos.
+    
+    Returns:
+        DataFrame con los datos del dashboard
+    """
     filters = st.session_state.filters
     
-    # Obtener alerta_id
-    alerta_id = user_info['dashboard']['alert_ids'][0]
+    # Todas las alertas del dashboard se leen en una sola query
+    alerta_id = list(user_info['dashboard']['alert_ids'])
     
     # LOADING SCREEN
     loading_container = st.empty()
@@ -63,7 +159,6 @@ def render_main_content(filter_manager, user_info, db_connection, header_placeho
         
         status_text.text("Conectando a base de datos...")
         progress_bar.progress(25)
-        time.sleep(0.5)
         
         # QUERY REAL DURANTE EL LOADING
         status_text.text("Obteniendo datos...")
@@ -87,7 +182,45 @@ def render_main_content(filter_manager, user_info, db_connection, header_placeho
             cache_manager=cache_manager
         )
 
-        # Si no hay caché válido, ejecutar query y cachear resultado
+        # Si no hay caché válido, usar la precarga del login o el precalentamiento
+        if df_completo is None:
+            df_completo = get_prefetcher().take(
+                username=st.session_state.get('username', 'anonymous'),
+                alerta_id=alerta_id,
+                origins=filters['origen'],
+                start_date=filters['fecha_inicio'],
+                end_date=filters['fecha_fin'],
+                sentiment=sentiment_code
+            )
+            
+            # Luego los datos precalentados del proceso (dashboards más usados)
+            if df_completo is None:
+                try:
+                    warmer = get_cache_warmer()
+                except Exception:
+                    warmer = None
+                
+                if warmer is not None:
+                    df_completo = warmer.get_warm_data(
+                        alerta_id=alerta_id,
+                        origins=filters['origen'],
+                        start_date=filters['fecha_inicio'],
+                        end_date=filters['fecha_fin'],
+                        sentiment=sentiment_code
+                    )
+            
+            if df_completo is not None:
+                cache_social_data(
+                    data=df_completo,
+                    alerta_id=alerta_id,
+                    origins=filters['origen'],
+                    start_date=filters['fecha_inicio'],
+                    end_date=filters['fecha_fin'],
+                    sentiment=sentiment_code,
+                    cache_manager=cache_manager
+                )
+        
+        # Sin caché ni precarga: ejecutar query y cachear resultado
         if df_completo is None:
             df_completo = db_connection.get_social_listening_data(
                 alerta_id=alerta_id,
@@ -109,35 +242,49 @@ def render_main_content(filter_manager, user_info, db_connection, header_placeho
                 cache_manager=cache_manager
             )
         
-        # Obtener timestamp de última actualización
-        last_update = db_connection.get_last_update_timestamp(alerta_id)
-        last_update_str = last_update.strftime('%Y-%m-%d %H:%M:%S') if last_update else "No disponible"
+        # Versión liviana de los datos para los cachés de resumen y figuras
+        data_version = cache_manager.get_data_version(
+            alerta_id=alerta_id,
+            origins=filters['origen'],
+            start_date=filters['fecha_inicio'],
+            end_date=filters['fecha_fin'],
+            sentiment=sentiment_code
+        )
         
-        # ACTUALIZAR HEADER CON DATOS REALES
-        with header_placeholder.container():
-            render_dashboard_header(user_info['dashboard'], last_update_str)
-                    
         status_text.text("Procesando visualizaciones...")
-        progress_bar.progress(75)
-        time.sleep(0.3)
-        
-        status_text.text("Finalizando...")
         progress_bar.progress(100)
-        time.sleep(0.2)
     
     # Limpiar loading y mostrar dashboard real
     loading_container.empty()
     
+    # Comparación con el periodo anterior: solo se consulta si el usuario la activa
+    def load_comparison():
+        return get_period_comparison(
+            db_connection, alerta_id, filters['origen'], filters['fecha_inicio'],
+            filters['fecha_fin'], sentiment_code, data_version
+        )
+    
+    # Picos y giros de sentimiento del detector de fondo (se marcan en los timelines)
+    anomalies = get_dashboard_anomalies(alerta_id, filters, sentiment_code)
+    
     # Área de visualizaciones - usar datos compartidos
-    viz_manager = VisualizationManager()
-    viz_manager.render_visualizations(filters, df_completo, filter_manager)
+    if filters['applied']:
+        viz_manager = VisualizationManager()
+        
+        # Comparación y desglose cambian KPIs y gráficos: se eligen fuera de los fragmentos
+        summary = get_dashboard_summary(df_completo, data_version)
+        comparison, split_by_alert = viz_manager.render_shared_controls(summary, load_comparison)
+        
+        render_kpis_fragment(filters, df_completo, filter_manager, data_version, comparison, split_by_alert)
+        st.divider()
+        render_charts_fragment(filters, df_completo, data_version, comparison, split_by_alert, anomalies)
+    else:
+        st.info("🔍 Aplique los filtros para ver las visualizaciones")
     
     st.divider()
     
     # Tabla de registros - usar datos compartidos
-    st.subheader("📋 Tabla de Registros")
-    table_manager = DataTableManager()
-    df_resultado = table_manager.render_data_table(filters, df_completo)
+    render_table_fragment(filters, df_completo, data_version)
     
     # Resumen de filtros al final
     st.divider()
@@ -148,60 +295,33 @@ def render_main_content(filter_manager, user_info, db_connection, header_placeho
         Los datos de este tablero y sus fuentes de origen están protegidos por acuerdos de confidencialidad y no pueden ser divulgados.
     </div>
     """, unsafe_allow_html=True)
+    
+    return df_completo
 
 def render_dashboard(user_info, db_connection, super_editor_mode=False):
     """Función principal que renderiza todo el dashboard"""
     # Inicializar el filter manager
     filter_manager = FilterManager()
     
-    # Crear placeholder para header que se actualizará después
-    header_placeholder = st.empty()
-    
-    # Renderizar header inicial con valor temporal
-    with header_placeholder.container():
-        render_dashboard_header(user_info['dashboard'], "Actualizando...")
+    # Header en su propio fragmento (consulta la última actualización por su cuenta)
+    render_header_fragment(user_info['dashboard'], db_connection)
     
     # Renderizar filtros en sidebar
     filters = filter_manager.render_filters()
     
-    # Renderizar contenido principal (que actualizará el header)
-    render_main_content(filter_manager, user_info, db_connection, header_placeholder)
+    # Anomalías recientes del dashboard, visibles aunque no se hayan aplicado filtros
+    render_anomaly_sidebar(user_info)
+    
+    # Renderizar contenido principal
+    df_completo = render_main_content(filter_manager, user_info, db_connection)
     
-    # Super Editor si está activado
+    # Super Editor si está activado: reutiliza los datos ya obtenidos por el contenido principal
     if super_editor_mode:
         st.markdown("---")
         
-        from src.editor.super_editor import SuperEditor
         filters = st.session_state.filters
         if filters['applied']:
-            alerta_id = user_info['dashboard']['alert_ids'][0]
-            sentiment_code = None
-            if filters['polaridad'] != 'Todos':
-                sentiment_mapping = {'Positivo': 'POS', 'Neutro': 'NEU', 'Negativo': 'NEG'}
-                sentiment_code = sentiment_mapping.get(filters['polaridad'])
-            
-            # Usar datos cacheados en lugar de nueva query
-            df_completo = get_cached_social_data(
-                alerta_id=alerta_id,
-                origins=filters['origen'],
-                start_date=filters['fecha_inicio'],
-                end_date=filters['fecha_fin'],
-                sentiment=sentiment_code
-            )
-
-            # Si por alguna razón no hay caché, hacer fallback a query directa
-            if df_completo is None:
-                df_completo = db_connection.get_social_listening_data(
-                    alerta_id=alerta_id,
-                    origins=filters['origen'],
-                    start_date=filters['fecha_inicio'],
-                    end_date=filters['fecha_fin'],
-                    sentiment=sentiment_code,
-                    limit=None
-                )
-            
-            editor = SuperEditor()
-            editor.render_super_editor(filters, df_completo, user_info, db_connection)
+            render_editor_fragment(filters, df_completo, user_info, db_connection)
         else:
             st.info("🔍 Aplique los filtros para cargar datos en el editor")
     
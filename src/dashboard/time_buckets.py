@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+from datetime import datetime
+from typing import Optional
+
+
+class TimeBucketer:
+    """Agrupación temporal vectorizada con granularidad adaptativa
+
+    Convierte timestamps a ids enteros de bucket (horas, días, semanas desde el lunes o meses
+    desde epoch, relativos al inicio del rango) operando sobre datetime64 y cuenta con
+    np.bincount. Todos los buckets del rango existen en el resultado, con cero si no hubo
+    menciones, y los bordes vienen como datetime64 listos para usarse como eje de Plotly.
+    """
+
+    # Rango máximo (en días) que se muestra con cada granularidad
+    THRESHOLDS = [
+        ('hour', 3),
+        ('day', 92),
+        ('week', 731)
+    ]
+
+    LABELS = {'hour': 'Hora', 'day': 'Día', 'week': 'Semana', 'month': 'Mes'}
+
+    def __init__(self, start: datetime, end: datetime, granularity: Optional[str] = None,
+                 timezone: Optional[str] = None, source_timezone: str = 'UTC'):
+        """
+        Args:
+            start: Inicio del rango (hora local de los analistas)
+            end: Fin del rango (hora local de los analistas)
+            granularity: 'hour', 'day', 'week' o 'month'; None para elegir según el rango
+            timezone: Zona horaria de visualización (None: sin conversión)
+            source_timezone: Zona en que están guardados los timestamps sin zona
+        """
+        self.start = pd.Timestamp(start).to_datetime64()
+        self.end = pd.Timestamp(end).to_datetime64()
+        self.granularity = granularity or self.choose_granularity(start, end)
+        self.timezone = timezone
+        self.source_timezone = source_timezone
+
+        first, last = self._units(np.array([self.start, self.end]))
+        self._first_unit = int(first)
+        self.n_buckets = max(1, int(last) - self._first_unit + 1)
+        self.edges = self._unit_starts(np.arange(self._first_unit, self._first_unit + self.n_buckets))
+
+    @property
+    def key(self) -> tuple:
+        return (self.granularity, self._first_unit, self.n_buckets, self.timezone, self.source_timezone)
+
+    @property
+    def label(self) -> str:
+        return self.LABELS[self.granularity]
+
+    @classmethod
+    def choose_granularity(cls, start: datetime, end: datetime) -> str:
+        """Granularidad que mantiene el gráfico legible para el rango pedido"""
+        span_days = (pd.Timestamp(end) - pd.Timestamp(start)).total_seconds() / 86400
+
+        for granularity, max_days in cls.THRESHOLDS:
+            if span_days <= max_days:
+                return granularity
+        return 'month'
+
+    def localize(self, created: pd.Series) -> np.ndarray:
+        """Timestamps como datetime64[ns] sin zona, en la hora local de visualización"""
+        created = pd.to_datetime(created)
+
+        if created.dt.tz is None:
+            if self.timezone:
+                created = created.dt.tz_localize(self.source_timezone).dt.tz_convert(self.timezone)
+        else:
+            created = created.dt.tz_convert(self.timezone or 'UTC')
+
+        if created.dt.tz is not None:
+            created = created.dt.tz_localize(None)
+
+        return created.to_numpy(dtype='datetime64[ns]')
+
+    def bucket_ids(self, created: pd.Series) -> np.ndarray:
+        """Id de bucket por fila; -1 para fechas nulas o fuera del rango"""
+        values = self.localize(created)
+        valid = ~np.isnat(values)
+
+        ids = np.full(len(values), -1, dtype=np.int64)
+        ids[valid] = self._units(values[valid]) - self._first_unit
+        ids[(ids < 0) | (ids >= self.n_buckets)] = -1
+        return ids
+
+    def count(self, ids: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """Menciones por bucket (con ceros); weights para filas ya agregadas"""
+        mask = ids >= 0
+        return self._bincount(ids[mask], weights, mask, self.n_buckets)
+
+    def count_by(self, ids: np.ndarray, codes: np.ndarray, n_categories: int,
+                 weights: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Menciones por (categoría, bucket) en un solo bincount
+
+        Args:
+            ids: Ids de bucket de bucket_ids
+            codes: Código entero de categoría por fila (-1 para ignorar la fila)
+            n_categories: Cantidad de categorías
+            weights: Conteo por fila cuando las filas ya vienen agregadas (opcional)
+
+        Returns:
+            Matriz de n_categories × n_buckets
+        """
+        mask = (ids >= 0) & (codes >= 0)
+        flat = codes[mask] * self.n_buckets + ids[mask]
+        counts = self._bincount(flat, weights, mask, n_categories * self.n_buckets)
+        return counts.reshape(n_categories, self.n_buckets)
+
+    def _bincount(self, values: np.ndarray, weights: Optional[np.ndarray], mask: np.ndarray,
+                  length: int) -> np.ndarray:
+        if weights is None:
+            return np.bincount(values, minlength=length)
+        return np.rint(np.bincount(values, weights=weights[mask], minlength=length)).astype(np.int64)
+
+    def _units(self, values: np.ndarray) -> np.ndarray:
+        """Unidades enteras desde epoch de la granularidad elegida"""
+        if self.granularity == 'hour':
+            return values.astype('datetime64[h]').astype(np.int64)
+        if self.granularity == 'day':
+            return values.astype('datetime64[D]').astype(np.int64)
+        if self.granularity == 'week':
+            # 1970-01-01 fue jueves: correr 3 días para que las semanas empiecen en lunes
+            return (values.astype('datetime64[D]').astype(np.int64) + 3) // 7
+        return values.astype('datetime64[M]').astype(np.int64)
+
+    def _unit_starts(self, units: np.ndarray) -> np.ndarray:
+        if self.granularity == 'hour':
+            starts = units.astype('datetime64[h]')
+        elif self.granularity == 'day':
+            starts = units.astype('datetime64[D]')
+        elif self.granularity == 'week':
+            starts = (units * 7 - 3).astype('datetime64[D]')
+        else:
+            starts = units.astype('datetime64[M]')
+        return starts.astype('datetime64[ns]')
+
+
+def _display_config() -> dict:
+    """Sección [display] de secrets (timezone, source_timezone)"""
+    try:
+        return dict(st.secrets.get("display", {}))
+    except Exception:
+        return {}
+
+
+def bucketer_for_filters(filters, summary, start: Optional[datetime] = None,
+                         end: Optional[datetime] = None, granularity: Optional[str] = None) -> TimeBucketer:
+    """
+    Bucketer del rango de fechas de los filtros (o del rango de los datos si no hay filtros)
+
+    Args:
+        filters: Filtros globales del dashboard
+        summary: DashboardSummary de los datos
+        start: Inicio de un acercamiento dentro del rango (opcional)
+        end: Fin de un acercamiento dentro del rango (opcional)
+        granularity: Granularidad forzada (None para elegirla según el rango)
+    """
+    start = start or filters.get('fecha_inicio') or summary.min_date or datetime.now()
+    end = end or filters.get('fecha_fin') or summary.max_date or datetime.now()
+    config = _display_config()
+
+    return TimeBucketer(
+        start, end,
+        granularity=granularity,
+        timezone=config.get('timezone'),
+        source_timezone=config.get('source_timezone', 'UTC')
+    )
@@ -3,12 +3,24 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from .filters import FilterManager
+from .summary import DashboardSummary, get_dashboard_summary
+from .time_buckets import bucketer_for_filters
+from .figure_cache import FigureCache
+from .engagement import get_engagement_summary
+from .downsampling import downsample_series
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import random
 
 class VisualizationManager:
+    # Timelines largas: WebGL por encima de WEBGL_THRESHOLD buckets y reducción con LTTB
+    # por encima de MAX_TIMELINE_POINTS puntos por serie
+    WEBGL_THRESHOLD = 500
+    MAX_TIMELINE_POINTS = 1500
+    
+    GRANULARITY_OPTIONS = {'Automática': None, 'Hora': 'hour', 'Día': 'day', 'Semana': 'week', 'Mes': 'month'}
+    
     def __init__(self):
         # Colores basados en la referencia visual (tema oscuro profesional)
         self.color_palette = {
@@ -34,8 +46,9 @@ class VisualizationManager:
             'Negativo': self.color_palette['secondary']
         }
     
-    def create_total_timeline(self, filters, df_completo):
-        """Crea un gráfico de línea temporal con el total de menciones combinadas"""
+    def create_total_timeline(self, filters, df_completo, split_by_alert=False, summary=None, bucketer=None,
+                              comparison=None, anomalies=None):
+        """Crea un gráfico de línea temporal con el total de menciones combinadas (o apiladas por alerta)"""
         
         # Verificar si hay datos
         if df_completo.empty:
@@ -63,18 +76,10 @@ class VisualizationManager:
             )
             return fig
         
-        # Procesar datos para timeline total
-        df_timeline = df_completo.copy()
-        
-        if 'created_time' in df_timeline.columns:
-            df_timeline['fecha'] = pd.to_datetime(df_timeline['created_time']).dt.date
-            
-            # Agrupar solo por fecha (suma de todas las redes)
-            timeline_data = df_timeline.groupby('fecha').size().reset_index(name='total_count')
-        else:
-            timeline_data = pd.DataFrame()
+        # Totales por bucket (hora/día/semana/mes según el rango) desde el resumen compartido
+        summary = summary or get_dashboard_summary(df_completo)
         
-        if timeline_data.empty:
+        if not summary.has_dates:
             # Sin datos de fecha
             fig = go.Figure()
             fig.add_annotation(
@@ -97,30 +102,40 @@ class VisualizationManager:
             )
             return fig
         
-        # Crear gráfico de línea única
+        bucketer = bucketer or bucketer_for_filters(filters or {}, summary)
+        timeline = summary.timeline(bucketer)
+        
+        # Crear gráfico
         fig = go.Figure()
         
-        fig.add_trace(go.Scatter(
-            x=timeline_data['fecha'],
-            y=timeline_data['total_count'],
-            mode='lines+markers',
-            name='Total Menciones',
-            line=dict(
-                color=self.color_palette['primary'],
-                width=4
-            ),
-            marker=dict(
-                size=8,
-                color=self.color_palette['primary'],
-                line=dict(width=2, color='white')
-            ),
-            fill='tonexty',
-            fillcolor=f"rgba(0, 212, 255, 0.1)",
-            hovertemplate='<b>Total Menciones</b><br>' +
-                        'Fecha: %{x}<br>' +
-                        'Volumen: %{y}<br>' +
-                        '<extra></extra>'
-        ))
+        if split_by_alert:
+            # Un área apilada por alerta (Scattergl no apila: se reduce con índices comunes)
+            reduced = downsample_series(timeline['edges'], timeline['alerts'], self.MAX_TIMELINE_POINTS, shared=True)
+            
+            for alert_id, (x, counts) in reduced.items():
+                fig.add_trace(go.Scatter(
+                    x=x,
+                    y=counts,
+                    mode='lines',
+                    name=f"Alerta {alert_id}",
+                    stackgroup='alertas',
+                    hovertemplate=f'<b>Alerta {alert_id}</b><br>' +
+                                f"{timeline['label']}: %{{x}}<br>" +
+                                'Volumen: %{y}<br>' +
+                                '<extra></extra>'
+                ))
+        else:
+            self._add_total_trace(fig, timeline)
+        
+        if comparison is not None:
+            ghost = comparison.ghost_timeline(bucketer)
+            x, y = downsample_series(timeline['edges'], {'total': ghost['total']}, self.MAX_TIMELINE_POINTS)['total']
+            fig.add_trace(self._ghost_trace(len(timeline['edges']), x, y, 'Periodo anterior',
+                                            'white', timeline['label']))
+        
+        # Horas marcadas por el detector de anomalías, sobre la línea de total
+        if anomalies is not None and not anomalies.empty:
+            fig.add_trace(self._anomaly_trace(anomalies, bucketer, timeline, lambda code: timeline['total']))
         
         # Styling del gráfico
         fig.update_layout(
@@ -144,13 +159,91 @@ class VisualizationManager:
                 gridcolor='rgba(255,255,255,0.1)',
                 showgrid=True
             ),
-            showlegend=False,
+            showlegend=split_by_alert or comparison is not None or (anomalies is not None and not anomalies.empty),
             hovermode='x unified'
         )
         
         return fig
     
-    def create_sentiment_donut(self, filters, df_completo):
+    def _timeline_trace(self, raw_points, **kwargs):
+        """Scatter SVG para series cortas; Scattergl (solo líneas) para las largas"""
+        if raw_points > self.WEBGL_THRESHOLD:
+            kwargs['mode'] = 'lines'
+            kwargs.pop('marker', None)
+            return go.Scattergl(**kwargs)
+        return go.Scatter(**kwargs)
+    
+    def _ghost_trace(self, raw_points, x, y, name, color, label):
+        """Serie del periodo anterior (desplazada al periodo actual) en línea punteada"""
+        return self._timeline_trace(
+            raw_points,
+            x=x,
+            y=y,
+            mode='lines',
+            name=name,
+            line=dict(color=color, width=2, dash='dot'),
+            opacity=0.6,
+            hovertemplate=f'<b>{name}</b><br>{label}: %{{x}}<br>Volumen: %{{y}}<extra></extra>'
+        )
+    
+    def _anomaly_trace(self, anomalies, bucketer, timeline, series_for):
+        """
+        Marcadores de anomalías, uno por bucket (y serie) con las descripciones agrupadas
+        
+        Args:
+            anomalies: DataFrame de AnomalyDetector.get_anomalies
+            bucketer: Bucketer del timeline
+            timeline: Resultado de DashboardSummary.timeline
+            series_for: Función código de sentimiento -> serie sobre la que se dibuja el marcador
+        """
+        ids = bucketer.bucket_ids(anomalies['bucket'])
+        marked = anomalies.assign(bucket_id=ids)[ids >= 0]
+        
+        x, y, text = [], [], []
+        for (bucket_id, code), group in marked.groupby(['bucket_id', 'sentiment'], sort=True):
+            x.append(timeline['edges'][bucket_id])
+            y.append(series_for(code)[bucket_id])
+            text.append('<br>'.join(group['description']))
+        
+        return go.Scatter(
+            x=x,
+            y=y,
+            mode='markers',
+            name='Anomalías',
+            marker=dict(symbol='diamond', size=14, color=self.color_palette['warning'],
+                        line=dict(width=2, color='white')),
+            customdata=text,
+            hovertemplate='<b>⚠️ Anomalía</b><br>%{customdata}<extra></extra>'
+        )
+    
+    def _add_total_trace(self, fig, timeline):
+        """Agrega la línea de total de menciones al gráfico"""
+        x, y = downsample_series(timeline['edges'], {'total': timeline['total']}, self.MAX_TIMELINE_POINTS)['total']
+        
+        fig.add_trace(self._timeline_trace(
+            len(timeline['edges']),
+            x=x,
+            y=y,
+            mode='lines+markers',
+            name='Total Menciones',
+            line=dict(
+                color=self.color_palette['primary'],
+                width=4
+            ),
+            marker=dict(
+                size=8,
+                color=self.color_palette['primary'],
+                line=dict(width=2, color='white')
+            ),
+            fill='tonexty',
+            fillcolor=f"rgba(0, 212, 255, 0.1)",
+            hovertemplate='<b>Total Menciones</b><br>' +
+                        f"{timeline['label']}: %{{x}}<br>" +
+                        'Volumen: %{y}<br>' +
+                        '<extra></extra>'
+        ))
+    
+    def create_sentiment_donut(self, filters, df_completo, summary=None):
         """Crea el gráfico donut de distribución de sentimientos usando datos compartidos"""
         
         # Verificar si hay datos
@@ -203,8 +296,8 @@ class VisualizationManager:
             )
             return fig
         
-        # Contar sentimientos
-        sentiment_counts = df_completo['sentiment_pred'].value_counts()
+        # Conteo de sentimientos del resumen compartido
+        sentiment_counts = (summary or get_dashboard_summary(df_completo)).sentiment_counts
         
         # Convertir códigos de sentimiento a texto legible
         sentiment_mapping = {
@@ -301,7 +394,8 @@ class VisualizationManager:
         
         return fig
     
-    def create_sentiment_timeline(self, filters, df_completo):
+    def create_sentiment_timeline(self, filters, df_completo, summary=None, bucketer=None, comparison=None,
+                                  anomalies=None):
         """Crea un gráfico de línea temporal separado por sentimientos"""
         
         # Verificar si hay datos
@@ -320,31 +414,44 @@ class VisualizationManager:
             )
             return fig
         
-        # Procesar datos
-        df_timeline = df_completo.copy()
-        df_timeline['fecha'] = pd.to_datetime(df_timeline['created_time']).dt.date
-        df_timeline['sentiment_display'] = df_timeline['sentiment_pred'].map({
-            'POS': 'Positivo', 'NEU': 'Neutro', 'NEG': 'Negativo'
-        })
-        
-        # Agrupar por fecha y sentimiento
-        timeline_data = df_timeline.groupby(['fecha', 'sentiment_display']).size().reset_index(name='count')
+        # Conteos por bucket y sentimiento del resumen compartido (con ceros)
+        summary = summary or get_dashboard_summary(df_completo)
+        bucketer = bucketer or bucketer_for_filters(filters or {}, summary)
+        timeline = summary.timeline(bucketer)
         
         fig = go.Figure()
+        reduced = downsample_series(timeline['edges'], timeline['sentiment'], self.MAX_TIMELINE_POINTS)
         
-        for sentiment in ['Positivo', 'Neutro', 'Negativo']:
-            data_sentiment = timeline_data[timeline_data['sentiment_display'] == sentiment]
-            
-            fig.add_trace(go.Scatter(
-                x=data_sentiment['fecha'],
-                y=data_sentiment['count'],
+        for code, sentiment in DashboardSummary.SENTIMENT_DISPLAY.items():
+            x, y = reduced.get(code, (timeline['edges'], None))
+            fig.add_trace(self._timeline_trace(
+                len(timeline['edges']),
+                x=x,
+                y=y,
                 mode='lines+markers',
                 name=sentiment,
                 line=dict(color=self.sentiment_colors[sentiment], width=3),
                 marker=dict(size=6, color=self.sentiment_colors[sentiment]),
-                hovertemplate=f'<b>{sentiment}</b><br>Fecha: %{{x}}<br>Cantidad: %{{y}}<extra></extra>'
+                hovertemplate=f"<b>{sentiment}</b><br>{timeline['label']}: %{{x}}<br>Cantidad: %{{y}}<extra></extra>"
             ))
         
+        # Series fantasma del periodo anterior, una por sentimiento
+        if comparison is not None:
+            ghost = comparison.ghost_timeline(bucketer)
+            reduced_ghost = downsample_series(timeline['edges'], ghost['sentiment'], self.MAX_TIMELINE_POINTS)
+            
+            for code, sentiment in DashboardSummary.SENTIMENT_DISPLAY.items():
+                if code in reduced_ghost:
+                    x, y = reduced_ghost[code]
+                    fig.add_trace(self._ghost_trace(len(timeline['edges']), x, y, f"{sentiment} (anterior)",
+                                                    self.sentiment_colors[sentiment], timeline['label']))
+        
+        # Anomalías sobre la línea del sentimiento afectado (los giros, sobre la negativa)
+        if anomalies is not None and not anomalies.empty:
+            empty = np.zeros(len(timeline['edges']), dtype=np.int64)
+            fig.add_trace(self._anomaly_trace(anomalies, bucketer, timeline,
+                                              lambda code: timeline['sentiment'].get(code, empty)))
+        
         fig.update_layout(
             title={'text': 'Evolución de Sentimientos', 'xanchor': 'center', 'x': 0.5, 'font': {'size': 18, 'color': 'white'}},
             plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font=dict(color='white'),
@@ -357,7 +464,7 @@ class VisualizationManager:
         
         return fig
 
-    def create_social_bars(self, filters, df_completo):
+    def create_social_bars(self, filters, df_completo, summary=None):
         """Crea un gráfico de barras horizontales con porcentajes por red social"""
         
         if df_completo.empty or 'origin' not in df_completo.columns:
@@ -373,9 +480,10 @@ class VisualizationManager:
             )
             return fig
         
-        # Contar por red social y calcular porcentajes
-        origin_counts = df_completo['origin'].value_counts()
-        total_mentions = len(df_completo)
+        # Conteo por red social del resumen compartido y porcentajes
+        summary = summary or get_dashboard_summary(df_completo)
+        origin_counts = summary.origin_counts
+        total_mentions = summary.total
         percentages = [(count / total_mentions) * 100 for count in origin_counts.values]
         
         # Mapear a nombres de display
@@ -417,6 +525,174 @@ class VisualizationManager:
         
         return fig
     
+    def create_hour_of_week_heatmap(self, filters, df_completo, summary=None, bucketer=None,
+                                    origin=None, sentiment=None):
+        """Crea un mapa de calor de menciones por día de la semana y hora"""
+        
+        summary = summary or get_dashboard_summary(df_completo)
+        
+        if df_completo.empty or not summary.has_dates:
+            fig = go.Figure()
+            fig.add_annotation(
+                text="No hay datos de fecha disponibles",
+                x=0.5, y=0.5, xref="paper", yref="paper",
+                font_size=16, font_color="white", showarrow=False
+            )
+            fig.update_layout(
+                title={'text': 'Menciones por Día y Hora', 'xanchor': 'center', 'x': 0.5, 'font': {'size': 18, 'color': 'white'}},
+                plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font=dict(color='white')
+            )
+            return fig
+        
+        # Matriz 7 × 24 del cubo memorizado en el resumen compartido
+        bucketer = bucketer or bucketer_for_filters(filters or {}, summary)
+        counts = summary.hour_of_week(bucketer, origin=origin, sentiment=sentiment)
+        
+        days = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+        hours = [f"{hour:02d}h" for hour in range(24)]
+        
+        fig = go.Figure(data=go.Heatmap(
+            z=counts,
+            x=hours,
+            y=days,
+            colorscale=[[0, self.color_palette['background']], [0.5, self.color_palette['accent']],
+                        [1, self.color_palette['primary']]],
+            hovertemplate='<b>%{y} %{x}</b><br>Menciones: %{z:,}<extra></extra>',
+            colorbar=dict(title='')
+        ))
+        
+        fig.update_layout(
+            title={'text': 'Menciones por Día y Hora', 'xanchor': 'center', 'x': 0.5, 'font': {'size': 18, 'color': 'white'}},
+            plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font=dict(color='white'),
+            xaxis=dict(title='', side='bottom'),
+            yaxis=dict(title='', autorange='reversed'),
+            margin=dict(l=100, r=50, t=80, b=50)
+        )
+        
+        return fig
+    
+    def render_hour_of_week_controls(self, summary):
+        """Selectores de red y sentimiento del mapa de calor; retorna (origin, sentiment)"""
+        display_mapping = {'Facebook': 'Facebook', 'X': 'X (Twitter)', 'Instagram': 'Instagram', 'TikTok': 'TikTok'}
+        origin_options = {'Todas': None}
+        origin_options.update({display_mapping.get(origin, origin): origin for origin in summary.origin_counts.index})
+        sentiment_options = {'Todos': None}
+        sentiment_options.update({label: code for code, label in DashboardSummary.SENTIMENT_DISPLAY.items()})
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            origin_label = st.selectbox("Red social", options=list(origin_options), key="heatmap_origin")
+        with col2:
+            sentiment_label = st.selectbox("Sentimiento", options=list(sentiment_options), key="heatmap_sentiment")
+        
+        return origin_options.get(origin_label), sentiment_options.get(sentiment_label)
+    
+    def create_engagement_sentiment_chart(self, engagement):
+        """Proporción de cada sentimiento en menciones vs en engagement"""
+        shares = engagement.sentiment_shares()
+        labels = [DashboardSummary.SENTIMENT_DISPLAY[code] for code in shares.index]
+        
+        fig = go.Figure()
+        for column, name, opacity in [('mention_share', 'Menciones', 0.45), ('engagement_share', 'Engagement', 1.0)]:
+            fig.add_trace(go.Bar(
+                x=labels,
+                y=shares[column] * 100,
+                name=name,
+                marker_color=[self.sentiment_colors[label] for label in labels],
+                opacity=opacity,
+                text=[f'{value:.1f}%' for value in shares[column] * 100],
+                textposition='outside',
+                hovertemplate=f'<b>%{{x}}</b><br>{name}: %{{y:.1f}}%<extra></extra>'
+            ))
+        
+        fig.update_layout(
+            title={'text': 'Sentimiento Ponderado por Engagement', 'xanchor': 'center', 'x': 0.5, 'font': {'size': 18, 'color': 'white'}},
+            plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font=dict(color='white'),
+            barmode='group',
+            xaxis=dict(title=''),
+            yaxis=dict(gridcolor='rgba(255,255,255,0.1)', title='Porcentaje (%)'),
+            legend=dict(bgcolor='rgba(0,0,0,0.5)', bordercolor='rgba(255,255,255,0.2)'),
+            margin=dict(l=50, r=50, t=80, b=50)
+        )
+        
+        return fig
+    
+    def create_engagement_by_network(self, engagement):
+        """Engagement total por red social, con el promedio por mención en el tooltip"""
+        by_origin = engagement.by_origin
+        display_mapping = {'Facebook': 'Facebook', 'X': 'X (Twitter)', 'Instagram': 'Instagram', 'TikTok': 'TikTok'}
+        labels = [display_mapping.get(origin, origin) for origin in by_origin.index]
+        
+        fig = go.Figure(data=[go.Bar(
+            y=labels,
+            x=by_origin['engagement'],
+            orientation='h',
+            marker_color=[self.social_colors.get(label, self.color_palette['primary']) for label in labels],
+            customdata=np.column_stack([by_origin['mentions'], by_origin['per_mention'].fillna(0)]) if len(by_origin) else None,
+            hovertemplate='<b>%{y}</b><br>Engagement: %{x:,}<br>Menciones: %{customdata[0]:,}<br>'
+                          'Por mención: %{customdata[1]:.1f}<extra></extra>'
+        )])
+        
+        fig.update_layout(
+            title={'text': 'Engagement por Red Social', 'x': 0.5, 'xanchor': 'center', 'font': {'size': 18, 'color': 'white'}},
+            plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', font=dict(color='white'),
+            xaxis=dict(gridcolor='rgba(255,255,255,0.1)', title=''),
+            yaxis=dict(title='', categoryorder='total ascending'),
+            showlegend=False,
+            margin=dict(l=100, r=50, t=80, b=50)
+        )
+        
+        return fig
+    
+    def render_engagement_panel(self, df_completo, data_version=None, figure_cache=None):
+        """Panel de engagement: totales, gráficos por sentimiento y red, y top de posts y autores"""
+        engagement = get_engagement_summary(df_completo, data_version)
+        
+        if not engagement.available:
+            return
+        
+        figure_cache = figure_cache or FigureCache()
+        
+        st.subheader("💬 Engagement")
+        
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Engagement total", f"{engagement.total:,}")
+        col2.metric("Engagement por mención", f"{engagement.per_mention:.1f}")
+        top_n = col3.selectbox("Top", options=[5, 10, 20, 50], index=1, key="engagement_top_n")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            fig = figure_cache.get_or_build(
+                'engagement_sentiment', data_version, {},
+                lambda: self.create_engagement_sentiment_chart(engagement)
+            )
+            st.plotly_chart(fig, use_container_width=True, key="chart_engagement_sentiment")
+        
+        with col2:
+            fig = figure_cache.get_or_build(
+                'engagement_network', data_version, {},
+                lambda: self.create_engagement_by_network(engagement)
+            )
+            st.plotly_chart(fig, use_container_width=True, key="chart_engagement_network")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write(f"**Top {top_n} publicaciones**")
+            posts = engagement.top_posts(top_n)
+            columns = {'created_time': 'Fecha', 'origin': 'Red Social', 'author': 'Autor', 'text': 'Contenido',
+                       'likes': 'Likes', 'comments': 'Comentarios', 'shares': 'Shares', 'engagement': 'Engagement'}
+            posts = posts[[column for column in columns if column in posts.columns]]
+            if 'text' in posts.columns:
+                posts = posts.assign(text=posts['text'].astype(str).str.slice(0, 120))
+            st.dataframe(posts.rename(columns=columns), use_container_width=True, hide_index=True)
+        
+        with col2:
+            st.write(f"**Top {top_n} autores**")
+            authors = engagement.top_authors(top_n).rename(columns={
+                'origin': 'Red Social', 'author': 'Autor', 'mentions': 'Menciones', 'engagement': 'Engagement'
+            })
+            st.dataframe(authors, use_container_width=True, hide_index=True)
+    
     def render_filters_summary(self, filter_manager):
         """Renderiza un resumen de los filtros aplicados"""
         summary = filter_manager.get_filter_summary()
@@ -441,7 +717,7 @@ class VisualizationManager:
         </small>
         """, unsafe_allow_html=True)
     
-    def render_kpis(self, filters, df_completo):
+    def render_kpis(self, filters, df_completo, summary=None, trend_window='edges', trend_days=7, comparison=None):
         """Renderiza los KPIs principales usando datos compartidos"""
         
         # Verificar si hay datos
@@ -478,8 +754,9 @@ class VisualizationManager:
                 )
             return
         
-        # Calcular KPIs reales
-        total_mentions = len(df_completo)
+        # Calcular KPIs reales desde el resumen compartido
+        summary = summary or get_dashboard_summary(df_completo)
+        total_mentions = summary.total
         
         # Período de análisis - usar fechas de los filtros
         if filters and filters.get('applied'):
@@ -497,8 +774,8 @@ class VisualizationManager:
             
         
         # Sentimiento dominante y su cambio temporal
-        if 'sentiment_pred' in df_completo.columns and not df_completo.empty:
-            sentiment_counts = df_completo['sentiment_pred'].value_counts()
+        if summary.has_sentiment and not summary.sentiment_counts.empty:
+            sentiment_counts = summary.sentiment_counts
             sentiment_mapping = {
                 'POS': '✅ Positivo', 
                 'NEU': '⚖️ Neutro', 
@@ -508,28 +785,15 @@ class VisualizationManager:
             # Sentimiento dominante
             dominant_sentiment_code = sentiment_counts.index[0]
             dominant_sentiment = sentiment_mapping.get(dominant_sentiment_code, dominant_sentiment_code)
-            dominant_percentage = (sentiment_counts.iloc[0] / len(df_completo)) * 100
-            
-            # Calcular cambio temporal (principio vs final)
-            df_temporal = df_completo.copy()
-            df_temporal['created_time'] = pd.to_datetime(df_temporal['created_time'])
-            df_temporal = df_temporal.sort_values('created_time')
-            
-            # Dividir en primera y última porción (20% de los datos)
-            total_records = len(df_temporal)
-            split_size = max(1, total_records // 5)
-            
-            df_inicio = df_temporal.head(split_size)
-            df_final = df_temporal.tail(split_size)
+            dominant_percentage = (sentiment_counts.iloc[0] / total_mentions) * 100
             
-            # Calcular porcentajes del sentimiento dominante en cada período
-            inicio_count = len(df_inicio[df_inicio['sentiment_pred'] == dominant_sentiment_code])
-            final_count = len(df_final[df_final['sentiment_pred'] == dominant_sentiment_code])
-            
-            inicio_percentage = (inicio_count / len(df_inicio)) * 100 if len(df_inicio) > 0 else 0
-            final_percentage = (final_count / len(df_final)) * 100 if len(df_final) > 0 else 0
-            
-            delta_percentage = final_percentage - inicio_percentage
+            # Cambio respecto del periodo anterior o entre las ventanas de tendencia elegidas
+            if comparison is not None:
+                delta_percentage = comparison.share_delta(dominant_sentiment_code)
+                trend_help = "Sentimiento mayoritario y cambio respecto del periodo anterior"
+            else:
+                delta_percentage = summary.sentiment_delta(dominant_sentiment_code, trend_window, trend_days)
+                trend_help = None
             
             # Extraer solo el nombre del sentimiento de forma segura
             if dominant_sentiment and ' ' in str(dominant_sentiment):
@@ -555,14 +819,24 @@ class VisualizationManager:
             sentimiento_display = "N/A"
             sentimiento_delta = None
             delta_color = "off"
+            trend_help = None
         
         # Confianza promedio
-        if 'sentiment_confidence' in df_completo.columns:
-            avg_confidence = df_completo['sentiment_confidence'].mean()
-            confidence_display = f"{avg_confidence:.2f}"
+        if summary.avg_confidence is not None:
+            confidence_display = f"{summary.avg_confidence:.2f}"
         else:
             confidence_display = "N/A"
         
+        # Deltas contra el periodo anterior equivalente
+        total_delta = periodo_delta = confidence_delta = None
+        if comparison is not None:
+            total_change = comparison.total_change_pct()
+            total_delta = f"{total_change:+.1f}% vs anterior" if total_change is not None else None
+            periodo_delta = f"vs {comparison.previous_label}"
+            previous_confidence = comparison.kpis['previous']['avg_confidence']
+            if summary.avg_confidence is not None and previous_confidence is not None:
+                confidence_delta = f"{summary.avg_confidence - previous_confidence:+.2f}"
+        
         # Renderizar KPIs
         col1, col2, col3, col4 = st.columns(4)
         
@@ -570,6 +844,7 @@ class VisualizationManager:
             st.metric(
                 label="📊 Total Menciones",
                 value=f"{total_mentions:,}",
+                delta=total_delta,
                 help="Número total de menciones en el período seleccionado"
             )
         
@@ -577,6 +852,8 @@ class VisualizationManager:
             st.metric(
                 label="🗓️ Período de Análisis",
                 value=periodo_display,
+                delta=periodo_delta,
+                delta_color="off",
                 help="Período de análisis del dashboard"
             )
         
@@ -586,55 +863,216 @@ class VisualizationManager:
                 value=sentimiento_display,
                 delta=sentimiento_delta,
                 delta_color=delta_color,
-                help="Sentimiento mayoritario y cambio desde inicio del período"
+                help=trend_help or f"Sentimiento mayoritario y cambio: {DashboardSummary.TREND_WINDOWS[trend_window].replace(' N ', f' {trend_days} ')}"
             )
         
         with col4:
             st.metric(
                 label="🔊 Confianza Promedio",
                 value=confidence_display,
+                delta=confidence_delta,
                 help="Confianza promedio del análisis de sentimiento"
             )
                 
-    def render_visualizations(self, filters, df_completo, filter_manager):
-        """Renderiza todas las visualizaciones usando datos reales"""
+    def render_alert_breakdown(self, df_completo, summary=None):
+        """Menciones y sentimiento dominante por alerta"""
+        counts = (summary or get_dashboard_summary(df_completo)).alert_sentiment
+        cols = st.columns(len(counts))
         
-        if not filters['applied']:
-            st.info("🔍 Aplique los filtros para ver las visualizaciones")
-            return
+        for col, (alert_id, row) in zip(cols, counts.iterrows()):
+            total = int(row.sum())
+            dominant = row.idxmax() if total else None
+            share = (row.max() / total * 100) if total else 0
+            
+            with col:
+                st.metric(
+                    label=f"Alerta {alert_id}",
+                    value=f"{total:,}",
+                    help=f"Sentimiento dominante: {dominant} ({share:.1f}%)" if dominant else None
+                )
+    
+    def render_trend_controls(self):
+        """Ventana de comparación de la tendencia del sentimiento dominante"""
+        col1, col2, _ = st.columns([2, 1, 3])
+        
+        with col1:
+            trend_window = st.selectbox(
+                "Tendencia",
+                options=list(DashboardSummary.TREND_WINDOWS),
+                format_func=DashboardSummary.TREND_WINDOWS.get,
+                key="kpi_trend_window"
+            )
+        
+        trend_days = 7
+        if trend_window != 'edges':
+            with col2:
+                trend_days = st.number_input("N días", min_value=1, max_value=90, value=7, key="kpi_trend_days")
+        
+        return trend_window, int(trend_days)
+    
+    def render_timeline_controls(self, filters, summary):
+        """
+        Granularidad y acercamiento de los timelines
+        
+        Plotly no informa el zoom del navegador al servidor, así que el acercamiento se elige
+        con un rango: ese subperíodo se vuelve a agrupar con mayor resolución en vez de ampliar
+        los buckets del rango completo.
+        
+        Returns:
+            TimeBucketer del rango y granularidad elegidos
+        """
+        full_range = bucketer_for_filters(filters, summary)
+        start = pd.Timestamp(full_range.start).to_pydatetime()
+        end = pd.Timestamp(full_range.end).to_pydatetime()
+        
+        col1, col2 = st.columns([1, 3])
+        
+        with col1:
+            granularity_label = st.selectbox(
+                "Granularidad",
+                options=list(self.GRANULARITY_OPTIONS),
+                key="timeline_granularity"
+            )
+        
+        zoom_start, zoom_end = start, end
+        if end - start > timedelta(hours=1):
+            with col2:
+                # La clave depende del rango para no arrastrar un acercamiento de otros filtros
+                zoom_start, zoom_end = st.slider(
+                    "Acercar periodo",
+                    min_value=start,
+                    max_value=end,
+                    value=(start, end),
+                    step=timedelta(hours=1),
+                    format="DD/MM/YY HH:mm",
+                    key=f"timeline_zoom_{start:%Y%m%d%H%M}_{end:%Y%m%d%H%M}"
+                )
+        
+        return bucketer_for_filters(
+            filters, summary, start=zoom_start, end=zoom_end,
+            granularity=self.GRANULARITY_OPTIONS[granularity_label]
+        )
+    
+    def render_shared_controls(self, summary, comparison_loader=None):
+        """
+        Controles que afectan a KPIs y gráficos a la vez
+
+        Se dibujan fuera de los fragmentos: al cambiarlos se vuelven a ejecutar ambas secciones.
+
+        Args:
+            summary: DashboardSummary de los datos del dashboard
+            comparison_loader: Función que retorna la PeriodComparison del periodo anterior
+                               (si se entrega, se ofrece el modo comparación)
+
+        Returns:
+            (comparison, split_by_alert)
+        """
+        col1, col2 = st.columns(2)
+        
+        # Periodo anterior equivalente desde una sola query agregada (sin filas crudas)
+        comparison = None
+        with col1:
+            if comparison_loader is not None and st.checkbox("📅 Comparar con periodo anterior", value=False,
+                                                             key="compare_previous_period"):
+                comparison = comparison_loader()
+        
+        # Dashboards con varias alertas: permitir desglose por alerta
+        split_by_alert = False
+        if summary.alert_count > 1:
+            with col2:
+                split_by_alert = st.checkbox("Desglosar por alerta", value=False, key="split_by_alert")
+        
+        return comparison, split_by_alert
+    
+    def render_kpi_section(self, filters, df_completo, filter_manager, data_version=None, comparison=None,
+                           split_by_alert=False):
+        """KPIs principales, resumen de filtros y desglose por alerta"""
+        summary = get_dashboard_summary(df_completo, data_version)
         
-        # KPIs principales
         st.subheader("📊 Métricas Principales")
-        self.render_kpis(filters, df_completo)
+        trend_window, trend_days = self.render_trend_controls()
+        
+        self.render_kpis(filters, df_completo, summary, trend_window, trend_days, comparison)
         self.render_filters_summary(filter_manager)
         
-        st.divider()
+        if split_by_alert:
+            self.render_alert_breakdown(df_completo, summary)
+    
+    def render_chart_section(self, filters, df_completo, data_version=None, comparison=None,
+                             split_by_alert=False, anomalies=None):
+        """
+        Timelines, distribuciones, mapa de calor y engagement
+
+        Args:
+            anomalies: Anomalías del detector para las alertas y filtros del dashboard (opcional)
+        """
+        summary = get_dashboard_summary(df_completo, data_version)
+        
+        # Figuras ya construidas para esta versión de datos y parámetros
+        figure_cache = FigureCache()
         
-        # Gráficos principales
         st.subheader("📈 Visualizaciones")
+        bucketer = self.render_timeline_controls(filters, summary)
+        
+        # Las anomalías avanzan por hora sin cambiar la versión de los datos: entran a la clave
+        anomaly_key = None
+        if anomalies is not None and not anomalies.empty:
+            anomaly_key = (len(anomalies), str(anomalies['bucket'].max()))
         
         col1, col2 = st.columns(2)
         
         with col1:
             # Gráfico Timeline
             with st.spinner("Generando gráfico de timeline..."):
-                timeline_fig = self.create_total_timeline(filters, df_completo)
+                timeline_fig = figure_cache.get_or_build(
+                    'timeline', data_version,
+                    {'split_by_alert': split_by_alert, 'buckets': bucketer.key, 'compare': comparison is not None,
+                     'anomalies': anomaly_key},
+                    lambda: self.create_total_timeline(filters, df_completo, split_by_alert, summary, bucketer,
+                                                       comparison, anomalies)
+                )
                 st.plotly_chart(timeline_fig, use_container_width=True, key="chart_timeline")
             
             # Gráfico Timeline por Sentimiento
             with st.spinner("Generando gráfico de sentimientos..."):
-                sentiment_fig = self.create_sentiment_timeline(filters, df_completo)
+                sentiment_fig = figure_cache.get_or_build(
+                    'sentiment_timeline', data_version,
+                    {'buckets': bucketer.key, 'compare': comparison is not None, 'anomalies': anomaly_key},
+                    lambda: self.create_sentiment_timeline(filters, df_completo, summary, bucketer, comparison,
+                                                           anomalies)
+                )
                 st.plotly_chart(sentiment_fig, use_container_width=True, key="chart_sentiment_timeline")
         
         with col2:
             # Gráfico Donut de Sentimientos
             with st.spinner("Generando gráfico de sentimientos..."):
-                sentiment_fig = self.create_sentiment_donut(filters, df_completo)
+                sentiment_fig = figure_cache.get_or_build(
+                    'sentiment_donut', data_version, {},
+                    lambda: self.create_sentiment_donut(filters, df_completo, summary)
+                )
                 st.plotly_chart(sentiment_fig, use_container_width=True, key="chart_sentiment")
             
             # Gráfico Pie de Distribución por Red Social
             with st.spinner("Generando gráfico de distribución por red social..."):
-                social_fig = self.create_social_bars(filters, df_completo)
+                social_fig = figure_cache.get_or_build(
+                    'social_bars', data_version, {},
+                    lambda: self.create_social_bars(filters, df_completo, summary)
+                )
                 st.plotly_chart(social_fig, use_container_width=True, key="chart_social_bars")
         
-        return True
\ No newline at end of file
+        # Cuándo ocurren las menciones (zona horaria de visualización, todo el rango)
+        st.subheader("🕒 Actividad por Día y Hora")
+        heatmap_origin, heatmap_sentiment = self.render_hour_of_week_controls(summary)
+        
+        with st.spinner("Generando mapa de calor..."):
+            heatmap_fig = figure_cache.get_or_build(
+                'hour_of_week', data_version,
+                {'origin': heatmap_origin, 'sentiment': heatmap_sentiment,
+                 'timezone': (bucketer.timezone, bucketer.source_timezone)},
+                lambda: self.create_hour_of_week_heatmap(filters, df_completo, summary, bucketer,
+                                                         heatmap_origin, heatmap_sentiment)
+            )
+            st.plotly_chart(heatmap_fig, use_container_width=True, key="chart_hour_of_week")
+        
+        st.divider()
+        self.render_engagement_panel(df_completo, data_version, figure_cache)
\ No newline at end of file
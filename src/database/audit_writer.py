@@ -0,0 +1,299 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import psycopg2
+import streamlit as st
+from psycopg2.extras import execute_values
+
+
+class AuditLogWriter:
+    """Escritor en segundo plano de logs de auditoría con inserts multi-fila
+
+    Si la base de datos no responde, los lotes se vuelcan a un archivo spool local (JSONL)
+    que se reproduce cuando vuelve la conexión. Las líneas del spool que no se pueden leer
+    (p. ej. truncadas por una caída) se apartan a un archivo .rejected junto al spool.
+    """
+
+    # Tabla y columnas por tipo de log
+    TABLES = {
+        'editor': (
+            'ocdul.editor_logs',
+            ['user_name', 'table_name', 'record_id', 'old_sentiment', 'new_sentiment', 'timestamp']
+        ),
+        'access': (
+            'ocdul.user_access_logs',
+            ['username', 'user_name', 'email', 'action', 'dashboard_id', 'dashboard_title', 'timestamp']
+        )
+    }
+
+    def __init__(self, connection_string: str, batch_size: int = 100,
+                 flush_interval: float = 2.0, max_queue_size: int = 10000,
+                 spool_path: Optional[str] = "logs/audit_spool.jsonl"):
+        """
+        Args:
+            connection_string: Cadena de conexión a la base de datos
+            batch_size: Entradas acumuladas que fuerzan un flush
+            flush_interval: Segundos máximos que una entrada espera en memoria
+            max_queue_size: Entradas máximas encoladas antes de descartar
+            spool_path: Archivo local para lotes que no se pudieron escribir (None lo desactiva)
+        """
+        self.connection_string = connection_string
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spool_path = Path(spool_path) if spool_path else None
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._pending = []
+        self._flush_requested = threading.Event()
+        # _stats se actualiza desde los hilos de Streamlit (encolar) y desde el hilo escritor
+        self._stats_lock = threading.Lock()
+        self._stats = {'enqueued': 0, 'written': 0, 'dropped': 0, 'failed_flushes': 0,
+                       'spooled': 0, 'replayed': 0, 'quarantined': 0, 'loop_errors': 0}
+
+        self._thread = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._thread.start()
+
+        atexit.register(self.flush)
+
+    def log_editor_change(self, user_name: str, table_name: str, record_id: int,
+                          old_sentiment: str, new_sentiment: str):
+        """Encola un cambio del Super Editor (no bloquea)"""
+        self._enqueue('editor', (user_name, table_name, int(record_id), old_sentiment,
+                                 new_sentiment, datetime.now()))
+
+    def log_user_access(self, username: str, user_name: str, email: str,
+                        action: str, dashboard_id: str, dashboard_title: str):
+        """Encola un acceso de usuario (no bloquea)"""
+        # La hora se toma al encolar: un lote reproducido desde el spool conserva la del acceso
+        self._enqueue('access', (username, user_name, email, action, dashboard_id, dashboard_title,
+                                 datetime.now()))
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """
+        Solicita un flush inmediato (incluido el spool) y espera a que termine
+
+        Returns:
+            True si todas las entradas encoladas quedaron escritas en la base de datos
+        """
+        self._flush_requested.set()
+        deadline = time.time() + timeout
+
+        while not self._is_drained() and time.time() < deadline:
+            time.sleep(0.05)
+
+        return self._is_drained()
+
+    def _is_drained(self) -> bool:
+        # El hilo baja la bandera solo al terminar una iteración sin nada pendiente
+        return (not self._flush_requested.is_set() and self._queue.empty() and not self._pending
+                and not (self.spool_path is not None and self.spool_path.exists()))
+
+    def get_stats(self) -> Dict[str, int]:
+        """Estadísticas del escritor para monitoreo"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        return {**stats, 'queued': self._queue.qsize() + len(self._pending)}
+
+    def _count(self, stat: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[stat] += amount
+
+    def _enqueue(self, kind: str, row: tuple):
+        try:
+            self._queue.put_nowait((kind, row))
+            self._count('enqueued')
+        except queue.Full:
+            self._count('dropped')
+
+    def _run(self):
+        last_flush = time.time()
+
+        while True:
+            try:
+                last_flush = self._run_once(last_flush)
+            except Exception as e:
+                # Un error inesperado no debe matar el hilo: lo pendiente sigue en memoria
+                self._count('loop_errors')
+                print(f"Error en el escritor de auditoría: {e}")
+                time.sleep(self.flush_interval)
+                last_flush = time.time()
+
+    def _run_once(self, last_flush: float) -> float:
+        """Una iteración del escritor; retorna el instante del último flush"""
+        timeout = max(0.0, self.flush_interval - (time.time() - last_flush))
+
+        # Con un lote completo pendiente (p. ej. BD caída) no se sigue drenando la cola
+        if len(self._pending) < self.batch_size:
+            try:
+                self._pending.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                pass
+
+        # Drenar lo que ya esté disponible sin esperar
+        while len(self._pending) < self.batch_size:
+            try:
+                self._pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+        due = time.time() - last_flush >= self.flush_interval
+        if self._pending and (len(self._pending) >= self.batch_size or due or self._flush_requested.is_set()):
+            if self._write_batch(self._pending):
+                self._pending = []
+                self._replay_spool()
+            elif self._spool(self._pending):
+                # BD caída: el lote queda en disco y la cola sigue drenándose
+                self._pending = []
+            else:
+                # Reintentar en el próximo intervalo sin perder entradas
+                time.sleep(self.flush_interval)
+            last_flush = time.time()
+        elif due or self._flush_requested.is_set():
+            # Sin tráfico nuevo: reintentar periódicamente (o a pedido) lo que quedó en el spool
+            self._replay_spool()
+            last_flush = time.time()
+
+        if not self._pending and self._queue.empty():
+            self._flush_requested.clear()
+
+        return last_flush
+
+    def _write_batch(self, entries: List[tuple]) -> bool:
+        """Inserta las entradas agrupadas por tabla, un INSERT multi-fila por tabla"""
+        rows_by_kind = {}
+        for kind, row in entries:
+            rows_by_kind.setdefault(kind, []).append(row)
+
+        try:
+            conn = psycopg2.connect(self.connection_string)
+            try:
+                cursor = conn.cursor()
+
+                for kind, rows in rows_by_kind.items():
+                    table, columns = self.TABLES[kind]
+                    execute_values(
+                        cursor,
+                        f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s",
+                        rows,
+                        page_size=self.batch_size
+                    )
+
+                conn.commit()
+            finally:
+                conn.close()
+
+        except Exception as e:
+            self._count('failed_flushes')
+            print(f"Error escribiendo logs de auditoría: {e}")
+            return False
+
+        self._count('written', len(entries))
+        return True
+
+    def _spool(self, entries: List[tuple]) -> bool:
+        """Agrega un lote al archivo spool; retorna False si no hay spool o falla el disco"""
+        if self.spool_path is None:
+            return False
+
+        try:
+            self.spool_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.spool_path, 'a', encoding='utf-8') as f:
+                for kind, row in entries:
+                    f.write(json.dumps({'kind': kind, 'row': list(row)}, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            print(f"Error escribiendo spool de auditoría: {e}")
+            return False
+
+        self._count('spooled', len(entries))
+        return True
+
+    def _replay_spool(self):
+        """Reinserta el spool por lotes; si falla a mitad, conserva solo lo no escrito"""
+        if self.spool_path is None or not self.spool_path.exists():
+            return
+
+        with open(self.spool_path, 'r', encoding='utf-8') as f:
+            batch = []
+            for line in f:
+                if not line.strip():
+                    continue
+
+                entry = self._parse_spool_line(line)
+                if entry is None:
+                    self._quarantine(line)
+                    continue
+                batch.append(entry)
+
+                if len(batch) >= self.batch_size:
+                    if not self._write_batch(batch):
+                        self._rewrite_spool(batch, f)
+                        return
+                    self._count('replayed', len(batch))
+                    batch = []
+
+            if batch:
+                if not self._write_batch(batch):
+                    self._rewrite_spool(batch, f)
+                    return
+                self._count('replayed', len(batch))
+
+        self.spool_path.unlink()
+
+    def _parse_spool_line(self, line: str) -> Optional[tuple]:
+        """Convierte una línea del spool en (tipo, fila); None si está truncada o corrupta"""
+        try:
+            entry = json.loads(line)
+            kind, row = entry['kind'], tuple(entry['row'])
+        except (ValueError, KeyError, TypeError):
+            return None
+
+        if kind not in self.TABLES:
+            return None
+
+        columns = self.TABLES[kind][1]
+        if kind == 'access' and len(row) == len(columns) - 1:
+            # Línea escrita antes de registrar la hora del acceso: queda con la de reproducción
+            row = row + (datetime.now(),)
+
+        if len(row) != len(columns):
+            return None
+        return kind, row
+
+    def _quarantine(self, line: str):
+        """Aparta una línea ilegible del spool para revisarla a mano sin bloquear la reproducción"""
+        rejected_path = self.spool_path.with_name(self.spool_path.name + ".rejected")
+
+        with open(rejected_path, 'a', encoding='utf-8') as f:
+            f.write(line if line.endswith("\n") else line + "\n")
+
+        self._count('quarantined')
+        print(f"Línea ilegible del spool de auditoría apartada en {rejected_path}")
+
+    def _rewrite_spool(self, batch: List[tuple], remaining_lines):
+        """Reemplaza el spool por el lote fallido más las líneas aún no leídas"""
+        tmp_path = self.spool_path.with_name(self.spool_path.name + ".tmp")
+
+        with open(tmp_path, 'w', encoding='utf-8') as out:
+            for kind, row in batch:
+                out.write(json.dumps({'kind': kind, 'row': list(row)}, default=str) + "\n")
+            for line in remaining_lines:
+                out.write(line)
+            out.flush()
+            os.fsync(out.fileno())
+
+        os.replace(tmp_path, self.spool_path)
+
+
+@st.cache_resource
+def get_audit_writer() -> AuditLogWriter:
+    """Instancia única por proceso del escritor de auditoría"""
+    return AuditLogWriter(st.secrets["database"]["connection_string"])
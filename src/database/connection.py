@@ -1,30 +1,94 @@
 import psycopg2
+import psycopg2.pool
 import streamlit as st
 import pandas as pd
 from contextlib import contextmanager
+from typing import Dict, List, Optional
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 from .sql_queries import SocialListeningQueryBuilder
+from .audit_writer import get_audit_writer
+
+
+def _on_script_thread() -> bool:
+    """True en el hilo del script de Streamlit; False en hilos de fondo (jobs, warmer, executors)"""
+    return get_script_run_ctx(suppress_warning=True) is not None
+
+
+def _report_error(message: str):
+    """Muestra el error en la página solo desde el hilo del script; en hilos de fondo lo registra"""
+    if _on_script_thread():
+        st.error(message)
+    else:
+        print(message)
+
 
 class DatabaseConnection:
-    def __init__(self):
-        self.connection_string = st.secrets["database"]["connection_string"]
-        self.sql_builder = SocialListeningQueryBuilder()
+    # Mapeo de tabla a columna ID original
+    ID_COLUMN_MAPPING = {
+        'posts_facebook': 'id_post_original',
+        'posts_instagram': 'id_post_original',
+        'posts_x': 'id_post_original',
+        'posts_tiktok': 'id_post_original',
+        'comentarios_facebook': 'id_comentario_original',
+        'comentarios_instagram': 'id_comentario_original',
+        'comentarios_tiktok': 'id_comentario_original',
+        'respuestas_x': 'id_respuesta_original',
+        'quotes_x': 'id_quote_original'
+    }
+
+    def __init__(self, connection_string: Optional[str] = None,
+                 pool: Optional[psycopg2.pool.ThreadedConnectionPool] = None,
+                 sql_builder: Optional[SocialListeningQueryBuilder] = None):
+        """
+        Args:
+            connection_string: Cadena de conexión (por defecto desde secrets)
+            pool: Pool de conexiones compartido del proceso (opcional)
+            sql_builder: Constructor de queries compartido (opcional)
+        """
+        self.connection_string = connection_string or st.secrets["database"]["connection_string"]
+        self.pool = pool
+        self.sql_builder = sql_builder or SocialListeningQueryBuilder()
 
     @contextmanager
     def get_connection(self):
         """Context manager para manejar conexiones a la DB"""
         conn = None
+        pooled = False
         try:
-            conn = psycopg2.connect(self.connection_string)
+            conn, pooled = self._acquire_connection()
             yield conn
         except Exception as e:
-            if conn:
+            if conn and not conn.closed:
                 conn.rollback()
-            st.error(f"Error de conexión a la base de datos: {e}")
+            _report_error(f"Error de conexión a la base de datos: {e}")
             raise
         finally:
             if conn:
-                conn.close()
+                self._release_connection(conn, pooled)
+    
+    def _acquire_connection(self):
+        """Toma una conexión del pool; si está agotado o no hay pool, abre una directa"""
+        if self.pool is not None:
+            try:
+                return self.pool.getconn(), True
+            except psycopg2.pool.PoolError:
+                pass
+        
+        return psycopg2.connect(self.connection_string), False
+    
+    def _release_connection(self, conn, pooled: bool):
+        if not pooled:
+            conn.close()
+            return
+        
+        # Devolver la conexión sin transacción abierta; las rotas se descartan
+        if not conn.closed:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                pass
+        self.pool.putconn(conn, close=bool(conn.closed))
     
     def test_connection(self):
         """Prueba la conexión a la base de datos"""
@@ -38,12 +102,19 @@ class DatabaseConnection:
             return False, str(e)
     
     def execute_query(self, query, params=None):
-        """Ejecuta una query y retorna un DataFrame"""
+        """
+        Ejecuta una query y retorna un DataFrame
+        
+        En el hilo del script un error se muestra en la página y retorna un DataFrame vacío;
+        en hilos de fondo se propaga para que el llamador no confunda el fallo con "sin datos".
+        """
         try:
             with self.get_connection() as conn:
                 df = pd.read_sql_query(query, conn, params=params)
                 return df
         except Exception as e:
+            if not _on_script_thread():
+                raise
             st.error(f"Error ejecutando query: {e}")
             return pd.DataFrame()
     
@@ -60,7 +131,7 @@ class DatabaseConnection:
                 df = pd.read_sql_query(query, conn, params=[table_name])
                 return df
         except Exception as e:
-            st.error(f"Error obteniendo info de tabla: {e}")
+            _report_error(f"Error obteniendo info de tabla: {e}")
             return pd.DataFrame()
     
     def get_available_tables(self):
@@ -76,11 +147,16 @@ class DatabaseConnection:
                 df = pd.read_sql_query(query, conn)
                 return df['table_name'].tolist()
         except Exception as e:
-            st.error(f"Error obteniendo tablas: {e}")
+            _report_error(f"Error obteniendo tablas: {e}")
             return []
         
     def get_social_listening_data(self, alerta_id, origins, start_date, end_date, sentiment=None, limit=100):
-        """Obtiene datos unificados de social listening"""
+        """
+        Obtiene datos unificados de social listening
+        
+        alerta_id puede ser un ID o una colección de IDs: todas las alertas se leen en una
+        sola query y la columna alerta_id se retorna como categórica para desglosar por alerta.
+        """
         query = self.sql_builder.build_unified_query(
             alerta_id, origins, start_date, end_date, sentiment, limit
         )
@@ -92,10 +168,95 @@ class DatabaseConnection:
             alerta_id, origins, start_date, end_date, sentiment
         )
         
+        df = self.execute_query(query, params)
+        
+        if 'alerta_id' in df.columns:
+            df['alerta_id'] = pd.Categorical(
+                df['alerta_id'], categories=self.sql_builder.normalize_alert_ids(alerta_id)
+            )
+        
+        return df
+
+    def get_review_queue(self, alerta_id, origins, after=None, limit=50):
+        """Obtiene la siguiente página de registros sin revisar con menor confianza"""
+        query, params = self.sql_builder.build_review_queue_query(
+            alerta_id, origins, after, limit
+        )
+        
+        if not query:
+            return pd.DataFrame()
+        
+        return self.execute_query(query, params)
+
+    def get_daily_sentiment_counts(self, alert_ids, origins, start_date, end_date):
+        """Obtiene conteos diarios por sentimiento agregados en el servidor"""
+        query, params = self.sql_builder.build_daily_sentiment_query(
+            alert_ids, origins, start_date, end_date
+        )
+        
+        if not query:
+            return pd.DataFrame(columns=['fecha', 'sentiment_pred', 'total'])
+        
         return self.execute_query(query, params)
 
+    def get_hourly_counts(self, alert_ids, start_date, end_date):
+        """Menciones por hora, alerta, red y sentimiento en [start_date, end_date)"""
+        query, params = self.sql_builder.build_hourly_counts_query(alert_ids, start_date, end_date)
+        return self.execute_query(query, params)
+
+    def get_period_comparison(self, alert_ids, origins, start_date, end_date, sentiment=None, trunc='hour'):
+        """Agregados del periodo actual y del anterior equivalente en una sola query"""
+        query, params = self.sql_builder.build_period_comparison_query(
+            alert_ids, origins, start_date, end_date, sentiment, trunc
+        )
+        
+        if not query:
+            return pd.DataFrame(columns=['periodo', 'bucket', 'alerta_id', 'origin', 'sentiment_pred',
+                                         'total', 'confidence_sum', 'confidence_count'])
+        
+        return self.execute_query(query, params)
+
+    def get_most_visited_dashboards(self, username, exclude=None, limit=3):
+        """Dashboards más visitados por un usuario según los logs de acceso"""
+        query = """
+        SELECT dashboard_id, COUNT(*) AS visits
+        FROM ocdul.user_access_logs
+        WHERE username = %s
+            AND action IN ('LOGIN', 'DASHBOARD_SWITCH')
+            AND dashboard_id IS DISTINCT FROM %s
+        GROUP BY dashboard_id
+        ORDER BY visits DESC
+        LIMIT %s
+        """
+        
+        result = self.execute_query(query, [username, exclude, int(limit)])
+        
+        if result.empty:
+            return []
+        
+        return result['dashboard_id'].tolist()
+
+    def get_dashboard_usage_ranking(self, limit=5, days=7):
+        """Dashboards con más accesos recientes (todos los usuarios)"""
+        query = """
+        SELECT dashboard_id, COUNT(*) AS visits
+        FROM ocdul.user_access_logs
+        WHERE action IN ('LOGIN', 'DASHBOARD_SWITCH')
+            AND timestamp >= NOW() - make_interval(days => %s)
+        GROUP BY dashboard_id
+        ORDER BY visits DESC
+        LIMIT %s
+        """
+        
+        result = self.execute_query(query, [int(days), int(limit)])
+        
+        if result.empty:
+            return []
+        
+        return result['dashboard_id'].tolist()
+
     def get_last_update_timestamp(self, alerta_id):
-        """Obtiene el timestamp del registro más reciente para una alerta"""
+        """Obtiene el timestamp del registro más reciente para una alerta o colección de alertas"""
         tables = self.sql_builder.get_tables_for_origins([
             'Facebook', 'Instagram', 'X (Twitter)', 'TikTok'
         ])
@@ -104,8 +265,8 @@ class DatabaseConnection:
         params = []
         
         for table in tables:
-            union_queries.append(f"SELECT MAX(created_time) as last_update FROM ocdul.{table} WHERE alerta_id = %s")
-            params.append(alerta_id)
+            union_queries.append(f"SELECT MAX(created_time) as last_update FROM ocdul.{table} WHERE alerta_id = ANY(%s)")
+            params.append(self.sql_builder.normalize_alert_ids(alerta_id))
         
         if not union_queries:
             return None
@@ -125,67 +286,16 @@ class DatabaseConnection:
     def update_sentiment(self, table_name: str, record_id: int, new_sentiment: str, 
                     confidence: float = 1.0, user_name: str = 'super_editor'):
         """Actualiza el sentimiento de un registro específico y guarda en correcciones"""
-        
-        # Mapeo de tabla a columna ID original
-        id_column_mapping = {
-            'posts_facebook': 'id_post_original',
-            'posts_instagram': 'id_post_original',
-            'posts_x': 'id_post_original',
-            'posts_tiktok': 'id_post_original',
-            'comentarios_facebook': 'id_comentario_original',
-            'comentarios_instagram': 'id_comentario_original',
-            'comentarios_tiktok': 'id_comentario_original',
-            'respuestas_x': 'id_respuesta_original',
-            'quotes_x': 'id_quote_original'
-        }
-        
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Determinar columna ID original
-                id_column = id_column_mapping.get(table_name, 'id')
-                
-                # Obtener datos actuales
-                query_select = f"""
-                SELECT sentiment_pred, sentiment_confidence, text, origin, {id_column}
-                FROM ocdul.{table_name}
-                WHERE id = %s
-                """
-                cursor.execute(query_select, (record_id,))
-                original_data = cursor.fetchone()
-                
-                if not original_data:
-                    return False, f"No se encontró el registro {record_id}"
-                
-                # Actualizar sentimiento
-                query_update = f"""
-                UPDATE ocdul.{table_name}
-                SET sentiment_pred = %s,
-                    sentiment_confidence = %s
-                WHERE id = %s
-                """
-                cursor.execute(query_update, (new_sentiment, confidence, record_id))
+                status, message = self._apply_sentiment_update(
+                    cursor, table_name, record_id, new_sentiment, confidence, user_name
+                )
                 
-                # Guardar en correcciones solo si cambió
-                if original_data[0] != new_sentiment:
-                    query_correction = """
-                    INSERT INTO ocdul.sentiment_corrections 
-                    (table_source, record_id, id_original, text, origin,
-                    sentiment_original, confidence_original, sentiment_corrected, corrected_by)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
-                    """
-                    cursor.execute(query_correction, (
-                        table_name,
-                        record_id,
-                        original_data[4],  # id_original
-                        original_data[2],  # text
-                        original_data[3],  # origin
-                        original_data[0],  # sentiment_original
-                        original_data[1],  # confidence_original
-                        new_sentiment,
-                        user_name
-                    ))
+                if status == 'no_encontrado':
+                    return False, message
                 
                 conn.commit()
                 return True, f"Registro {record_id} actualizado exitosamente"
@@ -193,6 +303,111 @@ class DatabaseConnection:
         except Exception as e:
             return False, f"Error actualizando registro: {str(e)}"
 
+    def _apply_sentiment_update(self, cursor, table_name: str, record_id: int, new_sentiment: str,
+                                confidence: float, user_name: str):
+        """Aplica una actualización de sentimiento usando un cursor existente (sin commit)
+        
+        Returns:
+            Tupla con (estado, mensaje) donde estado es 'aplicado', 'sin_cambios' o 'no_encontrado'
+        """
+        # Determinar columna ID original
+        id_column = self.ID_COLUMN_MAPPING.get(table_name, 'id')
+        
+        # Obtener datos actuales
+        query_select = f"""
+        SELECT sentiment_pred, sentiment_confidence, text, origin, {id_column}
+        FROM ocdul.{table_name}
+        WHERE id = %s
+        """
+        cursor.execute(query_select, (record_id,))
+        original_data = cursor.fetchone()
+        
+        if not original_data:
+            return 'no_encontrado', f"No se encontró el registro {record_id}"
+        
+        # Si el registro ya tiene el valor final no hay nada que hacer (permite reintentos idempotentes)
+        if original_data[0] == new_sentiment and original_data[1] == confidence:
+            return 'sin_cambios', f"Registro {record_id} ya estaba actualizado"
+        
+        # Actualizar sentimiento
+        query_update = f"""
+        UPDATE ocdul.{table_name}
+        SET sentiment_pred = %s,
+            sentiment_confidence = %s
+        WHERE id = %s
+        """
+        cursor.execute(query_update, (new_sentiment, confidence, record_id))
+        
+        # Guardar en correcciones solo si cambió
+        if original_data[0] != new_sentiment:
+            query_correction = """
+            INSERT INTO ocdul.sentiment_corrections 
+            (table_source, record_id, id_original, text, origin,
+            sentiment_original, confidence_original, sentiment_corrected, corrected_by)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """
+            cursor.execute(query_correction, (
+                table_name,
+                record_id,
+                original_data[4],  # id_original
+                original_data[2],  # text
+                original_data[3],  # origin
+                original_data[0],  # sentiment_original
+                original_data[1],  # confidence_original
+                new_sentiment,
+                user_name
+            ))
+        
+        return 'aplicado', f"Registro {record_id} actualizado exitosamente"
+
+    def apply_sentiment_chunk(self, changes: List[Dict], user_name: str = 'super_editor'):
+        """Aplica un bloque de actualizaciones de sentimiento en una sola transacción
+        
+        Cada cambio se aísla con un savepoint para que un error no invalide el resto del bloque.
+        Solo esos errores por registro se reportan como resultado; si falla la conexión o el
+        commit ningún cambio del bloque quedó aplicado y la excepción se propaga para que el
+        bloque quede pendiente (reintentable) en lugar de marcarse como fallido.
+        
+        Args:
+            changes: Lista de cambios con 'table_name', 'record_id' y 'new_sentiment_code'
+            user_name: Usuario que realiza las correcciones
+            
+        Returns:
+            Lista de tuplas (estado, mensaje) en el mismo orden que changes
+            
+        Raises:
+            Exception: Si no se pudo obtener la conexión o confirmar la transacción
+        """
+        results = []
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            
+            for change in changes:
+                cursor.execute("SAVEPOINT before_change")
+                try:
+                    status, message = self._apply_sentiment_update(
+                        cursor,
+                        change['table_name'],
+                        change['record_id'],
+                        change['new_sentiment_code'],
+                        1.0,
+                        user_name
+                    )
+                    cursor.execute("RELEASE SAVEPOINT before_change")
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    # Conexión caída a mitad del bloque: no es un error del registro
+                    raise
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO SAVEPOINT before_change")
+                    status, message = 'error', f"Error actualizando registro: {str(e)}"
+                
+                results.append((status, message))
+            
+            conn.commit()
+        
+        return results
+
     def delete_record(self, table_name: str, record_id: int):
         """Elimina un registro específico de ocdul y opcionalmente de RAW"""
         
@@ -204,19 +419,6 @@ class DatabaseConnection:
             'tiktok': 'CONSULTAS_TK_RAW'
         }
         
-        # Mapeo de tabla a columna ID original
-        id_column_mapping = {
-            'posts_facebook': 'id_post_original',
-            'posts_instagram': 'id_post_original',
-            'posts_x': 'id_post_original',
-            'posts_tiktok': 'id_post_original',
-            'comentarios_facebook': 'id_comentario_original',
-            'comentarios_instagram': 'id_comentario_original',
-            'comentarios_tiktok': 'id_comentario_original',
-            'respuestas_x': 'id_respuesta_original',
-            'quotes_x': 'id_quote_original'
-        }
-        
         # Mapeo de tabla ocdul a tabla RAW
         raw_table_mapping = {
             'posts_facebook': 'posts',
@@ -235,7 +437,7 @@ class DatabaseConnection:
                 cursor = conn.cursor()
                 
                 # Variables para tracking
-                id_column = id_column_mapping.get(table_name)
+                id_column = self.ID_COLUMN_MAPPING.get(table_name)
                 raw_deleted = False
                 
                 if id_column:
@@ -304,62 +506,164 @@ class DatabaseConnection:
                     conn.rollback()
                     return False, f"No se encontró el registro {record_id}"
                     
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            # Conexión o commit fallidos: el llamador decide si reintentar
+            raise
         except Exception as e:
             return False, f"Error eliminando registro: {str(e)}"
 
-    def log_editor_change(self, user_name: str, table_name: str, record_id: int, old_sentiment: str, new_sentiment: str):
-        """Registra cambios del super editor en logs"""
+    def revert_editor_changes(self, user_name: str, start_time, end_time, reverted_by: str,
+                              records_by_table: Optional[Dict[str, List[int]]] = None):
+        """
+        Revierte en bloque los cambios de sentimiento de un usuario a partir de editor_logs
+        
+        Antes de leer editor_logs se fuerza el flush del escritor de auditoría; si quedan
+        entradas sin escribir (p. ej. en el spool por una caída) la reversión no se ejecuta.
+        
+        Por cada tabla se ejecuta un único UPDATE basado en conjuntos que restaura el sentimiento
+        anterior al primer cambio de la ventana (y su confianza original desde sentiment_corrections).
+        Solo se revierten registros cuyo valor actual sigue siendo el último que puso ese usuario,
+        para no pisar correcciones posteriores de otros editores. Todo ocurre en una transacción.
+        
+        Args:
+            user_name: Usuario cuyos cambios se revierten
+            start_time: Inicio de la ventana de tiempo
+            end_time: Fin de la ventana de tiempo
+            reverted_by: Usuario que ejecuta la reversión (queda en correcciones y logs)
+            records_by_table: Restringir a estos IDs por tabla (p. ej. un lote del editor)
+            
+        Returns:
+            Tupla con (éxito, mensaje, DataFrame de registros revertidos)
+        """
+        tables = list(records_by_table.keys()) if records_by_table else list(self.ID_COLUMN_MAPPING.keys())
+        reverted_frames = []
+        
+        # editor_logs se escribe en diferido: sin un flush completo la reversión leería una
+        # ventana incompleta y dejaría sin revertir los últimos cambios
+        if not get_audit_writer().flush():
+            return False, ("Hay logs del editor pendientes de escribir en la base de datos; "
+                           "intente nuevamente en unos segundos"), pd.DataFrame()
+        
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
                 
-                # Crear tabla de logs si no existe
-                create_table_query = """
-                CREATE TABLE IF NOT EXISTS ocdul.editor_logs (
-                    id SERIAL PRIMARY KEY,
-                    user_name VARCHAR(255),
-                    table_name VARCHAR(255),
-                    record_id INTEGER,
-                    old_sentiment VARCHAR(10),
-                    new_sentiment VARCHAR(10),
-                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-                """
-                cursor.execute(create_table_query)
-                
-                # Insertar log
-                insert_query = """
-                INSERT INTO ocdul.editor_logs 
-                (user_name, table_name, record_id, old_sentiment, new_sentiment)
-                VALUES (%s, %s, %s, %s, %s)
-                """
+                for table_name in tables:
+                    query, params = self._build_revert_query(
+                        table_name, user_name, start_time, end_time, reverted_by,
+                        records_by_table.get(table_name) if records_by_table else None
+                    )
+                    cursor.execute(query, params)
+                    rows = cursor.fetchall()
+                    
+                    if rows:
+                        frame = pd.DataFrame(rows, columns=['id', 'alerta_id', 'sentiment_pred', 'sentiment_confidence'])
+                        frame['table_source'] = table_name
+                        reverted_frames.append(frame)
                 
-                cursor.execute(insert_query, (user_name, table_name, record_id, old_sentiment, new_sentiment))
                 conn.commit()
                 
-                return True, "Cambio registrado en logs"
-                
+        except Exception as e:
+            return False, f"Error revirtiendo cambios: {str(e)}", pd.DataFrame()
+        
+        if not reverted_frames:
+            return True, "No hay cambios para revertir en ese periodo", pd.DataFrame()
+        
+        reverted = pd.concat(reverted_frames, ignore_index=True)
+        return True, f"{len(reverted)} registros revertidos", reverted
+    
+    def _build_revert_query(self, table_name: str, user_name: str, start_time, end_time,
+                            reverted_by: str, record_ids: Optional[List[int]] = None):
+        """Construye la query de reversión basada en conjuntos para una tabla"""
+        id_column = self.ID_COLUMN_MAPPING.get(table_name, 'id')
+        records_condition = "AND record_id = ANY(%s)" if record_ids else ""
+        
+        # editor_logs guarda sentimientos en formato display
+        query = f"""
+        WITH sentiment_map(display, code) AS (
+            VALUES ('Positivo', 'POS'), ('Neutro', 'NEU'), ('Negativo', 'NEG')
+        ),
+        window_logs AS (
+            SELECT record_id,
+                   (array_agg(old_sentiment ORDER BY timestamp, id))[1] AS old_display,
+                   (array_agg(new_sentiment ORDER BY timestamp DESC, id DESC))[1] AS new_display
+            FROM ocdul.editor_logs
+            WHERE table_name = %s
+                AND user_name = %s
+                AND timestamp BETWEEN %s AND %s
+                AND new_sentiment <> 'ELIMINADO'
+                {records_condition}
+            GROUP BY record_id
+        ),
+        targets AS (
+            SELECT w.record_id,
+                   m_old.code AS sentiment_original,
+                   m_new.code AS sentiment_corrected,
+                   sc.confidence_original
+            FROM window_logs w
+            JOIN sentiment_map m_old ON m_old.display = w.old_display
+            JOIN sentiment_map m_new ON m_new.display = w.new_display
+            LEFT JOIN LATERAL (
+                SELECT c.confidence_original
+                FROM ocdul.sentiment_corrections c
+                WHERE c.table_source = %s
+                    AND c.record_id = w.record_id
+                    AND c.corrected_by = %s
+                    AND c.sentiment_original = m_old.code
+                ORDER BY c.id DESC
+                LIMIT 1
+            ) sc ON TRUE
+            WHERE m_old.code <> m_new.code
+        ),
+        reverted AS (
+            UPDATE ocdul.{table_name} t
+            SET sentiment_pred = targets.sentiment_original,
+                sentiment_confidence = COALESCE(targets.confidence_original, t.sentiment_confidence)
+            FROM targets
+            WHERE t.id = targets.record_id
+                AND t.sentiment_pred = targets.sentiment_corrected
+            RETURNING t.id, t.alerta_id, t.text, t.origin, t.{id_column} AS id_original,
+                      targets.sentiment_corrected, targets.sentiment_original, t.sentiment_confidence
+        ),
+        corrections AS (
+            INSERT INTO ocdul.sentiment_corrections
+            (table_source, record_id, id_original, text, origin,
+            sentiment_original, confidence_original, sentiment_corrected, corrected_by)
+            SELECT %s, id, id_original, text, origin, sentiment_corrected, 1.0, sentiment_original, %s
+            FROM reverted
+        ),
+        logs AS (
+            INSERT INTO ocdul.editor_logs
+            (user_name, table_name, record_id, old_sentiment, new_sentiment)
+            SELECT %s, %s, r.id, m_from.display, m_to.display
+            FROM reverted r
+            JOIN sentiment_map m_from ON m_from.code = r.sentiment_corrected
+            JOIN sentiment_map m_to ON m_to.code = r.sentiment_original
+        )
+        SELECT id, alerta_id, sentiment_original, sentiment_confidence FROM reverted
+        """
+        
+        params = [table_name, user_name, start_time, end_time]
+        if record_ids:
+            params.append([int(record_id) for record_id in record_ids])
+        params.extend([table_name, user_name, table_name, reverted_by, reverted_by, table_name])
+        
+        return query, params
+    
+    def log_editor_change(self, user_name: str, table_name: str, record_id: int, old_sentiment: str, new_sentiment: str):
+        """Registra cambios del super editor en logs (escritura diferida por lotes)"""
+        try:
+            get_audit_writer().log_editor_change(user_name, table_name, record_id, old_sentiment, new_sentiment)
+            return True, "Cambio encolado en logs"
         except Exception as e:
             return False, f"Error registrando en logs: {str(e)}"
         
     def log_user_access(self, username: str, user_name: str, email: str, 
                     action: str, dashboard_id: str, dashboard_title: str):
-        """Registra accesos de usuarios en la base de datos"""
+        """Registra accesos de usuarios en la base de datos (escritura diferida por lotes)"""
         try:
-            with self.get_connection() as conn:
-                cursor = conn.cursor()
-                
-                query = """
-                INSERT INTO ocdul.user_access_logs 
-                (username, user_name, email, action, dashboard_id, dashboard_title)
-                VALUES (%s, %s, %s, %s, %s, %s)
-                """
-                
-                cursor.execute(query, (username, user_name, email, action, 
-                                    dashboard_id, dashboard_title))
-                conn.commit()
-                
-                return True, "Log registrado exitosamente"
-                
+            get_audit_writer().log_user_access(username, user_name, email, action,
+                                               dashboard_id, dashboard_title)
+            return True, "Log encolado exitosamente"
         except Exception as e:
-            return False, f"Error registrando log: {str(e)}"
\ No newline at end of file
+            return False, f"Error registrando log: {str(e)}"
@@ -0,0 +1,344 @@
+import argparse
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from .connection import DatabaseConnection
+
+
+class CorrectionsExporter:
+    """Exporta ocdul.sentiment_corrections (etiquetas gold) en streaming con memoria acotada"""
+
+    # Columnas exportadas, en orden
+    COLUMNS = [
+        'correction_id', 'table_source', 'record_id', 'id_original',
+        'sentiment_original', 'confidence_original', 'sentiment_corrected', 'corrected_by',
+        'alerta_id', 'origin', 'created_time', 'text',
+        'sentiment_current', 'confidence_current'
+    ]
+
+    # IDs por detrás de la posición que se siguen vigilando por si su transacción aún no
+    # había confirmado (los huecos más viejos se asumen rollbacks y se descartan)
+    GAP_WINDOW = 10000
+
+    def __init__(self, db_connection: Optional[DatabaseConnection] = None,
+                 state_file: str = "exports/corrections_cursor.json", chunk_size: int = 5000):
+        """
+        Args:
+            db_connection: Conexión a la base de datos (por defecto una nueva)
+            state_file: Archivo donde se guarda la posición de las exportaciones incrementales
+            chunk_size: Filas leídas por bloque desde el cursor del servidor
+        """
+        self.db_connection = db_connection or DatabaseConnection()
+        self.state_file = Path(state_file)
+        self.chunk_size = chunk_size
+
+    def build_export_query(self, table_name: str, after_id: Optional[int] = None,
+                           users: Optional[List[str]] = None,
+                           start_date: Optional[datetime] = None,
+                           end_date: Optional[datetime] = None,
+                           gap_ids: Optional[List[int]] = None):
+        """
+        Construye la query de exportación para una tabla de origen
+
+        Une las correcciones con la fila actual de ocdul y colapsa las correcciones múltiples
+        de un mismo registro a la más reciente (DISTINCT ON ordenado por id descendente).
+
+        Args:
+            gap_ids: IDs anteriores a after_id que no eran visibles en la exportación previa
+
+        Returns:
+            Tupla con (query, parámetros)
+        """
+        conditions = ["sc.table_source = %s"]
+        params = [table_name]
+
+        if after_id is not None:
+            conditions.append("(sc.id > %s OR sc.id = ANY(%s))")
+            params.extend([after_id, list(gap_ids or [])])
+
+        if users:
+            conditions.append("sc.corrected_by = ANY(%s)")
+            params.append(list(users))
+
+        if start_date is not None:
+            conditions.append("t.created_time >= %s")
+            params.append(start_date)
+
+        if end_date is not None:
+            conditions.append("t.created_time <= %s")
+            params.append(end_date)
+
+        query = f"""
+        SELECT * FROM (
+            SELECT DISTINCT ON (sc.record_id)
+                sc.id AS correction_id,
+                sc.table_source,
+                sc.record_id,
+                sc.id_original::text AS id_original,
+                sc.sentiment_original,
+                sc.confidence_original::float8 AS confidence_original,
+                sc.sentiment_corrected,
+                sc.corrected_by,
+                t.alerta_id,
+                t.origin,
+                t.created_time,
+                t.text,
+                t.sentiment_pred AS sentiment_current,
+                t.sentiment_confidence::float8 AS confidence_current
+            FROM ocdul.sentiment_corrections sc
+            JOIN ocdul.{table_name} t ON t.id = sc.record_id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY sc.record_id, sc.id DESC
+        ) latest
+        ORDER BY correction_id
+        """
+
+        return query, params
+
+    def iter_chunks(self, conn, tables: Optional[List[str]] = None,
+                    position: Optional[Dict] = None,
+                    users: Optional[List[str]] = None,
+                    start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None) -> Iterator[List[Dict]]:
+        """
+        Itera las correcciones en bloques usando un cursor del lado del servidor
+
+        Args:
+            conn: Conexión con el snapshot abierto por _begin_snapshot
+            position: Posición de la exportación anterior ({'last_id', 'gap_ids'}) o None
+
+        Yields:
+            Listas de filas (diccionarios) de a lo sumo chunk_size elementos
+        """
+        tables = tables or sorted(self.db_connection.ID_COLUMN_MAPPING.keys())
+        after_id = position['last_id'] if position else None
+        gap_ids = position['gap_ids'] if position else None
+
+        for table_name in tables:
+            query, params = self.build_export_query(table_name, after_id, users, start_date, end_date, gap_ids)
+
+            # Cursor con nombre = cursor del servidor: solo chunk_size filas en memoria
+            cursor = conn.cursor(name=f"export_{table_name}")
+            cursor.itersize = self.chunk_size
+            cursor.execute(query, params)
+
+            try:
+                while True:
+                    rows = cursor.fetchmany(self.chunk_size)
+                    if not rows:
+                        break
+                    yield [dict(zip(self.COLUMNS, row)) for row in rows]
+            finally:
+                cursor.close()
+
+    def _begin_snapshot(self, conn):
+        """Abre una transacción REPEATABLE READ: todas las tablas se leen del mismo snapshot"""
+        with conn.cursor() as cursor:
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+
+    def _next_position(self, conn, position: Optional[Dict]) -> Dict:
+        """
+        Calcula la posición que deja esta exportación dentro del snapshot abierto
+
+        Los IDs de la secuencia se asignan al insertar pero son visibles al confirmar, así que
+        un ID menor al máximo visible puede pertenecer a una transacción aún en curso. Esos
+        huecos se guardan junto a la posición y se vuelven a pedir en la siguiente exportación.
+
+        Returns:
+            Diccionario con 'last_id' (máximo ID visible) y 'gap_ids' (IDs no visibles por detrás)
+        """
+        last_id = position['last_id'] if position else 0
+        previous_gaps = position['gap_ids'] if position else []
+
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM ocdul.sentiment_corrections")
+            max_id = max(int(cursor.fetchone()[0]), last_id)
+
+            window_start = max(last_id, max_id - self.GAP_WINDOW)
+            cursor.execute("""
+                SELECT g.id FROM (
+                    SELECT unnest(%s::bigint[]) AS id
+                    UNION
+                    SELECT generate_series(%s::bigint + 1, %s::bigint)
+                ) g
+                WHERE NOT EXISTS (SELECT 1 FROM ocdul.sentiment_corrections sc WHERE sc.id = g.id)
+                ORDER BY g.id
+            """, (list(previous_gaps), window_start, max_id))
+            gap_ids = [int(row[0]) for row in cursor.fetchall()]
+
+        return {
+            'last_id': max_id,
+            'gap_ids': [gap_id for gap_id in gap_ids if gap_id > max_id - self.GAP_WINDOW]
+        }
+
+    def export(self, output_path: str, file_format: str = 'jsonl',
+               tables: Optional[List[str]] = None, users: Optional[List[str]] = None,
+               start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+               incremental: bool = False, cursor_name: str = 'default') -> Dict:
+        """
+        Exporta las correcciones a un archivo JSONL o Parquet
+
+        Args:
+            output_path: Ruta del archivo de salida
+            file_format: 'jsonl' o 'parquet'
+            tables: Tablas de origen a incluir (por defecto todas)
+            users: Filtrar por usuarios que corrigieron
+            start_date: Fecha mínima de creación del registro
+            end_date: Fecha máxima de creación del registro
+            incremental: Exportar solo correcciones posteriores a la posición guardada
+            cursor_name: Nombre de la posición guardada (una por job nocturno)
+
+        Returns:
+            Diccionario con filas exportadas y la nueva posición
+        """
+        if file_format not in ('jsonl', 'parquet'):
+            raise ValueError(f"Formato no soportado: {file_format}")
+
+        position = self._load_cursor(cursor_name) if incremental else None
+
+        # Escribir a un temporal y renombrar: nunca queda un archivo de salida a medias
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_name(output_path.name + ".tmp")
+
+        with self.db_connection.get_connection() as conn:
+            self._begin_snapshot(conn)
+            new_position = self._next_position(conn, position) if incremental else None
+            chunks = self.iter_chunks(conn, tables, position, users, start_date, end_date)
+
+            try:
+                if file_format == 'jsonl':
+                    total_rows = self._write_jsonl(chunks, tmp_path)
+                else:
+                    total_rows = self._write_parquet(chunks, tmp_path)
+            finally:
+                conn.rollback()
+
+        os.replace(tmp_path, output_path)
+
+        # La posición solo avanza cuando el archivo quedó escrito completo
+        if incremental:
+            self._save_cursor(cursor_name, new_position)
+
+        return {
+            'rows': total_rows,
+            'output_path': str(output_path),
+            'from_correction_id': position['last_id'] if position else None,
+            'to_correction_id': new_position['last_id'] if new_position else None
+        }
+
+    def _write_jsonl(self, chunks, path: Path) -> int:
+        total_rows = 0
+
+        with open(path, 'w', encoding='utf-8') as f:
+            for rows in chunks:
+                for row in rows:
+                    f.write(json.dumps(row, default=str, ensure_ascii=False) + "\n")
+                total_rows += len(rows)
+
+        return total_rows
+
+    def _write_parquet(self, chunks, path: Path) -> int:
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("La exportación a Parquet requiere pyarrow")
+
+        schema = pa.schema([
+            ('correction_id', pa.int64()),
+            ('table_source', pa.string()),
+            ('record_id', pa.int64()),
+            ('id_original', pa.string()),
+            ('sentiment_original', pa.string()),
+            ('confidence_original', pa.float64()),
+            ('sentiment_corrected', pa.string()),
+            ('corrected_by', pa.string()),
+            ('alerta_id', pa.int64()),
+            ('origin', pa.string()),
+            ('created_time', pa.timestamp('us')),
+            ('text', pa.string()),
+            ('sentiment_current', pa.string()),
+            ('confidence_current', pa.float64())
+        ])
+
+        total_rows = 0
+
+        # Un row group por bloque: memoria acotada al tamaño del bloque
+        with pq.ParquetWriter(str(path), schema) as writer:
+            for rows in chunks:
+                writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                total_rows += len(rows)
+
+        return total_rows
+
+    def _load_cursor(self, cursor_name: str) -> Optional[Dict]:
+        """Obtiene la posición guardada ({'last_id', 'gap_ids'}) para un nombre de posición"""
+        if not self.state_file.exists():
+            return None
+
+        try:
+            with open(self.state_file, 'r') as f:
+                position = json.load(f).get(cursor_name)
+        except Exception:
+            return None
+
+        # Formato anterior: solo la última correction_id
+        if isinstance(position, int):
+            return {'last_id': position, 'gap_ids': []}
+        return position
+
+    def _save_cursor(self, cursor_name: str, position: Dict):
+        """Guarda la posición de forma atómica"""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+
+        state = {}
+        if self.state_file.exists():
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+
+        state[cursor_name] = {
+            'last_id': int(position['last_id']),
+            'gap_ids': [int(gap_id) for gap_id in position['gap_ids']]
+        }
+
+        tmp_path = self.state_file.with_name(self.state_file.name + ".tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_file)
+
+
+def main():
+    """Punto de entrada para jobs programados: python -m src.database.corrections_export"""
+    parser = argparse.ArgumentParser(description="Exporta correcciones de sentimiento (gold labels)")
+    parser.add_argument('output', help="Archivo de salida")
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], default='jsonl')
+    parser.add_argument('--table', action='append', dest='tables', help="Tabla de origen (repetible)")
+    parser.add_argument('--user', action='append', dest='users', help="Usuario corrector (repetible)")
+    parser.add_argument('--start-date', type=datetime.fromisoformat)
+    parser.add_argument('--end-date', type=datetime.fromisoformat)
+    parser.add_argument('--incremental', action='store_true', help="Exportar solo correcciones nuevas")
+    parser.add_argument('--cursor-name', default='default')
+    args = parser.parse_args()
+
+    exporter = CorrectionsExporter()
+    result = exporter.export(
+        output_path=args.output,
+        file_format=args.format,
+        tables=args.tables,
+        users=args.users,
+        start_date=args.start_date,
+        end_date=args.end_date,
+        incremental=args.incremental,
+        cursor_name=args.cursor_name
+    )
+
+    print(f"{result['rows']} correcciones exportadas a {result['output_path']} "
+          f"(posición: {result['to_correction_id']})")
+
+
+if __name__ == "__main__":
+    main()
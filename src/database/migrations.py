@@ -0,0 +1,179 @@
+import threading
+import time
+
+import psycopg2
+import streamlit as st
+from typing import List, Optional
+
+
+class Migration:
+    """Cambio de esquema versionado que se aplica una sola vez"""
+
+    def __init__(self, migration_id: str, description: str, statements: List[str]):
+        self.migration_id = migration_id
+        self.description = description
+        self.statements = statements
+
+
+# Registro ordenado de migraciones - agregar siempre al final, nunca modificar las existentes
+MIGRATIONS = [
+    Migration(
+        '001_editor_logs',
+        "Tabla de logs del Super Editor",
+        [
+            """
+            CREATE TABLE IF NOT EXISTS ocdul.editor_logs (
+                id SERIAL PRIMARY KEY,
+                user_name VARCHAR(255),
+                table_name VARCHAR(255),
+                record_id INTEGER,
+                old_sentiment VARCHAR(10),
+                new_sentiment VARCHAR(10),
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+        ]
+    ),
+    Migration(
+        '002_editor_logs_user_time_index',
+        "Índice para reversiones por usuario y periodo",
+        [
+            """
+            CREATE INDEX IF NOT EXISTS idx_editor_logs_user_time
+            ON ocdul.editor_logs (user_name, timestamp)
+            """
+        ]
+    ),
+]
+
+
+class MigrationRunner:
+    """Aplica las migraciones pendientes y registra las aplicadas en ocdul.schema_migrations"""
+
+    # Clave del advisory lock: evita que dos procesos migren a la vez
+    LOCK_KEY = 748213
+
+    def __init__(self, connection_string: str, migrations: List[Migration] = None):
+        self.connection_string = connection_string
+        self.migrations = migrations if migrations is not None else MIGRATIONS
+
+    def run(self) -> List[str]:
+        """
+        Aplica las migraciones pendientes, cada una en su propia transacción
+
+        Returns:
+            Lista de IDs de migraciones aplicadas en esta ejecución
+        """
+        applied_now = []
+        conn = psycopg2.connect(self.connection_string)
+
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT pg_advisory_lock(%s)", (self.LOCK_KEY,))
+
+            cursor.execute("""
+            CREATE TABLE IF NOT EXISTS ocdul.schema_migrations (
+                migration_id VARCHAR(255) PRIMARY KEY,
+                description TEXT,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """)
+            conn.commit()
+
+            cursor.execute("SELECT migration_id FROM ocdul.schema_migrations")
+            already_applied = {row[0] for row in cursor.fetchall()}
+
+            for migration in self.migrations:
+                if migration.migration_id in already_applied:
+                    continue
+
+                try:
+                    for statement in migration.statements:
+                        cursor.execute(statement)
+
+                    cursor.execute(
+                        "INSERT INTO ocdul.schema_migrations (migration_id, description) VALUES (%s, %s)",
+                        (migration.migration_id, migration.description)
+                    )
+                    conn.commit()
+                    applied_now.append(migration.migration_id)
+                except Exception:
+                    conn.rollback()
+                    raise
+
+        finally:
+            try:
+                cursor = conn.cursor()
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (self.LOCK_KEY,))
+                conn.commit()
+            finally:
+                conn.close()
+
+        return applied_now
+
+
+class StartupMigrations:
+    """Estado de las migraciones de arranque del proceso
+
+    st.cache_resource no guarda excepciones: si la migración fallara dentro de la función
+    cacheada se reintentaría en cada rerun. Aquí el fallo queda registrado y se reintenta
+    con backoff exponencial.
+    """
+
+    def __init__(self, runner: MigrationRunner, retry_delay: float = 30.0, max_retry_delay: float = 900.0):
+        """
+        Args:
+            runner: Ejecutor de migraciones
+            retry_delay: Segundos de espera tras el primer fallo
+            max_retry_delay: Tope de la espera entre reintentos
+        """
+        self.runner = runner
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+
+        self.applied = []
+        self.completed = False
+        self.error = None
+        self._failures = 0
+        self._next_attempt = 0.0
+        self._lock = threading.Lock()
+
+    def ensure(self) -> Optional[str]:
+        """
+        Ejecuta las migraciones si aún no terminaron y ya venció el backoff
+
+        Returns:
+            Mensaje del último error, o None si las migraciones están aplicadas
+        """
+        with self._lock:
+            if self.completed or time.time() < self._next_attempt:
+                return self.error
+
+            try:
+                self.applied = self.runner.run()
+                self.completed = True
+                self.error = None
+            except Exception as e:
+                self._failures += 1
+                self.error = str(e)
+                delay = min(self.retry_delay * 2 ** (self._failures - 1), self.max_retry_delay)
+                self._next_attempt = time.time() + delay
+                print(f"Error aplicando migraciones (reintento en {delay:.0f}s): {e}")
+
+            return self.error
+
+
+@st.cache_resource
+def get_startup_migrations() -> StartupMigrations:
+    """Instancia única por proceso del estado de migraciones"""
+    return StartupMigrations(MigrationRunner(st.secrets["database"]["connection_string"]))
+
+
+def run_startup_migrations() -> Optional[str]:
+    """
+    Ejecuta las migraciones una vez por proceso al arrancar la aplicación
+
+    Returns:
+        Mensaje de error si las migraciones no están aplicadas, o None
+    """
+    return get_startup_migrations().ensure()
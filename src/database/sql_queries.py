@@ -1,6 +1,7 @@
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, List, Dict, Optional, Tuple, Union
 
 class SocialListeningQueryBuilder:
     def __init__(self):
@@ -22,6 +23,13 @@ class SocialListeningQueryBuilder:
             'NEG': 'Negativo'
         }
     
+    @staticmethod
+    def normalize_alert_ids(alert_ids: Union[int, Iterable[int]]) -> List[int]:
+        """Acepta un ID de alerta o una colección y retorna una lista ordenada sin duplicados"""
+        if isinstance(alert_ids, (int, np.integer)):
+            return [int(alert_ids)]
+        return sorted({int(alert_id) for alert_id in alert_ids})
+    
     def _build_column_mappings(self) -> Dict[str, Dict[str, str]]:
         """Precalcula mapeos de columnas para todas las tablas - OPTIMIZACIÓN"""
         mappings = {}
@@ -103,7 +111,7 @@ class SocialListeningQueryBuilder:
         return mappings
     
     def build_optimized_query(self, 
-                            alerta_id: int,
+                            alerta_id: Union[int, Iterable[int]],
                             origins: List[str],
                             start_date: datetime,
                             end_date: datetime,
@@ -160,7 +168,7 @@ class SocialListeningQueryBuilder:
                     {mappings['shares']} as shares,
                     '{table}' as table_source
                 FROM ocdul.{table}
-                WHERE alerta_id = %s
+                WHERE alerta_id = ANY(%s)
                     AND origin = %s
                     AND created_time BETWEEN %s AND %s
                     {"AND sentiment_pred = %s" if sentiment and sentiment in ['POS', 'NEU', 'NEG'] else ""}
@@ -181,7 +189,7 @@ class SocialListeningQueryBuilder:
         return final_query
     
     def get_optimized_parameters(self,
-                               alerta_id: int,
+                               alerta_id: Union[int, Iterable[int]],
                                origins: List[str],
                                start_date: datetime,
                                end_date: datetime,
@@ -196,6 +204,7 @@ class SocialListeningQueryBuilder:
         }
         
         params = []
+        alert_ids = self.normalize_alert_ids(alerta_id)
         
         for origin_display in origins:
             if origin_display in self.table_mapping:
@@ -205,7 +214,7 @@ class SocialListeningQueryBuilder:
                 for table in tables:
                     if table in self.column_mappings:
                         # Parámetros base para cada tabla
-                        table_params = [alerta_id, origin_db, start_date, end_date]
+                        table_params = [alert_ids, origin_db, start_date, end_date]
                         
                         # Agregar parámetro de sentimiento si se especifica
                         if sentiment and sentiment in ['POS', 'NEU', 'NEG']:
@@ -217,7 +226,7 @@ class SocialListeningQueryBuilder:
     
     # MÉTODOS LEGACY - Mantener compatibilidad
     def build_unified_query(self, 
-                        alerta_id: int,
+                        alerta_id: Union[int, Iterable[int]],
                         origins: List[str],
                         start_date: datetime,
                         end_date: datetime,
@@ -227,7 +236,7 @@ class SocialListeningQueryBuilder:
         return self.build_optimized_query(alerta_id, origins, start_date, end_date, sentiment, limit)
     
     def get_query_parameters(self,
-                       alerta_id: int,
+                       alerta_id: Union[int, Iterable[int]],
                        origins: List[str],
                        start_date: datetime,
                        end_date: datetime,
@@ -258,4 +267,273 @@ class SocialListeningQueryBuilder:
         for origin in origins:
             if origin in self.table_mapping:
                 tables.extend(self.table_mapping[origin])
-        return list(set(tables))
\ No newline at end of file
+        return list(set(tables))
+    
+    def build_daily_sentiment_query(self,
+                                    alert_ids: List[int],
+                                    origins: List[str],
+                                    start_date: datetime,
+                                    end_date: datetime) -> Tuple[str, List]:
+        """
+        Construye una query agregada de menciones por día y sentimiento
+        
+        Cada rama agrupa en el servidor, por lo que solo viajan (días x sentimientos) filas
+        en lugar de todos los registros.
+        
+        Returns:
+            Tupla con (query, parámetros)
+        """
+        tables = [table for table in self.get_tables_for_origins(origins) if table in self.column_mappings]
+        
+        if not tables:
+            return "", []
+        
+        branch_queries = []
+        params = []
+        
+        for table in sorted(tables):
+            branch_queries.append(f"""
+            SELECT created_time::date AS fecha, sentiment_pred, COUNT(*) AS total
+            FROM ocdul.{table}
+            WHERE alerta_id = ANY(%s)
+                AND created_time BETWEEN %s AND %s
+            GROUP BY 1, 2""")
+            params.extend([self.normalize_alert_ids(alert_ids), start_date, end_date])
+        
+        query = f"""
+        SELECT fecha, sentiment_pred, SUM(total)::bigint AS total
+        FROM ({' UNION ALL '.join(branch_queries)}) daily
+        GROUP BY fecha, sentiment_pred
+        ORDER BY fecha
+        """
+        
+        return query, params
+
+    def build_hourly_counts_query(self,
+                                  alert_ids: List[int],
+                                  start_date: datetime,
+                                  end_date: datetime) -> Tuple[str, List]:
+        """
+        Construye una query agregada de menciones por hora, alerta, red y sentimiento
+
+        Pensada para el detector de anomalías: el rango es semiabierto [start_date, end_date)
+        para que horas consecutivas no se cuenten dos veces, y recorre todas las redes.
+
+        Returns:
+            Tupla con (query, parámetros)
+        """
+        tables = sorted(self.column_mappings)
+        alert_ids = self.normalize_alert_ids(alert_ids)
+
+        branch_queries = []
+        params = []
+
+        for table in tables:
+            branch_queries.append(f"""
+            SELECT date_trunc('hour', created_time) AS bucket,
+                alerta_id, origin, sentiment_pred, COUNT(*) AS total
+            FROM ocdul.{table}
+            WHERE alerta_id = ANY(%s)
+                AND created_time >= %s AND created_time < %s
+            GROUP BY 1, 2, 3, 4""")
+            params.extend([alert_ids, start_date, end_date])
+
+        query = f"""
+        SELECT bucket, alerta_id, origin, sentiment_pred, SUM(total)::bigint AS total
+        FROM ({' UNION ALL '.join(branch_queries)}) hourly
+        GROUP BY bucket, alerta_id, origin, sentiment_pred
+        ORDER BY bucket
+        """
+
+        return query, params
+
+    def build_period_comparison_query(self,
+                                      alert_ids: List[int],
+                                      origins: List[str],
+                                      start_date: datetime,
+                                      end_date: datetime,
+                                      sentiment: Optional[str] = None,
+                                      trunc: str = 'hour') -> Tuple[str, List]:
+        """
+        Construye una query agregada del periodo pedido y del periodo anterior equivalente
+        
+        El rango se extiende hacia atrás en un periodo del mismo largo y cada fila se marca
+        como 'current' o 'previous', de modo que ambos periodos salen de un solo viaje a la
+        base. Se agrupa por (periodo, bucket truncado, alerta, red, sentimiento) con suma y
+        conteo de confianza para poder recalcular el promedio.
+        
+        Args:
+            alert_ids: IDs de las alertas
+            origins: Lista de orígenes (formato display)
+            start_date: Inicio del periodo actual
+            end_date: Fin del periodo actual
+            sentiment: Sentimiento filtrado (opcional)
+            trunc: Unidad de date_trunc ('hour' o 'day')
+            
+        Returns:
+            Tupla con (query, parámetros)
+        """
+        display_to_db = {
+            "Facebook": "Facebook",
+            "X (Twitter)": "X",
+            "Instagram": "Instagram",
+            "TikTok": "TikTok"
+        }
+        previous_start = start_date - (end_date - start_date)
+        alert_ids = self.normalize_alert_ids(alert_ids)
+        filter_sentiment = sentiment in self.sentiment_mapping
+        
+        branch_queries = []
+        params = []
+        
+        for origin_display in origins:
+            for table in self.table_mapping.get(origin_display, []):
+                if table not in self.column_mappings:
+                    continue
+                
+                branch_queries.append(f"""
+            SELECT CASE WHEN created_time < %s THEN 'previous' ELSE 'current' END AS periodo,
+                date_trunc('{trunc}', created_time) AS bucket,
+                alerta_id, origin, sentiment_pred,
+                COUNT(*) AS total,
+                SUM(sentiment_confidence) AS confidence_sum,
+                COUNT(sentiment_confidence) AS confidence_count
+            FROM ocdul.{table}
+            WHERE alerta_id = ANY(%s)
+                AND origin = %s
+                AND created_time BETWEEN %s AND %s
+                {"AND sentiment_pred = %s" if filter_sentiment else ""}
+            GROUP BY 1, 2, 3, 4, 5""")
+                params.extend([start_date, alert_ids, display_to_db.get(origin_display, origin_display),
+                               previous_start, end_date])
+                if filter_sentiment:
+                    params.append(sentiment)
+        
+        if not branch_queries:
+            return "", []
+        
+        query = f"""
+        SELECT periodo, bucket, alerta_id, origin, sentiment_pred,
+            SUM(total)::bigint AS total,
+            SUM(confidence_sum) AS confidence_sum,
+            SUM(confidence_count)::bigint AS confidence_count
+        FROM ({' UNION ALL '.join(branch_queries)}) comparison
+        GROUP BY periodo, bucket, alerta_id, origin, sentiment_pred
+        ORDER BY bucket
+        """
+        
+        return query, params
+    
+    def build_review_queue_query(self,
+                                 alerta_id: Union[int, Iterable[int]],
+                                 origins: List[str],
+                                 after: Optional[Tuple[float, str, int]] = None,
+                                 limit: int = 50) -> Tuple[str, List]:
+        """
+        Construye la query de la cola de revisión por baja confianza con paginación keyset
+        
+        Los registros se ordenan por (sentiment_confidence, table_source, id) y se omiten los
+        que ya tienen una corrección en ocdul.sentiment_corrections (anti-join). Hay una rama
+        por (tabla, alerta) con su propio ORDER BY/LIMIT: con alerta_id fijado por igualdad,
+        el índice (alerta_id, sentiment_confidence, id) sirve el orden keyset como un único
+        range scan; con alerta_id = ANY(...) Postgres tendría que recorrer y ordenar todas las
+        filas de las alertas seleccionadas.
+        
+        Args:
+            alerta_id: ID de la alerta o colección de IDs
+            origins: Lista de orígenes (formato display)
+            after: Último (confianza, tabla, id) de la página anterior, o None para la primera página
+            limit: Tamaño de página
+            
+        Returns:
+            Tupla con (query, parámetros)
+        """
+        tables = [table for table in self.get_tables_for_origins(origins) if table in self.column_mappings]
+        
+        if not tables:
+            return "", []
+        
+        branch_queries = []
+        params = []
+        
+        alert_ids = self.normalize_alert_ids(alerta_id)
+        
+        for table, alert_id in [(table, alert_id) for table in sorted(tables) for alert_id in alert_ids]:
+            keyset_condition = ""
+            branch_params = [alert_id]
+            
+            if after is not None:
+                after_confidence, after_table, after_id = after
+                
+                # Traducir la comparación de la tupla (confianza, tabla, id) a cada rama,
+                # donde la tabla es constante, para mantener un rango simple sobre el índice
+                if table > after_table:
+                    keyset_condition = "AND sentiment_confidence >= %s"
+                    branch_params.append(after_confidence)
+                elif table == after_table:
+                    keyset_condition = "AND (sentiment_confidence, id) > (%s, %s)"
+                    branch_params.extend([after_confidence, after_id])
+                else:
+                    keyset_condition = "AND sentiment_confidence > %s"
+                    branch_params.append(after_confidence)
+            
+            branch_queries.append(f"""
+            (SELECT 
+                t.id,
+                t.alerta_id,
+                t.created_time,
+                t.origin,
+                t.text,
+                t.sentiment_pred,
+                t.sentiment_confidence,
+                {self.column_mappings[table]['author']} as author,
+                '{table}' as table_source
+            FROM ocdul.{table} t
+            WHERE t.alerta_id = %s
+                AND t.sentiment_confidence IS NOT NULL
+                {keyset_condition}
+                AND NOT EXISTS (
+                    SELECT 1 FROM ocdul.sentiment_corrections sc
+                    WHERE sc.table_source = '{table}' AND sc.record_id = t.id
+                )
+            ORDER BY t.sentiment_confidence, t.id
+            LIMIT {int(limit)})""")
+            
+            params.extend(branch_params)
+        
+        query = f"""
+        SELECT * FROM (
+            {' UNION ALL '.join(branch_queries)}
+        ) review
+        ORDER BY sentiment_confidence, table_source COLLATE "C", id
+        LIMIT {int(limit)}
+        """
+        
+        return query, params
+    
+    def get_review_index_statements(self) -> List[str]:
+        """
+        Índices recomendados para la cola de revisión por baja confianza
+        
+        El índice (alerta_id, sentiment_confidence, id) solo sirve el ORDER BY keyset como un
+        range scan si alerta_id se compara por igualdad; por eso build_review_queue_query arma
+        una rama por alerta en lugar de filtrar con alerta_id = ANY(...).
+        
+        Returns:
+            Lista de sentencias CREATE INDEX (CONCURRENTLY, ejecutar fuera de transacción)
+        """
+        statements = []
+        
+        for table in sorted(self.column_mappings.keys()):
+            statements.append(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_{table}_review "
+                f"ON ocdul.{table} (alerta_id, sentiment_confidence, id)"
+            )
+        
+        # Soporte del anti-join contra correcciones
+        statements.append(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_sentiment_corrections_record "
+            "ON ocdul.sentiment_corrections (table_source, record_id)"
+        )
+        
+        return statements
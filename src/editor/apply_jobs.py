@@ -0,0 +1,391 @@
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import streamlit as st
+
+
+class ApplyJob:
+    """Estado de un trabajo de aplicación de cambios del Super Editor"""
+
+    def __init__(self, job_id: str, username: str, user_name: str, alert_ids: List[int],
+                 changes: List[Dict], created_at: float):
+        self.job_id = job_id
+        self.username = username
+        self.user_name = user_name
+        self.alert_ids = alert_ids
+        self.changes = changes
+        self.created_at = created_at
+        self.finished_at = None
+        self.status = 'pendiente'
+
+        # Resultado por índice de cambio: {'status': ..., 'message': ...}
+        self.results = {}
+
+    @property
+    def total(self) -> int:
+        return len(self.changes)
+
+    @property
+    def processed(self) -> int:
+        return len(self.results)
+
+    @property
+    def progress(self) -> float:
+        """Fracción de cambios procesados (0.0 - 1.0)"""
+        if not self.changes:
+            return 1.0
+        return self.processed / self.total
+
+    def is_running(self) -> bool:
+        return self.status in ('pendiente', 'en_progreso')
+
+    def pending_indexes(self) -> List[int]:
+        """Índices de cambios que aún no tienen resultado en el journal"""
+        return [i for i in range(self.total) if i not in self.results]
+
+    def get_reconciliation(self) -> Dict:
+        """
+        Resume el resultado final del trabajo
+
+        Returns:
+            Diccionario con conteos por estado y la lista de cambios fallidos
+        """
+        counts = {'aplicado': 0, 'sin_cambios': 0, 'error': 0, 'pendiente': 0}
+        failures = []
+
+        for index, change in enumerate(self.changes):
+            result = self.results.get(index)
+
+            if result is None:
+                counts['pendiente'] += 1
+                continue
+
+            status = result['status'] if result['status'] in counts else 'error'
+            counts[status] += 1
+
+            if status == 'error':
+                failures.append({
+                    'edit_id': change.get('edit_id'),
+                    'table_name': change.get('table_name'),
+                    'action': change.get('action', 'update'),
+                    'message': result.get('message', '')
+                })
+
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'total': self.total,
+            'counts': counts,
+            'failures': failures
+        }
+
+
+class ApplyJobJournal:
+    """Journal JSONL append-only que hace durables los trabajos de aplicación"""
+
+    def __init__(self, jobs_dir: Path):
+        self.jobs_dir = jobs_dir
+        self._ensure_jobs_directory()
+
+    def _ensure_jobs_directory(self):
+        """Crea el directorio de trabajos si no existe"""
+        self.jobs_dir.mkdir(exist_ok=True)
+
+        # Crear .gitignore para no versionar journals
+        gitignore_path = self.jobs_dir / ".gitignore"
+        if not gitignore_path.exists():
+            with open(gitignore_path, 'w') as f:
+                f.write("*.jsonl\n")
+
+    def _journal_path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.jsonl"
+
+    def _append(self, job_id: str, event: Dict):
+        """Agrega un evento al journal y lo fuerza a disco"""
+        with open(self._journal_path(job_id), 'a') as f:
+            f.write(json.dumps(event, default=str) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def record_created(self, job: ApplyJob):
+        self._append(job.job_id, {
+            'event': 'created',
+            'job_id': job.job_id,
+            'username': job.username,
+            'user_name': job.user_name,
+            'alert_ids': job.alert_ids,
+            'created_at': job.created_at,
+            'changes': job.changes
+        })
+
+    def record_chunk(self, job: ApplyJob, chunk_results: Dict[int, Dict]):
+        self._append(job.job_id, {
+            'event': 'chunk',
+            'at': time.time(),
+            'results': [{'index': index, **result} for index, result in chunk_results.items()]
+        })
+
+    def record_finished(self, job: ApplyJob):
+        self._append(job.job_id, {
+            'event': 'finished',
+            'at': job.finished_at,
+            'status': job.status
+        })
+
+    def delete(self, job_id: str):
+        """Elimina el journal de un trabajo"""
+        try:
+            self._journal_path(job_id).unlink()
+        except FileNotFoundError:
+            pass
+
+    def load_all(self) -> List[ApplyJob]:
+        """Reconstruye todos los trabajos a partir de sus journals"""
+        jobs = []
+
+        for journal_file in self.jobs_dir.glob("*.jsonl"):
+            job = self._load(journal_file)
+            if job:
+                jobs.append(job)
+
+        return jobs
+
+    def _load(self, journal_file: Path) -> Optional[ApplyJob]:
+        job = None
+
+        try:
+            with open(journal_file, 'r') as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Última línea truncada por una caída: se ignora
+                        continue
+
+                    if event['event'] == 'created':
+                        job = ApplyJob(
+                            job_id=event['job_id'],
+                            username=event['username'],
+                            user_name=event['user_name'],
+                            alert_ids=event['alert_ids'],
+                            changes=event['changes'],
+                            created_at=event['created_at']
+                        )
+                    elif job and event['event'] == 'chunk':
+                        for result in event['results']:
+                            job.results[result['index']] = {
+                                'status': result['status'],
+                                'message': result.get('message', '')
+                            }
+                    elif job and event['event'] == 'finished':
+                        job.status = event['status']
+                        job.finished_at = event['at']
+        except Exception as e:
+            print(f"No se pudo leer journal {journal_file}: {e}")
+            return None
+
+        # Un trabajo sin evento final quedó a medias (recarga del proceso o caída)
+        if job and job.is_running():
+            job.status = 'interrumpido'
+
+        return job
+
+
+class ApplyJobRunner:
+    """Ejecuta las colas de cambios del Super Editor en un hilo de fondo por bloques"""
+
+    def __init__(self, jobs_dir: str = "jobs", chunk_size: int = 50, retention_days: float = 30):
+        """
+        Args:
+            jobs_dir: Directorio de los journals
+            chunk_size: Cambios por transacción
+            retention_days: Días que se conserva el journal de un trabajo completado (sigue
+                            disponible para revertir por lote durante ese tiempo)
+        """
+        self.chunk_size = chunk_size
+        self.retention_days = retention_days
+        self.journal = ApplyJobJournal(Path(jobs_dir))
+        self._lock = threading.Lock()
+        self._jobs = {job.job_id: job for job in self.journal.load_all()}
+        self.prune()
+
+    def prune(self) -> int:
+        """
+        Elimina los trabajos completados más antiguos que la retención
+
+        Los interrumpidos se conservan siempre: aún tienen cambios por reanudar.
+
+        Returns:
+            Cantidad de journals eliminados
+        """
+        cutoff = time.time() - self.retention_days * 86400
+
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.status == 'completado' and (job.finished_at or job.created_at) < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+        for job_id in expired:
+            self.journal.delete(job_id)
+
+        return len(expired)
+
+    def submit(self, changes: List[Dict], username: str, user_name: str,
+               alert_ids: List[int], db_connection) -> ApplyJob:
+        """
+        Registra un nuevo trabajo en el journal y lo lanza en segundo plano
+
+        Args:
+            changes: Copia de la cola de cambios del editor
+            username: Usuario de login (para recuperar el trabajo tras recargar)
+            user_name: Nombre registrado en correcciones y logs
+            alert_ids: Alertas afectadas (para invalidar caché al terminar)
+            db_connection: Conexión a la base de datos
+
+        Returns:
+            El trabajo creado
+        """
+        job = ApplyJob(
+            job_id=f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}",
+            username=username,
+            user_name=user_name,
+            alert_ids=list(alert_ids),
+            changes=[self._serialize_change(change) for change in changes],
+            created_at=time.time()
+        )
+
+        self.journal.record_created(job)
+
+        with self._lock:
+            self._jobs[job.job_id] = job
+
+        self._start(job, db_connection)
+        return job
+
+    def resume(self, job_id: str, db_connection) -> Optional[ApplyJob]:
+        """Reanuda un trabajo interrumpido aplicando solo los cambios sin resultado"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job.status != 'interrumpido':
+                return None
+            job.status = 'pendiente'
+
+        self._start(job, db_connection)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[ApplyJob]:
+        return self._jobs.get(job_id)
+
+    def get_jobs_for_user(self, username: str) -> List[ApplyJob]:
+        """Trabajos del usuario ordenados del más reciente al más antiguo"""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.username == username]
+        return sorted(jobs, key=lambda job: job.created_at, reverse=True)
+
+    def _serialize_change(self, change: Dict) -> Dict:
+        """Convierte una entrada de la cola a tipos nativos serializables"""
+        serialized = dict(change)
+        serialized['edit_id'] = int(change['edit_id'])
+        serialized['record_id'] = int(change['record_id'])
+        serialized['timestamp'] = str(change.get('timestamp', ''))
+        return serialized
+
+    def _start(self, job: ApplyJob, db_connection):
+        thread = threading.Thread(
+            target=self._run,
+            args=(job, db_connection),
+            name=f"apply-job-{job.job_id}",
+            daemon=True
+        )
+        thread.start()
+
+    def _run(self, job: ApplyJob, db_connection):
+        job.status = 'en_progreso'
+        pending = job.pending_indexes()
+
+        try:
+            for start in range(0, len(pending), self.chunk_size):
+                chunk_indexes = pending[start:start + self.chunk_size]
+                chunk_results = self._apply_chunk(job, chunk_indexes, db_connection)
+
+                # Primero journal, luego memoria: el progreso visible siempre es durable
+                self.journal.record_chunk(job, chunk_results)
+                job.results.update(chunk_results)
+
+            job.status = 'completado'
+        except Exception as e:
+            print(f"Error en trabajo {job.job_id}: {e}")
+            job.status = 'interrumpido'
+        finally:
+            if job.status == 'completado':
+                job.finished_at = time.time()
+                self.journal.record_finished(job)
+                self.prune()
+
+    def _apply_chunk(self, job: ApplyJob, chunk_indexes: List[int], db_connection) -> Dict[int, Dict]:
+        """Aplica un bloque de cambios y retorna el resultado por índice"""
+        chunk_results = {}
+        updates = []
+
+        for index in chunk_indexes:
+            change = job.changes[index]
+
+            if not change.get('table_name'):
+                chunk_results[index] = {'status': 'error', 'message': 'tabla no identificada'}
+            elif change.get('action') == 'delete':
+                success, message = db_connection.delete_record(
+                    table_name=change['table_name'],
+                    record_id=change['record_id']
+                )
+
+                if success:
+                    chunk_results[index] = {'status': 'aplicado', 'message': message}
+                elif message.startswith("No se encontró"):
+                    # El registro ya no existe (p. ej. se eliminó antes de una caída): estado final alcanzado
+                    chunk_results[index] = {'status': 'sin_cambios', 'message': message}
+                else:
+                    chunk_results[index] = {'status': 'error', 'message': message}
+            else:
+                updates.append(index)
+
+        if updates:
+            results = db_connection.apply_sentiment_chunk(
+                [job.changes[index] for index in updates],
+                user_name=job.user_name
+            )
+
+            for index, (status, message) in zip(updates, results):
+                if status == 'no_encontrado':
+                    status = 'error'
+                chunk_results[index] = {'status': status, 'message': message}
+
+        # Registrar en logs del editor solo los cambios efectivamente aplicados
+        for index in chunk_indexes:
+            if chunk_results[index]['status'] != 'aplicado':
+                continue
+
+            change = job.changes[index]
+            db_connection.log_editor_change(
+                user_name=job.user_name,
+                table_name=change['table_name'],
+                record_id=change['record_id'],
+                old_sentiment=change['current_sentiment'],
+                new_sentiment=change['new_sentiment']
+            )
+
+        return dict(sorted(chunk_results.items()))
+
+
+@st.cache_resource
+def get_apply_job_runner() -> ApplyJobRunner:
+    """Instancia única por proceso: los trabajos sobreviven a recargas y expiración de sesión"""
+    return ApplyJobRunner()
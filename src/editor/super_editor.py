@@ -4,6 +4,22 @@ from datetime import datetime, timedelta
 import plotly.express as px
 from typing import Dict, List, Any
 
+from .apply_jobs import get_apply_job_runner
+
+@st.fragment(run_every=1)
+def render_apply_job_progress(job_id: str):
+    """Progreso de un trabajo en curso: solo este bloque se refresca cada segundo"""
+    job = get_apply_job_runner().get_job(job_id)
+    
+    if job is None:
+        return
+    
+    if job.is_running():
+        st.progress(job.progress, text=f"Aplicando cambios... {job.processed} de {job.total}")
+    else:
+        # Terminado o interrumpido: la ejecución completa muestra la conciliación
+        st.rerun()
+
 class SuperEditor:
     def __init__(self):
         # Inicializar queue de cambios si no existe
@@ -43,21 +59,35 @@ class SuperEditor:
             st.info("Contacta al administrador para solicitar acceso")
             return
         
-        # Verificar si hay datos
-        if not filters['applied'] or df_completo.empty:
-            st.info("🔍 Aplique los filtros principales para cargar datos en el editor")
-            return
-        
-        # Preparar datos
-        df = self._prepare_editor_data(df_completo)
-        
-        # Mostrar estadísticas generales
-        self._render_editor_stats(df)
-        
-        st.markdown("---")
+        # Fuente de registros: datos del dashboard o cola de revisión por baja confianza
+        source_mode = st.radio(
+            "Fuente de registros",
+            options=["Datos del dashboard", "Cola de revisión (baja confianza)"],
+            horizontal=True,
+            key="editor_source_mode"
+        )
         
-        # Filtros específicos del editor
-        filtered_df = self._render_editor_filters(df)
+        if source_mode == "Cola de revisión (baja confianza)":
+            filtered_df = self._render_review_queue(filters, user_info, db_connection)
+            
+            if filtered_df is None:
+                return
+        else:
+            # Verificar si hay datos
+            if not filters['applied'] or df_completo.empty:
+                st.info("🔍 Aplique los filtros principales para cargar datos en el editor")
+                return
+            
+            # Preparar datos
+            df = self._prepare_editor_data(df_completo)
+            
+            # Mostrar estadísticas generales
+            self._render_editor_stats(df)
+            
+            st.markdown("---")
+            
+            # Filtros específicos del editor
+            filtered_df = self._render_editor_filters(df)
         
         if filtered_df.empty:
             st.warning("⚠️ No hay datos con los filtros aplicados")
@@ -70,9 +100,17 @@ class SuperEditor:
         
         st.markdown("---")
 
+        # Progreso y resultado de trabajos de aplicación en segundo plano
+        self._render_apply_jobs(db_connection, user_info)
+
         # Sección unificada de cambios pendientes
         self._render_pending_changes(db_connection, user_info)
         
+        st.markdown("---")
+        
+        # Reversión en bloque desde el historial de auditoría
+        self._render_revert_section(db_connection, user_info)
+        
     
     def _check_editor_permissions(self, user_info: Dict) -> bool:
         """Verifica si el usuario tiene permisos de super editor"""
@@ -102,6 +140,80 @@ class SuperEditor:
         
         return df
     
+    def _render_review_queue(self, filters, user_info: Dict, db_connection):
+        """Renderiza la cola de revisión: registros sin corregir ordenados por menor confianza"""
+        st.subheader("🎯 Cola de Revisión")
+        
+        alerta_id = tuple(sorted(user_info['dashboard']['alert_ids']))
+        origins = filters['origen']
+        
+        # Pila de cursores keyset: el último elemento es el cursor de la página actual
+        if st.session_state.get('review_queue_alert') != alerta_id:
+            st.session_state.review_queue_alert = alerta_id
+            st.session_state.review_cursors = [None]
+            st.session_state.pop('review_page', None)
+        
+        col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
+        
+        with col1:
+            page_size = st.number_input(
+                "Registros por página",
+                min_value=10,
+                max_value=200,
+                value=50,
+                step=10,
+                key="review_page_size"
+            )
+        
+        cursors = st.session_state.review_cursors
+        page_key = (alerta_id, tuple(sorted(origins)), cursors[-1], page_size)
+        
+        # Reutilizar la página ya consultada mientras no cambie el cursor
+        cached_page = st.session_state.get('review_page')
+        if cached_page is None or cached_page['key'] != page_key:
+            page_df = db_connection.get_review_queue(
+                alerta_id, origins, after=cursors[-1], limit=page_size
+            )
+            st.session_state.review_page = {'key': page_key, 'data': page_df}
+        else:
+            page_df = cached_page['data']
+        
+        with col2:
+            if st.button("⬅️ Anterior", disabled=len(cursors) <= 1, use_container_width=True):
+                cursors.pop()
+                st.rerun(scope="fragment")
+        
+        with col3:
+            if st.button("➡️ Siguiente", disabled=len(page_df) < page_size, use_container_width=True):
+                last_row = page_df.iloc[-1]
+                cursors.append((
+                    float(last_row['sentiment_confidence']),
+                    last_row['table_source'],
+                    int(last_row['id'])
+                ))
+                st.rerun(scope="fragment")
+        
+        with col4:
+            if st.button("🔄 Reiniciar", use_container_width=True):
+                st.session_state.review_cursors = [None]
+                st.session_state.pop('review_page', None)
+                st.rerun(scope="fragment")
+        
+        with st.expander("🗂️ Índices recomendados"):
+            st.caption("Permiten obtener cada página sin recorrer toda la alerta")
+            st.code(";\n".join(db_connection.sql_builder.get_review_index_statements()) + ";", language="sql")
+        
+        if page_df.empty:
+            st.success("✅ No quedan registros pendientes de revisión")
+            return None
+        
+        st.caption(
+            f"Página {len(cursors)} • confianza "
+            f"{page_df['sentiment_confidence'].min():.2f} - {page_df['sentiment_confidence'].max():.2f}"
+        )
+        
+        return self._prepare_editor_data(page_df)
+    
     def _render_editor_stats(self, df: pd.DataFrame):
         """Renderiza estadísticas del editor"""
         
@@ -239,7 +351,7 @@ class SuperEditor:
             with col_clear:
                 if st.button("🗑️ Limpiar Queue", type="secondary"):
                     st.session_state.edit_queue = []
-                    st.rerun()
+                    st.rerun(scope="fragment")
             
             with col_preview:
                 if st.button("👁️ Preview Cambios", type="secondary"):
@@ -356,7 +468,7 @@ class SuperEditor:
             # Botones alineados a la derecha
             if st.button("🗑️ Limpiar Todo", type="secondary", use_container_width=True):
                 st.session_state.edit_queue = []
-                st.rerun()
+                st.rerun(scope="fragment")
             
             if st.button("✅ Aplicar Cambios", type="primary", use_container_width=True):
                 self._apply_changes_to_database(db_connection, user_info)
@@ -496,7 +608,7 @@ class SuperEditor:
             if st.button("❌ Cancelar Todo", type="secondary"):
                 st.session_state.edit_queue = []
                 st.success("✅ Queue limpiado")
-                st.rerun()
+                st.rerun(scope="fragment")
         
         with col2:
             if st.button("👁️ Preview Final", type="secondary"):
@@ -537,99 +649,208 @@ class SuperEditor:
             st.toast(f"{changes_detected} cambios agregados", icon="✅")
     
     def _apply_changes_to_database(self, db_connection, user_info: Dict):
-        """Aplica los cambios a la base de datos"""
+        """Envía la cola de cambios a un trabajo de fondo durable"""
         if not st.session_state.edit_queue:
             st.warning("No hay cambios para aplicar")
             return
         
         try:
-            with st.spinner("Aplicando cambios a la base de datos..."):
-                success_count = 0
-                error_count = 0
+            runner = get_apply_job_runner()
+            job = runner.submit(
+                changes=st.session_state.edit_queue,
+                username=st.session_state.get('username', user_info['user']['name']),
+                user_name=user_info['user']['name'],
+                alert_ids=user_info['dashboard']['alert_ids'],
+                db_connection=db_connection
+            )
+            
+            st.session_state.active_apply_job = job.job_id
+            
+            # Limpiar queue y tabla editable: el trabajo ya quedó registrado en el journal
+            st.session_state.edit_queue = []
+            if 'sentiment_editor_table' in st.session_state:
+                del st.session_state['sentiment_editor_table']
+            
+            st.rerun()
                 
-                for change in st.session_state.edit_queue:
-                    try:
-                        # Validar tabla
-                        if not change.get('table_name'):
-                            error_count += 1
-                            st.error(f"Error en cambio {change['edit_id']}: tabla no identificada")
-                            continue
-                        
-                        # Verificar si es eliminación o actualización
-                        if change.get('action') == 'delete':
-                            # Eliminar registro
-                            success, message = db_connection.delete_record(
-                                table_name=change['table_name'],
-                                record_id=change['record_id']
-                            )
-                            
-                            if success:
-                                # Registrar eliminación en logs
-                                db_connection.log_editor_change(
-                                    user_name=user_info['user']['name'],
-                                    table_name=change['table_name'],
-                                    record_id=change['record_id'],
-                                    old_sentiment=change['current_sentiment'],
-                                    new_sentiment='ELIMINADO'
-                                )
-                                success_count += 1
-                            else:
-                                error_count += 1
-                                st.error(f"Error eliminando registro {change['edit_id']}: {message}")
-                        
-                        else:
-                            # Actualizar sentimiento
-                            success, message = db_connection.update_sentiment(
-                                table_name=change['table_name'],
-                                record_id=change['record_id'],
-                                new_sentiment=change['new_sentiment_code'],
-                                confidence=1.0,
-                                user_name=user_info['user']['name']
-                            )
-                            
-                            if success:
-                                # Registrar en logs
-                                db_connection.log_editor_change(
-                                    user_name=user_info['user']['name'],
-                                    table_name=change['table_name'],
-                                    record_id=change['record_id'],
-                                    old_sentiment=change['current_sentiment'],
-                                    new_sentiment=change['new_sentiment']
-                                )
-                                success_count += 1
-                            else:
-                                error_count += 1
-                                st.error(f"Error en cambio {change['edit_id']}: {message}")
-                            
-                    except Exception as e:
-                        error_count += 1
-                        st.error(f"Error en cambio {change['edit_id']}: {str(e)}")
+        except Exception as e:
+            st.error(f"Error crítico al aplicar cambios: {str(e)}")
+    
+    def _render_apply_jobs(self, db_connection, user_info: Dict):
+        """Muestra progreso, reanudación y conciliación de los trabajos de aplicación"""
+        runner = get_apply_job_runner()
+        username = st.session_state.get('username', user_info['user']['name'])
+        jobs = runner.get_jobs_for_user(username)
+        
+        if not jobs:
+            return
+        
+        st.subheader("⏳ Aplicación de Cambios")
+        
+        # Trabajos interrumpidos (recarga, caída del proceso) - se pueden reanudar
+        for job in jobs:
+            if job.status != 'interrumpido':
+                continue
+            
+            col1, col2 = st.columns([3, 1])
+            with col1:
+                st.warning(
+                    f"⚠️ Trabajo {job.job_id} interrumpido: "
+                    f"{job.processed} de {job.total} cambios procesados"
+                )
+            with col2:
+                if st.button("▶️ Reanudar", key=f"resume_job_{job.job_id}", use_container_width=True):
+                    runner.resume(job.job_id, db_connection)
+                    st.session_state.active_apply_job = job.job_id
+                    st.rerun()
+        
+        # Trabajo en curso o el más reciente de esta sesión
+        job_id = st.session_state.get('active_apply_job')
+        job = runner.get_job(job_id) if job_id else next((j for j in jobs if j.is_running()), None)
+        
+        if not job:
+            return
+        
+        if job.is_running():
+            # El trabajo corre en otro hilo: el fragmento consulta su progreso sin bloquear el script
+            render_apply_job_progress(job.job_id)
+            return
+        
+        self._render_job_reconciliation(job)
+        
+        # Invalidar caché una sola vez por trabajo terminado
+        reconciled_jobs = st.session_state.setdefault('reconciled_apply_jobs', set())
+        if job.job_id not in reconciled_jobs:
+            reconciled_jobs.add(job.job_id)
+            
+            if job.get_reconciliation()['counts']['aplicado'] > 0:
+                from src.utils.data_cache import invalidate_social_cache
                 
-                # Invalidar caché si hubo cambios exitosos
-                if success_count > 0:
-                    from src.utils.data_cache import invalidate_social_cache
-                    
-                    # Obtener alerta_id del usuario
-                    alerta_id = user_info['dashboard']['alert_ids'][0]
-                    
-                    # Invalidar todo el caché de esta alerta
+                for alerta_id in job.alert_ids:
                     invalidate_social_cache(alerta_id)
-                    
-                    st.success(f"✅ {success_count} cambios aplicados exitosamente")
                 
-                if error_count > 0:
-                    st.error(f"❌ {error_count} cambios fallaron")
-                
-                # Limpiar queue y tabla editable
-                st.session_state.edit_queue = []
-                if 'sentiment_editor_table' in st.session_state:
-                    del st.session_state['sentiment_editor_table']
+                # Los registros corregidos salen de la cola de revisión
+                st.session_state.pop('review_page', None)
                 
                 # Recargar la página con datos frescos
                 st.rerun()
+    
+    def _render_job_reconciliation(self, job):
+        """Muestra el resultado final de un trabajo de aplicación"""
+        reconciliation = job.get_reconciliation()
+        counts = reconciliation['counts']
+        
+        if job.status == 'interrumpido':
+            return
+        
+        if counts['aplicado'] > 0:
+            st.success(f"✅ {counts['aplicado']} cambios aplicados exitosamente")
+        
+        if counts['sin_cambios'] > 0:
+            st.info(f"ℹ️ {counts['sin_cambios']} cambios ya estaban aplicados")
+        
+        if counts['error'] > 0:
+            st.error(f"❌ {counts['error']} cambios fallaron")
+            
+            with st.expander("🔍 Detalle de cambios fallidos"):
+                st.dataframe(
+                    pd.DataFrame(reconciliation['failures']),
+                    hide_index=True,
+                    use_container_width=True
+                )
+    
+    def _render_revert_section(self, db_connection, user_info: Dict):
+        """Renderiza la reversión en bloque de cambios por usuario/periodo o por lote"""
+        with st.expander("↩️ Revertir Cambios"):
+            runner = get_apply_job_runner()
+            username = st.session_state.get('username', user_info['user']['name'])
+            finished_jobs = [job for job in runner.get_jobs_for_user(username) if job.status == 'completado']
+            
+            tab_window, tab_batch = st.tabs(["Por usuario y periodo", "Por lote"])
+            
+            with tab_window:
+                target_user = st.text_input(
+                    "Usuario",
+                    value=user_info['user']['name'],
+                    key="revert_user_name"
+                )
                 
-        except Exception as e:
-            st.error(f"Error crítico al aplicar cambios: {str(e)}")
+                col_start, col_end = st.columns(2)
+                with col_start:
+                    start_date = st.date_input("Desde", value=datetime.now().date(), key="revert_date_start")
+                    start_time = st.time_input("Hora desde", value=datetime.min.time(), key="revert_time_start")
+                with col_end:
+                    end_date = st.date_input("Hasta", value=datetime.now().date(), key="revert_date_end")
+                    end_time = st.time_input("Hora hasta", value=datetime.max.time().replace(microsecond=0), key="revert_time_end")
+                
+                if st.button("↩️ Revertir periodo", type="primary", key="revert_window_btn"):
+                    self._revert_changes(
+                        db_connection,
+                        user_info,
+                        user_name=target_user,
+                        start=datetime.combine(start_date, start_time),
+                        end=datetime.combine(end_date, end_time)
+                    )
+            
+            with tab_batch:
+                if not finished_jobs:
+                    st.info("No hay lotes aplicados para revertir")
+                else:
+                    job_id = st.selectbox(
+                        "Lote",
+                        options=[job.job_id for job in finished_jobs],
+                        format_func=lambda jid: f"{jid} ({runner.get_job(jid).total} cambios)",
+                        key="revert_batch_id"
+                    )
+                    
+                    if st.button("↩️ Revertir lote", type="primary", key="revert_batch_btn"):
+                        job = runner.get_job(job_id)
+                        
+                        # Solo los cambios de sentimiento aplicados del lote
+                        records_by_table = {}
+                        for index, change in enumerate(job.changes):
+                            result = job.results.get(index, {})
+                            if change.get('action') != 'delete' and result.get('status') == 'aplicado':
+                                records_by_table.setdefault(change['table_name'], []).append(change['record_id'])
+                        
+                        if not records_by_table:
+                            st.info("El lote no tiene cambios de sentimiento aplicados")
+                        else:
+                            self._revert_changes(
+                                db_connection,
+                                user_info,
+                                user_name=job.user_name,
+                                start=datetime.fromtimestamp(job.created_at),
+                                end=datetime.now(),
+                                records_by_table=records_by_table
+                            )
+    
+    def _revert_changes(self, db_connection, user_info: Dict, user_name: str, start, end,
+                        records_by_table=None):
+        """Ejecuta la reversión y parchea los datos cacheados de las alertas afectadas"""
+        with st.spinner("Revirtiendo cambios..."):
+            success, message, reverted = db_connection.revert_editor_changes(
+                user_name=user_name,
+                start_time=start,
+                end_time=end,
+                reverted_by=user_info['user']['name'],
+                records_by_table=records_by_table
+            )
+        
+        if not success:
+            st.error(f"❌ {message}")
+            return
+        
+        if reverted.empty:
+            st.info(message)
+            return
+        
+        # Parchear el caché en lugar de descartarlo: evita recargar toda la alerta
+        from src.utils.data_cache import patch_social_cache
+        patch_social_cache(reverted)
+        st.session_state.pop('review_page', None)
+        
+        st.success(f"✅ {message}")
     
     def _log_changes(self, user_info: Dict, success_count: int, error_count: int):
         """Registra los cambios en el log"""
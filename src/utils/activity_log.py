@@ -0,0 +1,287 @@
+import bisect
+import json
+import os
+import struct
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin bloqueo entre procesos
+    fcntl = None
+
+
+class ActivityLog:
+    """Log de actividad JSONL de solo-append con rotación, lectura de cola e índice temporal
+
+    Cada entrada es una línea escrita con un único write en modo O_APPEND, por lo que varios
+    procesos pueden escribir a la vez sin intercalar líneas. Junto a cada archivo se mantiene
+    un índice disperso (.idx) de registros binarios (timestamp, offset): se agrega uno por cada
+    línea que cruza un límite de index_block bytes, lo que permite ubicar un rango de tiempo
+    con búsqueda binaria y leer solo esa parte del archivo.
+    """
+
+    INDEX_RECORD = struct.Struct("<dQ")
+
+    # Tolerancia de desorden entre procesos al cortar un escaneo por tiempo
+    TIME_SLACK = 5.0
+
+    def __init__(self, log_dir: str = "logs", base_name: str = "user_activity",
+                 max_bytes: int = 10 * 1024 * 1024, max_age_seconds: float = 24 * 3600,
+                 backup_count: int = 14, index_block: int = 16 * 1024):
+        """
+        Args:
+            log_dir: Directorio de los logs
+            base_name: Nombre base de los archivos (base_name.jsonl y rotados)
+            max_bytes: Tamaño que fuerza una rotación
+            max_age_seconds: Antigüedad de la primera entrada que fuerza una rotación
+            backup_count: Archivos rotados que se conservan
+            index_block: Cada cuántos bytes se agrega una entrada al índice
+        """
+        self.log_dir = Path(log_dir)
+        self.base_name = base_name
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.backup_count = backup_count
+        self.index_block = index_block
+
+        self.log_dir.mkdir(exist_ok=True)
+        self.active_path = self.log_dir / f"{base_name}.jsonl"
+        self.lock_path = self.log_dir / f"{base_name}.lock"
+
+    def append(self, entry: Dict):
+        """Agrega una entrada (O(1)); agrega 'timestamp' si no viene"""
+        now = time.time()
+
+        with self._lock(shared=True):
+            end = self._write_entries([entry], now)
+
+        if self._should_rotate(end, now):
+            self.rotate()
+
+    def tail(self, limit: int = 50) -> List[Dict]:
+        """Últimas entradas leyendo bloques desde el final, sin parsear el archivo completo"""
+        entries = []
+
+        for path in reversed(self._all_files()):
+            needed = limit - len(entries)
+            if needed <= 0:
+                break
+            entries = self._tail_file(path, needed) + entries
+
+        return entries
+
+    def query(self, start: datetime, end: datetime) -> Iterator[Dict]:
+        """Entradas con timestamp entre start y end, usando el índice para saltar al inicio"""
+        start_ts = start.timestamp()
+        end_ts = end.timestamp()
+
+        for path in self._all_files():
+            rotated_at = self._rotated_at(path)
+            if rotated_at is not None and rotated_at < start_ts:
+                continue
+
+            offset = self._seek_offset(path, start_ts)
+
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                for raw in f:
+                    entry = self._parse(raw)
+                    ts = self._entry_time(entry)
+                    if ts is None:
+                        continue
+
+                    if ts > end_ts + self.TIME_SLACK:
+                        return
+                    if start_ts <= ts <= end_ts:
+                        yield entry
+
+    def rotate(self):
+        """Renombra el archivo activo (y su índice) y elimina los rotados más antiguos"""
+        with self._lock(shared=False):
+            # Otro proceso pudo haber rotado mientras se esperaba el lock
+            try:
+                size = self.active_path.stat().st_size
+            except FileNotFoundError:
+                return
+            if not self._should_rotate(size, time.time()):
+                return
+
+            suffix = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+            rotated = self.log_dir / f"{self.base_name}.{suffix}.jsonl"
+            os.replace(self.active_path, rotated)
+
+            index_path = self._index_path(self.active_path)
+            if index_path.exists():
+                os.replace(index_path, self._index_path(rotated))
+
+            rotated_files = self._rotated_files()
+            for old in rotated_files[:max(0, len(rotated_files) - self.backup_count)]:
+                old.unlink(missing_ok=True)
+                self._index_path(old).unlink(missing_ok=True)
+
+    def import_legacy_json(self, json_path: Path) -> int:
+        """
+        Migra el log JSON anterior (un arreglo completo) a este log y lo elimina
+
+        La existencia del archivo heredado es la marca de "pendiente de importar": se comprueba,
+        se importa y se elimina bajo el lock exclusivo, así un solo proceso lo importa.
+
+        Returns:
+            Cantidad de entradas importadas (0 si otro proceso ya lo hizo)
+        """
+        now = time.time()
+
+        with self._lock(shared=False):
+            if not json_path.exists():
+                return 0
+
+            try:
+                with open(json_path, 'r') as f:
+                    legacy_entries = json.load(f)
+            except (OSError, ValueError):
+                return 0
+
+            end = self._write_entries(legacy_entries, now) if legacy_entries else 0
+            json_path.unlink()
+
+        if legacy_entries and self._should_rotate(end, now):
+            self.rotate()
+
+        return len(legacy_entries)
+
+    def _write_entries(self, entries: List[Dict], now: float) -> int:
+        """
+        Escribe las entradas con un único write O_APPEND y actualiza el índice (requiere el lock)
+
+        Returns:
+            Tamaño del archivo activo tras la escritura
+        """
+        timestamp = datetime.fromtimestamp(now).isoformat()
+        lines = [
+            (json.dumps({'timestamp': timestamp, **entry}, default=str, ensure_ascii=False) + "\n").encode('utf-8')
+            for entry in entries
+        ]
+        data = b"".join(lines)
+
+        fd = os.open(self.active_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+            end = os.lseek(fd, 0, os.SEEK_CUR)
+        finally:
+            os.close(fd)
+
+        # El índice usa la hora de escritura (también define la antigüedad para rotar)
+        start = end - len(data)
+        for line in lines:
+            if (start - 1) // self.index_block != (start + len(line) - 1) // self.index_block:
+                self._append_index(self._index_path(self.active_path), now, start)
+            start += len(line)
+
+        return end
+
+    def _should_rotate(self, size: int, now: float) -> bool:
+        if size >= self.max_bytes:
+            return True
+
+        first = self._read_index(self._index_path(self.active_path), limit=1)
+        return bool(first) and now - first[0][0] >= self.max_age_seconds
+
+    def _tail_file(self, path: Path, limit: int, block_size: int = 8192) -> List[Dict]:
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return []
+
+        with f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b""
+
+            # Leer hacia atrás hasta tener limit líneas completas (o llegar al inicio)
+            while position > 0 and data.count(b"\n") <= limit:
+                read_size = min(block_size, position)
+                position -= read_size
+                f.seek(position)
+                data = f.read(read_size) + data
+
+        lines = data.splitlines()
+        if position > 0:
+            lines = lines[1:]  # La primera línea puede estar incompleta
+
+        entries = [self._parse(line) for line in lines[-limit:]]
+        return [entry for entry in entries if entry is not None]
+
+    def _seek_offset(self, path: Path, start_ts: float) -> int:
+        """Offset del último punto indexado anterior a start_ts (0 si no hay índice)"""
+        index = self._read_index(self._index_path(path))
+        if not index:
+            return 0
+
+        position = bisect.bisect_left([ts for ts, _ in index], start_ts - self.TIME_SLACK)
+        return index[position - 1][1] if position > 0 else 0
+
+    def _append_index(self, index_path: Path, timestamp: float, offset: int):
+        fd = os.open(index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, self.INDEX_RECORD.pack(timestamp, offset))
+        finally:
+            os.close(fd)
+
+    def _read_index(self, index_path: Path, limit: Optional[int] = None) -> List[tuple]:
+        try:
+            with open(index_path, 'rb') as f:
+                data = f.read(self.INDEX_RECORD.size * limit if limit else -1)
+        except FileNotFoundError:
+            return []
+
+        usable = len(data) - len(data) % self.INDEX_RECORD.size
+        return list(self.INDEX_RECORD.iter_unpack(data[:usable]))
+
+    def _index_path(self, path: Path) -> Path:
+        return path.with_suffix(".idx")
+
+    def _rotated_files(self) -> List[Path]:
+        # El sufijo de fecha ordena cronológicamente
+        return sorted(self.log_dir.glob(f"{self.base_name}.*.jsonl"))
+
+    def _all_files(self) -> List[Path]:
+        files = self._rotated_files()
+        if self.active_path.exists():
+            files.append(self.active_path)
+        return files
+
+    def _rotated_at(self, path: Path) -> Optional[float]:
+        if path == self.active_path:
+            return None
+        suffix = path.name[len(self.base_name) + 1:-len(".jsonl")]
+        return datetime.strptime(suffix, "%Y%m%dT%H%M%S%f").timestamp()
+
+    def _entry_time(self, entry: Optional[Dict]) -> Optional[float]:
+        try:
+            return datetime.fromisoformat(entry['timestamp']).timestamp()
+        except (TypeError, KeyError, ValueError):
+            return None
+
+    def _parse(self, raw: bytes) -> Optional[Dict]:
+        try:
+            return json.loads(raw)
+        except ValueError:
+            return None
+
+    @contextmanager
+    def _lock(self, shared: bool):
+        """Escrituras con lock compartido; la rotación con lock exclusivo"""
+        if fcntl is None:
+            yield
+            return
+
+        with open(self.lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,373 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from src.database.sql_queries import SocialListeningQueryBuilder
+from src.utils.app_context import get_app_context
+
+
+def ewma_scan(mean: np.ndarray, var: np.ndarray, values: np.ndarray, valid: np.ndarray,
+              alpha: float, block: int = 128):
+    """
+    Media y varianza exponenciales de varias series sobre varios buckets, vectorizado
+
+    Ambas son recurrencias lineales y = f·y_prev + u (media: f = 1 - alpha, u = alpha·x;
+    varianza: f = 1 - alpha, u = (1 - alpha)·alpha·(x - media_prev)²), que se resuelven por
+    bloques de columnas con cumprod/cumsum en lugar de un ciclo por bucket. Un bucket no
+    válido deja la serie como estaba (f = 1, u = 0). Con un solo bucket es la actualización
+    O(1) clásica.
+
+    Args:
+        mean: Media de cada serie antes del primer bucket (n_series,)
+        var: Varianza de cada serie antes del primer bucket (n_series,)
+        values: Observaciones (n_series × n_buckets)
+        valid: Qué observaciones actualizan la serie (n_series × n_buckets)
+        alpha: Peso de la observación nueva (0 < alpha < 1)
+        block: Columnas por bloque (acota el rango de cumprod)
+
+    Returns:
+        Tupla (media previa, varianza previa, media final, varianza final): las previas son
+        n_series × n_buckets (el estado antes de cada bucket, con el que se evalúa), las
+        finales (n_series,) son el estado después del último bucket
+    """
+    factors = np.where(valid, 1.0 - alpha, 1.0)
+
+    means = _linear_recurrence(mean, factors, np.where(valid, alpha * values, 0.0), block)
+    prev_mean = np.column_stack([mean, means[:, :-1]])
+
+    diff = values - prev_mean
+    variances = _linear_recurrence(var, factors, np.where(valid, (1.0 - alpha) * alpha * diff ** 2, 0.0), block)
+    prev_var = np.column_stack([var, variances[:, :-1]])
+
+    return prev_mean, prev_var, means[:, -1], variances[:, -1]
+
+
+def _linear_recurrence(initial: np.ndarray, factors: np.ndarray, inputs: np.ndarray, block: int) -> np.ndarray:
+    """y_t = factors_t · y_(t-1) + inputs_t a lo largo del eje 1"""
+    result = np.empty_like(inputs, dtype=np.float64)
+    current = initial.astype(np.float64)
+
+    for start in range(0, inputs.shape[1], block):
+        f = factors[:, start:start + block]
+        u = inputs[:, start:start + block]
+
+        products = np.cumprod(f, axis=1)
+        chunk = products * (current[:, None] + np.cumsum(u / products, axis=1))
+
+        result[:, start:start + block] = chunk
+        current = chunk[:, -1]
+
+    return result
+
+
+def describe_anomaly(anomaly: Dict) -> str:
+    """Texto corto de una anomalía para listas y tooltips"""
+    if anomaly['kind'] == 'shift':
+        return (f"Giro a {anomaly['sentiment']} en {anomaly['origin']}: {anomaly['value']:.0%} "
+                f"(esperado ~{anomaly['expected']:.0%})")
+    return (f"Pico {anomaly['sentiment']} en {anomaly['origin']}: {anomaly['value']:.0f} "
+            f"(esperado ~{anomaly['expected']:.0f})")
+
+
+class AnomalyDetector:
+    """Detección incremental de picos de volumen y giros de sentimiento por alerta
+
+    Por alerta mantiene media y varianza exponenciales (EWMA) de las menciones por hora de
+    cada red × sentimiento, y de la proporción negativa de cada red. Cada ciclo consulta
+    solo el agregado horario desde la última hora procesada y avanza el estado en O(1) por
+    hora nueva; la primera vez (o con backfill()) recorre el histórico con la misma
+    recurrencia vectorizada. Una hora es anómala si supera la media previa en `threshold`
+    desviaciones. El estado vive en memoria del proceso.
+    """
+
+    ORIGINS = ['Facebook', 'X', 'Instagram', 'TikTok']
+    ORIGIN_DISPLAY = {'Facebook': 'Facebook', 'X': 'X (Twitter)', 'Instagram': 'Instagram', 'TikTok': 'TikTok'}
+    SENTIMENTS = ['POS', 'NEU', 'NEG']
+
+    # Desviación mínima asumida (menciones / proporción): evita alarmas tras horas sin variación.
+    # Los conteos además nunca se asumen menos variables que un Poisson de la misma media
+    MIN_STD_COUNT = 1.0
+    MIN_STD_SHARE = 0.05
+
+    def __init__(self, db_connection, dashboards: Dict, db_budget: threading.Semaphore,
+                 interval_seconds: float = 300, alpha: float = 0.1, threshold: float = 4.0,
+                 min_count: int = 10, warmup_buckets: int = 24, backfill_days: int = 14,
+                 settle_minutes: int = 15):
+        """
+        Args:
+            db_connection: Conexión a la base de datos (con pool)
+            dashboards: Registro de dashboards (id -> configuración con alert_ids)
+            db_budget: Semáforo global de queries en segundo plano
+            interval_seconds: Cadencia de actualización
+            alpha: Peso de cada hora nueva en la EWMA
+            threshold: Desviaciones sobre la media para marcar una anomalía
+            min_count: Menciones mínimas en la hora (y en la red, para los giros)
+            warmup_buckets: Horas observadas antes de empezar a marcar
+            backfill_days: Histórico con que arranca el estado y antigüedad de las anomalías guardadas
+            settle_minutes: Margen para filas que llegan tarde; la hora en curso nunca se procesa
+        """
+        self.db_connection = db_connection
+        self.db_budget = db_budget
+        self.interval_seconds = interval_seconds
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_count = min_count
+        self.warmup_buckets = warmup_buckets
+        self.backfill_days = backfill_days
+        self.settle_minutes = settle_minutes
+        self.query_builder = SocialListeningQueryBuilder()
+
+        self.alert_ids = sorted({
+            alert_id
+            for dashboard in dashboards.values() if dashboard.get('alert_ids')
+            for alert_id in self.query_builder.normalize_alert_ids(dashboard['alert_ids'])
+        })
+        self._alert_index = {alert_id: i for i, alert_id in enumerate(self.alert_ids)}
+
+        # Series por alerta: conteos (red × sentimiento) y proporción negativa por red
+        self._count_series = len(self.ORIGINS) * len(self.SENTIMENTS)
+        self._series_per_alert = self._count_series + len(self.ORIGINS)
+        self._is_count = np.tile(np.arange(self._series_per_alert) < self._count_series, len(self.alert_ids))
+
+        self._lock = threading.Lock()
+        self._thread = None
+        self._state = None
+        self._anomalies = []
+        self._stats = {'cycles': 0, 'backfills': 0, 'buckets_processed': 0, 'processed_until': None,
+                       'last_cycle_at': None, 'last_cycle_seconds': 0.0, 'errors': 0}
+
+    def start(self):
+        """Lanza el ciclo de actualización en un hilo de fondo"""
+        if self._thread is not None:
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.run_once()
+                except Exception as e:
+                    self._stats['errors'] += 1
+                    print(f"Error detectando anomalías: {e}")
+                time.sleep(self.interval_seconds)
+
+        self._thread = threading.Thread(target=loop, name="anomaly-detector", daemon=True)
+        self._thread.start()
+
+    def run_once(self):
+        """Procesa las horas cerradas desde la última procesada (backfill si no hay estado)"""
+        if not self.alert_ids:
+            return
+
+        if self._state is None:
+            self.backfill()
+        else:
+            self._process(self._state['processed_until'], self._last_closed_hour())
+
+        self._stats['cycles'] += 1
+        self._stats['last_cycle_at'] = datetime.now()
+
+    def backfill(self, days: Optional[int] = None):
+        """
+        Reconstruye el estado recorriendo el histórico en un solo paso vectorizado
+
+        Args:
+            days: Días de histórico (por defecto backfill_days)
+        """
+        until = self._last_closed_hour()
+        n_series = len(self.alert_ids) * self._series_per_alert
+
+        with self._lock:
+            self._state = {
+                'mean': np.zeros(n_series),
+                'var': np.zeros(n_series),
+                'seen': np.zeros(n_series, dtype=np.int64),
+                'processed_until': until - timedelta(days=days or self.backfill_days)
+            }
+            self._anomalies = []
+
+        self._process(self._state['processed_until'], until)
+        self._stats['backfills'] += 1
+
+    def get_anomalies(self, alert_ids, origins: Optional[List[str]] = None, start_date: Optional[datetime] = None,
+                      end_date: Optional[datetime] = None, sentiment: Optional[str] = None) -> pd.DataFrame:
+        """
+        Anomalías detectadas para un dashboard, de la más reciente a la más antigua
+
+        Args:
+            alert_ids: Alertas del dashboard
+            origins: Redes en formato display (None: todas)
+            start_date: Desde (opcional)
+            end_date: Hasta (opcional)
+            sentiment: Solo picos de este sentimiento (los giros se omiten)
+
+        Returns:
+            DataFrame con bucket, alerta_id, origin, sentiment, kind ('volume' o 'shift'),
+            value, expected, z y description
+        """
+        alert_ids = set(self.query_builder.normalize_alert_ids(alert_ids))
+
+        with self._lock:
+            anomalies = [
+                anomaly for anomaly in self._anomalies
+                if anomaly['alerta_id'] in alert_ids
+                and (origins is None or anomaly['origin'] in origins)
+                and (start_date is None or anomaly['bucket'] >= start_date)
+                and (end_date is None or anomaly['bucket'] <= end_date)
+                and (sentiment is None or (anomaly['kind'] == 'volume' and anomaly['sentiment'] == sentiment))
+            ]
+
+        columns = ['bucket', 'alerta_id', 'origin', 'sentiment', 'kind', 'value', 'expected', 'z', 'description']
+        if not anomalies:
+            return pd.DataFrame(columns=columns)
+
+        result = pd.DataFrame(anomalies)
+        result['description'] = [describe_anomaly(anomaly) for anomaly in anomalies]
+        return result[columns].sort_values('bucket', ascending=False).reset_index(drop=True)
+
+    def get_stats(self) -> Dict:
+        """Alertas vigiladas, horas procesadas y anomalías guardadas"""
+        with self._lock:
+            stored = len(self._anomalies)
+        return {**self._stats, 'alerts': len(self.alert_ids), 'anomalies': stored}
+
+    def _process(self, since: datetime, until: datetime):
+        """Avanza el estado por las horas [since, until) y registra las anomalías"""
+        n_hours = int((until - since) / timedelta(hours=1))
+        if n_hours <= 0:
+            return
+
+        started = time.time()
+        with self.db_budget:
+            hourly = self.db_connection.get_hourly_counts(self.alert_ids, since, until)
+
+        # Resultado sin columnas: no avanzar (los errores de BD se propagan al ciclo)
+        if 'bucket' not in hourly.columns:
+            self._stats['errors'] += 1
+            return
+
+        counts = self._count_matrix(hourly, since, n_hours)
+        values, valid = self._series_matrix(counts)
+
+        state = self._state
+        prev_mean, prev_var, mean, var = ewma_scan(state['mean'], state['var'], values, valid, self.alpha)
+        prev_seen = state['seen'][:, None] + np.cumsum(valid, axis=1) - valid
+
+        is_count = self._is_count[:, None]
+        floor = np.where(is_count, np.maximum(prev_mean, self.MIN_STD_COUNT ** 2), self.MIN_STD_SHARE ** 2)
+        z = (values - prev_mean) / np.sqrt(np.maximum(prev_var, floor))
+        flagged = valid & (prev_seen >= self.warmup_buckets) & (z >= self.threshold)
+        # Los picos de volumen además necesitan un mínimo de menciones en la hora
+        flagged &= ~is_count | (values >= self.min_count)
+
+        anomalies = self._records(flagged, values, prev_mean, z, since)
+        retention = until - timedelta(days=self.backfill_days)
+
+        with self._lock:
+            self._state = {
+                'mean': mean,
+                'var': var,
+                'seen': state['seen'] + valid.sum(axis=1),
+                'processed_until': until
+            }
+            self._anomalies = [a for a in self._anomalies if a['bucket'] >= retention] + anomalies
+
+        self._stats['buckets_processed'] += n_hours
+        self._stats['processed_until'] = until
+        self._stats['last_cycle_seconds'] = time.time() - started
+
+    def _count_matrix(self, hourly: pd.DataFrame, since: datetime, n_hours: int) -> np.ndarray:
+        """Menciones como matriz alerta × red × sentimiento × hora (con ceros)"""
+        shape = (len(self.alert_ids), len(self.ORIGINS), len(self.SENTIMENTS), n_hours)
+        if hourly.empty:
+            return np.zeros(shape, dtype=np.float64)
+
+        hours = ((pd.to_datetime(hourly['bucket']).to_numpy(dtype='datetime64[h]')
+                  - np.datetime64(since, 'h')).astype(np.int64))
+        alerts = hourly['alerta_id'].map(self._alert_index).fillna(-1).to_numpy(dtype=np.int64)
+        origins = pd.Categorical(hourly['origin'], categories=self.ORIGINS).codes.astype(np.int64)
+        sentiments = pd.Categorical(hourly['sentiment_pred'], categories=self.SENTIMENTS).codes.astype(np.int64)
+
+        mask = (alerts >= 0) & (origins >= 0) & (sentiments >= 0) & (hours >= 0) & (hours < n_hours)
+        flat = np.ravel_multi_index((alerts[mask], origins[mask], sentiments[mask], hours[mask]), shape)
+        weights = hourly['total'].to_numpy(dtype=np.float64)[mask]
+
+        return np.bincount(flat, weights=weights, minlength=int(np.prod(shape))).reshape(shape)
+
+    def _series_matrix(self, counts: np.ndarray):
+        """Series de conteos y de proporción negativa, con la máscara de horas válidas"""
+        n_alerts, n_origins, n_sentiments, n_hours = counts.shape
+
+        origin_totals = counts.sum(axis=2)
+        shares = np.divide(counts[:, :, self.SENTIMENTS.index('NEG')], origin_totals,
+                           out=np.zeros_like(origin_totals), where=origin_totals > 0)
+
+        values = np.concatenate([counts.reshape(n_alerts, n_origins * n_sentiments, n_hours), shares], axis=1)
+        # Las proporciones solo cuentan en horas con volumen suficiente en la red
+        valid = np.concatenate([
+            np.ones((n_alerts, n_origins * n_sentiments, n_hours), dtype=bool),
+            origin_totals >= self.min_count
+        ], axis=1)
+
+        return values.reshape(-1, n_hours), valid.reshape(-1, n_hours)
+
+    def _records(self, flagged: np.ndarray, values: np.ndarray, expected: np.ndarray,
+                 z: np.ndarray, since: datetime) -> List[Dict]:
+        records = []
+
+        for series, hour in zip(*np.nonzero(flagged)):
+            alert, offset = divmod(int(series), self._series_per_alert)
+            if offset < self._count_series:
+                origin, sentiment = divmod(offset, len(self.SENTIMENTS))
+                kind, sentiment_code = 'volume', self.SENTIMENTS[sentiment]
+            else:
+                origin, kind, sentiment_code = offset - self._count_series, 'shift', 'NEG'
+
+            records.append({
+                'bucket': since + timedelta(hours=int(hour)),
+                'alerta_id': self.alert_ids[alert],
+                'origin': self.ORIGIN_DISPLAY[self.ORIGINS[origin]],
+                'sentiment': sentiment_code,
+                'kind': kind,
+                'value': float(values[series, hour]),
+                'expected': float(expected[series, hour]),
+                'z': round(float(z[series, hour]), 1)
+            })
+
+        return sorted(records, key=lambda record: record['bucket'])
+
+    def _last_closed_hour(self) -> datetime:
+        settled = datetime.now() - timedelta(minutes=self.settle_minutes)
+        return settled.replace(minute=0, second=0, microsecond=0)
+
+
+@st.cache_resource
+def get_anomaly_detector() -> Optional[AnomalyDetector]:
+    """Detector único por proceso (None si está desactivado en [anomalies])"""
+    try:
+        config = dict(st.secrets.get("anomalies", {}))
+    except Exception:
+        config = {}
+
+    if not config.get('enabled', True):
+        return None
+
+    context = get_app_context()
+    detector = AnomalyDetector(
+        context.get_db(),
+        context.dashboards,
+        context.background_db_budget,
+        interval_seconds=config.get('interval_seconds', 300),
+        alpha=config.get('alpha', 0.1),
+        threshold=config.get('threshold', 4.0),
+        min_count=config.get('min_count', 10),
+        warmup_buckets=config.get('warmup_buckets', 24),
+        backfill_days=config.get('backfill_days', 14),
+        settle_minutes=config.get('settle_minutes', 15)
+    )
+    detector.start()
+    return detector
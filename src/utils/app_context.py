@@ -0,0 +1,60 @@
+import threading
+
+import psycopg2.pool
+import streamlit as st
+from typing import Dict, Optional
+
+from src.auth.session_manager import SessionManager
+from src.database.connection import DatabaseConnection
+from src.database.sql_queries import SocialListeningQueryBuilder
+from src.utils.styling import StyleManager
+
+
+class AppContext:
+    """Recursos de la aplicación que se crean una vez por proceso y se comparten entre reruns"""
+
+    def __init__(self, config):
+        """
+        Args:
+            config: Secrets de Streamlit (se copian a diccionarios planos una sola vez)
+        """
+        # Registro de usuarios y dashboards ya parseado
+        self.users = {username: dict(data) for username, data in config["users"].items()}
+        self.dashboards = {dashboard_id: dict(data) for dashboard_id, data in config["dashboards"].items()}
+
+        database_config = dict(config["database"])
+        self.connection_string = database_config["connection_string"]
+
+        self.query_builder = SocialListeningQueryBuilder()
+        self.db_pool = psycopg2.pool.ThreadedConnectionPool(
+            minconn=database_config.get("pool_min_size", 1),
+            maxconn=database_config.get("pool_size", 10),
+            dsn=self.connection_string
+        )
+        # Presupuesto global de queries en segundo plano (precalentamiento, tareas de fondo):
+        # nunca ocupan más de estas conexiones del pool
+        self.background_db_budget = threading.BoundedSemaphore(
+            database_config.get("background_concurrency", 2)
+        )
+        self.session_manager = SessionManager()
+        self.style_manager = StyleManager()
+
+    def get_user(self, username: str) -> Optional[Dict]:
+        return self.users.get(username)
+
+    def get_dashboard(self, dashboard_id: str) -> Optional[Dict]:
+        return self.dashboards.get(dashboard_id)
+
+    def get_db(self) -> DatabaseConnection:
+        """Conexión liviana que usa el pool y el constructor de queries compartidos"""
+        return DatabaseConnection(
+            connection_string=self.connection_string,
+            pool=self.db_pool,
+            sql_builder=self.query_builder
+        )
+
+
+@st.cache_resource
+def get_app_context() -> AppContext:
+    """Contexto único por proceso"""
+    return AppContext(st.secrets)
@@ -0,0 +1,275 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import pandas as pd
+import streamlit as st
+
+from src.database.sql_queries import SocialListeningQueryBuilder
+from src.utils.app_context import get_app_context
+from src.utils.state_backends import StateBackend, get_state_backend
+
+
+class CacheWarmer:
+    """Precalentamiento periódico de los datos por defecto de los dashboards más usados
+
+    Mantiene en memoria del proceso el preset "Este mes" (todas las redes, sin filtro de
+    sentimiento) de las alertas más visitadas. Cada ciclo consulta las filas posteriores al
+    último refresco más un solapamiento de ingestion_lag_seconds, para recoger filas que se
+    ingieren tarde con un created_time anterior (comentarios recolectados después, backfills).
+    Si una alerta cambió de generación (correcciones), cambió el mes o pasó full_reload_seconds
+    desde la última carga completa, se vuelve a cargar completa. Cualquier sesión puede servir
+    un subconjunto de estos datos.
+    """
+
+    ORIGINS = ['Facebook', 'X (Twitter)', 'Instagram', 'TikTok']
+
+    def __init__(self, db_connection, dashboards: Dict, db_budget: threading.Semaphore,
+                 interval_seconds: float = 300, top_n: int = 5,
+                 backend: Optional[StateBackend] = None,
+                 ingestion_lag_seconds: float = 3600, full_reload_seconds: float = 6 * 3600):
+        """
+        Args:
+            db_connection: Conexión a la base de datos (con pool)
+            dashboards: Registro de dashboards (id -> configuración con alert_ids)
+            db_budget: Semáforo global de queries en segundo plano
+            interval_seconds: Cadencia de refresco
+            top_n: Cantidad de dashboards a mantener calientes
+            backend: Backend con las generaciones de caché por alerta
+            ingestion_lag_seconds: Solapamiento de las queries delta (retraso máximo de ingesta)
+            full_reload_seconds: Antigüedad máxima de la última carga completa
+        """
+        self.db_connection = db_connection
+        self.dashboards = dashboards
+        self.db_budget = db_budget
+        self.interval_seconds = interval_seconds
+        self.top_n = top_n
+        self.backend = backend or get_state_backend()
+        self.ingestion_lag = timedelta(seconds=ingestion_lag_seconds)
+        self.full_reload_seconds = full_reload_seconds
+        self.query_builder = SocialListeningQueryBuilder()
+
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._thread = None
+        self._stats = {'cycles': 0, 'full_loads': 0, 'delta_loads': 0, 'hits': 0,
+                       'seconds_saved': 0.0, 'last_cycle_at': None, 'errors': 0}
+
+    def start(self):
+        """Lanza el ciclo de refresco en un hilo de fondo"""
+        if self._thread is not None:
+            return
+
+        def loop():
+            while True:
+                try:
+                    self.run_once()
+                except Exception as e:
+                    self._count('errors')
+                    print(f"Error precalentando caché: {e}")
+                time.sleep(self.interval_seconds)
+
+        self._thread = threading.Thread(target=loop, name="cache-warmer", daemon=True)
+        self._thread.start()
+
+    def run_once(self):
+        """Refresca los dashboards más usados y descarta los que dejaron de estarlo"""
+        ranking = self._with_budget(self.db_connection.get_dashboard_usage_ranking, limit=self.top_n)
+        hot_alerts = []
+
+        for dashboard_id in ranking:
+            dashboard = self.dashboards.get(dashboard_id)
+            if dashboard and dashboard.get('alert_ids'):
+                alert_ids = tuple(self.query_builder.normalize_alert_ids(dashboard['alert_ids']))
+                if alert_ids not in hot_alerts:
+                    hot_alerts.append(alert_ids)
+
+        for alert_ids in hot_alerts:
+            self._refresh(alert_ids, dashboard_ids=[d for d in ranking
+                                                     if self._dashboard_alerts(d) == alert_ids])
+
+        with self._lock:
+            for alert_ids in list(self._entries):
+                if alert_ids not in hot_alerts:
+                    del self._entries[alert_ids]
+
+            self._stats['cycles'] += 1
+            self._stats['last_cycle_at'] = datetime.now()
+
+    def get_warm_data(self, alerta_id, origins: List[str], start_date: datetime, end_date: datetime,
+                      sentiment: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Sirve un set de filtros desde los datos calientes, completando con una query delta
+        las filas posteriores al último refresco
+
+        Returns:
+            DataFrame o None si los datos calientes no cubren el rango pedido
+        """
+        alert_ids = tuple(self.query_builder.normalize_alert_ids(alerta_id))
+
+        with self._lock:
+            entry = self._entries.get(alert_ids)
+
+        if entry is None or start_date < entry['start_date'] or not self._generations_match(entry):
+            return None
+
+        if 'created_time' not in entry['data'].columns:
+            return None
+
+        data = entry['data']
+        tables = self.query_builder.get_tables_for_origins(origins)
+        created = pd.to_datetime(data['created_time'])
+        mask = data['table_source'].isin(tables) & (created >= start_date) & (created <= end_date)
+        if sentiment:
+            mask &= data['sentiment_pred'] == sentiment
+        result = data[mask]
+
+        # Filas nuevas desde el último refresco: query acotada en lugar de la completa
+        if end_date > entry['covered_until']:
+            delta = self.db_connection.get_social_listening_data(
+                alerta_id=list(alert_ids), origins=origins,
+                start_date=max(start_date, self._delta_start(entry)),
+                end_date=end_date, sentiment=sentiment, limit=None
+            )
+            result = self._merge(result, delta)
+
+        self._count('hits')
+        self._count('seconds_saved', entry['full_load_seconds'])
+
+        return result.sort_values('created_time', ascending=False).reset_index(drop=True)
+
+    def get_stats(self) -> Dict:
+        """Qué está caliente y cuánto tiempo de query se ahorró"""
+        with self._lock:
+            warmed = [
+                {
+                    'dashboards': entry['dashboard_ids'],
+                    'alert_ids': list(alert_ids),
+                    'rows': len(entry['data']),
+                    'refreshed_at': entry['refreshed_at'],
+                    'full_load_seconds': round(entry['full_load_seconds'], 2),
+                    'last_delta_seconds': round(entry['last_delta_seconds'], 2)
+                }
+                for alert_ids, entry in self._entries.items()
+            ]
+            stats = dict(self._stats)
+
+        return {**stats, 'warmed': warmed}
+
+    def _refresh(self, alert_ids: tuple, dashboard_ids: List[str]):
+        now = datetime.now()
+        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+        with self._lock:
+            entry = self._entries.get(alert_ids)
+
+        generations = self.backend.get_alert_generations(alert_ids)
+        full_reload = (
+            entry is None
+            or entry['start_date'] != month_start
+            or entry['generations'] != generations
+            or time.time() - entry['loaded_at'] >= self.full_reload_seconds
+        )
+
+        started = time.time()
+
+        if full_reload:
+            data = self._with_budget(
+                self.db_connection.get_social_listening_data,
+                alerta_id=list(alert_ids), origins=self.ORIGINS,
+                start_date=month_start, end_date=now, limit=None
+            )
+            elapsed = time.time() - started
+
+            # Resultado sin columnas: no hay nada utilizable que cachear
+            if 'created_time' not in data.columns:
+                self._count('errors')
+                return
+
+            entry = {
+                'data': data,
+                'start_date': month_start,
+                'loaded_at': started,
+                'full_load_seconds': elapsed,
+                'last_delta_seconds': 0.0
+            }
+            self._count('full_loads')
+        else:
+            delta = self._with_budget(
+                self.db_connection.get_social_listening_data,
+                alerta_id=list(alert_ids), origins=self.ORIGINS,
+                start_date=self._delta_start(entry), end_date=now, limit=None
+            )
+            entry = {
+                **entry,
+                'data': self._merge(entry['data'], delta),
+                'last_delta_seconds': time.time() - started
+            }
+            self._count('delta_loads')
+
+        entry.update({
+            'covered_until': now,
+            'refreshed_at': now,
+            'generations': generations,
+            'dashboard_ids': dashboard_ids
+        })
+
+        with self._lock:
+            self._entries[alert_ids] = entry
+
+    def _delta_start(self, entry: Dict) -> datetime:
+        """Inicio de una query delta: el último refresco menos el retraso de ingesta"""
+        return max(entry['start_date'], entry['covered_until'] - self.ingestion_lag)
+
+    def _count(self, stat: str, amount: float = 1):
+        with self._lock:
+            self._stats[stat] += amount
+
+    def _merge(self, data: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+        """Agrega filas nuevas; el delta se solapa con lo cargado, así que se deduplica por (tabla, id)"""
+        if delta.empty:
+            return data
+        if data.empty:
+            return delta
+
+        merged = pd.concat([data, delta], ignore_index=True)
+        return merged.drop_duplicates(subset=['table_source', 'id'], keep='last').reset_index(drop=True)
+
+    def _generations_match(self, entry: Dict) -> bool:
+        return self.backend.get_alert_generations(entry['generations'].keys()) == entry['generations']
+
+    def _dashboard_alerts(self, dashboard_id: str) -> Optional[tuple]:
+        dashboard = self.dashboards.get(dashboard_id)
+        if not dashboard or not dashboard.get('alert_ids'):
+            return None
+        return tuple(self.query_builder.normalize_alert_ids(dashboard['alert_ids']))
+
+    def _with_budget(self, fn, *args, **kwargs):
+        with self.db_budget:
+            return fn(*args, **kwargs)
+
+
+@st.cache_resource
+def get_cache_warmer() -> Optional[CacheWarmer]:
+    """Precalentador único por proceso (None si está desactivado en [warmup])"""
+    try:
+        config = dict(st.secrets.get("warmup", {}))
+    except Exception:
+        config = {}
+
+    if not config.get('enabled', True):
+        return None
+
+    context = get_app_context()
+    warmer = CacheWarmer(
+        context.get_db(),
+        context.dashboards,
+        context.background_db_budget,
+        interval_seconds=config.get('interval_seconds', 300),
+        top_n=config.get('top_n', 5),
+        ingestion_lag_seconds=config.get('ingestion_lag_seconds', 3600),
+        full_reload_seconds=config.get('full_reload_seconds', 6 * 3600)
+    )
+    warmer.start()
+    return warmer
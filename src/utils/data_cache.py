@@ -3,31 +3,36 @@ import pandas as pd
 import hashlib
 import json
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Union
+
+from src.database.sql_queries import SocialListeningQueryBuilder
+from src.utils.state_backends import StateBackend, get_state_backend
 
 class DataCacheManager:
-    def __init__(self, cache_duration_minutes=5):
+    def __init__(self, cache_duration_minutes=5, backend: Optional[StateBackend] = None):
         """
         Gestor de caché para datos de social listening
         
         Args:
             cache_duration_minutes: Duración del caché en minutos
+            backend: Backend de metadatos compartidos (generación de caché por alerta)
         """
         self.cache_duration = timedelta(minutes=cache_duration_minutes)
         self.cache_key_prefix = "social_listening_cache"
+        self.backend = backend or get_state_backend()
         
         # Inicializar caché en session_state si no existe
         if 'data_cache' not in st.session_state:
             st.session_state.data_cache = {}
     
-    def generate_cache_key(self, alerta_id: int, origins: List[str], 
+    def generate_cache_key(self, alerta_id: Union[int, List[int]], origins: List[str], 
                       start_date: datetime, end_date: datetime, 
                       sentiment: Optional[str] = None) -> str:
         """
         Genera una clave única para el caché basada en los parámetros de consulta
         
         Args:
-            alerta_id: ID de la alerta
+            alerta_id: ID de la alerta o lista de IDs
             origins: Lista de orígenes (redes sociales)
             start_date: Fecha de inicio
             end_date: Fecha de fin
@@ -42,7 +47,7 @@ class DataCacheManager:
         # Crear string con todos los parámetros
         cache_params = {
             'username': username,  # NUEVO - separa caché por usuario
-            'alerta_id': alerta_id,
+            'alerta_id': SocialListeningQueryBuilder.normalize_alert_ids(alerta_id),
             'origins': sorted(origins),  # Ordenar para consistencia
             'start_date': start_date.isoformat(),
             'end_date': end_date.isoformat(),
@@ -78,16 +83,24 @@ class DataCacheManager:
         
         # Verificar si ha expirado
         time_elapsed = datetime.now() - cache_time
-        return time_elapsed < self.cache_duration
+        if time_elapsed >= self.cache_duration:
+            return False
+        
+        # Verificar que ninguna réplica haya modificado las alertas desde que se cachearon
+        # (una sola consulta al backend para todas las alertas de la entrada)
+        generations = cache_entry.get('generations', {})
+        if not generations:
+            return True
+        return self.backend.get_alert_generations(generations.keys()) == generations
     
-    def get_cached_data(self, alerta_id: int, origins: List[str], 
+    def get_cached_data(self, alerta_id: Union[int, List[int]], origins: List[str], 
                        start_date: datetime, end_date: datetime, 
                        sentiment: Optional[str] = None) -> Optional[pd.DataFrame]:
         """
         Obtiene datos cacheados si están disponibles y son válidos
         
         Args:
-            alerta_id: ID de la alerta
+            alerta_id: ID de la alerta o lista de IDs
             origins: Lista de orígenes
             start_date: Fecha de inicio
             end_date: Fecha de fin
@@ -104,7 +117,31 @@ class DataCacheManager:
         
         return None
     
-    def cache_data(self, data: pd.DataFrame, alerta_id: int, origins: List[str], 
+    def get_data_version(self, alerta_id: Union[int, List[int]], origins: List[str],
+                         start_date: datetime, end_date: datetime,
+                         sentiment: Optional[str] = None) -> Optional[tuple]:
+        """
+        Versión liviana de los datos cacheados, sin recorrer el DataFrame
+        
+        Cambia cuando la entrada se vuelve a cargar (nuevo timestamp) o cuando se parchea o
+        invalida alguna de sus alertas (nuevas generaciones).
+        
+        Returns:
+            Tupla (clave, timestamp, generaciones) o None si no hay entrada válida
+        """
+        cache_key = self.generate_cache_key(alerta_id, origins, start_date, end_date, sentiment)
+        
+        if not self.is_cache_valid(cache_key):
+            return None
+        
+        cache_entry = st.session_state.data_cache[cache_key]
+        return (
+            cache_key,
+            cache_entry['timestamp'].isoformat(),
+            tuple(sorted(cache_entry.get('generations', {}).items()))
+        )
+    
+    def cache_data(self, data: pd.DataFrame, alerta_id: Union[int, List[int]], origins: List[str], 
                    start_date: datetime, end_date: datetime, 
                    sentiment: Optional[str] = None) -> str:
         """
@@ -112,7 +149,7 @@ class DataCacheManager:
         
         Args:
             data: DataFrame a cachear
-            alerta_id: ID de la alerta
+            alerta_id: ID de la alerta o lista de IDs
             origins: Lista de orígenes
             start_date: Fecha de inicio
             end_date: Fecha de fin
@@ -122,12 +159,15 @@ class DataCacheManager:
             Clave del caché donde se almacenaron los datos
         """
         cache_key = self.generate_cache_key(alerta_id, origins, start_date, end_date, sentiment)
+        alert_ids = SocialListeningQueryBuilder.normalize_alert_ids(alerta_id)
         
         cache_entry = {
             'data': data.copy(),  # Almacenar copia para evitar modificaciones
             'timestamp': datetime.now(),
+            'generations': self.backend.get_alert_generations(alert_ids),
             'params': {
                 'alerta_id': alerta_id,
+                'alert_ids': alert_ids,
                 'origins': origins,
                 'start_date': start_date,
                 'end_date': end_date,
@@ -148,22 +188,85 @@ class DataCacheManager:
         Invalida caché específico o todo el caché
         
         Args:
-            alerta_id: Si se especifica, solo invalida caché de esa alerta.
+            alerta_id: Si se especifica, solo invalida caché que incluya esa alerta.
                       Si es None, invalida todo el caché.
         """
         if alerta_id is None:
-            # Limpiar todo el caché
+            # Limpieza local (p. ej. cambio de dashboard): los datos no cambiaron, así que no
+            # se invalidan las copias de otras sesiones
             st.session_state.data_cache = {}
         else:
+            # La alerta cambió: nueva generación para que otras sesiones y réplicas recarguen
+            self.backend.bump_alert_generation(alerta_id)
+            
             # Limpiar solo caché de la alerta específica
             keys_to_remove = []
             for cache_key, cache_entry in st.session_state.data_cache.items():
-                if cache_entry.get('params', {}).get('alerta_id') == alerta_id:
+                if alerta_id in cache_entry.get('params', {}).get('alert_ids', []):
                     keys_to_remove.append(cache_key)
             
             for key in keys_to_remove:
                 del st.session_state.data_cache[key]
     
+    def patch_records(self, updates: pd.DataFrame) -> int:
+        """
+        Actualiza en sitio el sentimiento de registros cacheados en lugar de invalidar el caché
+        
+        Args:
+            updates: DataFrame con 'table_source', 'id', 'alerta_id', 'sentiment_pred'
+                     y 'sentiment_confidence'
+                     
+        Returns:
+            Número de entradas de caché modificadas
+        """
+        if updates.empty:
+            return 0
+        
+        # Nueva generación por alerta: invalida las copias de otras sesiones y réplicas,
+        # mientras las entradas parcheadas aquí quedan marcadas como vigentes
+        affected_alerts = {int(alert_id) for alert_id in updates['alerta_id'].tolist()}
+        generations = {
+            alerta_id: self.backend.bump_alert_generation(alerta_id)
+            for alerta_id in affected_alerts
+        }
+        updates_indexed = updates.set_index(['table_source', 'id'])
+        patched_entries = 0
+        keys_to_remove = []
+        
+        for cache_key, cache_entry in st.session_state.data_cache.items():
+            params = cache_entry.get('params', {})
+            entry_alerts = affected_alerts.intersection(params.get('alert_ids', []))
+            if not entry_alerts:
+                continue
+            
+            new_generations = {alert_id: generations[alert_id] for alert_id in entry_alerts}
+            
+            # Con filtro de sentimiento los registros revertidos pueden entrar o salir del
+            # resultado, y las filas nuevas no están en caché: invalidar esa entrada
+            if params.get('sentiment'):
+                keys_to_remove.append(cache_key)
+                continue
+            
+            data = cache_entry['data']
+            row_keys = pd.MultiIndex.from_arrays([data['table_source'], data['id']])
+            positions = updates_indexed.index.get_indexer(row_keys)
+            mask = positions >= 0
+            
+            if not mask.any():
+                cache_entry['generations'].update(new_generations)
+                continue
+            
+            matched = updates_indexed.iloc[positions[mask]]
+            data.loc[mask, 'sentiment_pred'] = matched['sentiment_pred'].to_numpy()
+            data.loc[mask, 'sentiment_confidence'] = matched['sentiment_confidence'].to_numpy()
+            cache_entry['generations'].update(new_generations)
+            patched_entries += 1
+        
+        for key in keys_to_remove:
+            del st.session_state.data_cache[key]
+        
+        return patched_entries
+    
     def _cleanup_expired_cache(self):
         """Limpia entradas de caché expiradas para liberar memoria"""
         current_time = datetime.now()
@@ -207,7 +310,7 @@ class DataCacheManager:
 
 
 # Funciones de conveniencia para uso directo
-def get_cached_social_data(alerta_id: int, origins: List[str], 
+def get_cached_social_data(alerta_id: Union[int, List[int]], origins: List[str], 
                           start_date: datetime, end_date: datetime, 
                           sentiment: Optional[str] = None, 
                           cache_manager: Optional[DataCacheManager] = None) -> Optional[pd.DataFrame]:
@@ -215,7 +318,7 @@ def get_cached_social_data(alerta_id: int, origins: List[str],
     Función de conveniencia para obtener datos cacheados
     
     Args:
-        alerta_id: ID de la alerta
+        alerta_id: ID de la alerta o lista de IDs
         origins: Lista de orígenes
         start_date: Fecha de inicio
         end_date: Fecha de fin
@@ -231,7 +334,7 @@ def get_cached_social_data(alerta_id: int, origins: List[str],
     return cache_manager.get_cached_data(alerta_id, origins, start_date, end_date, sentiment)
 
 
-def cache_social_data(data: pd.DataFrame, alerta_id: int, origins: List[str], 
+def cache_social_data(data: pd.DataFrame, alerta_id: Union[int, List[int]], origins: List[str], 
                      start_date: datetime, end_date: datetime, 
                      sentiment: Optional[str] = None,
                      cache_manager: Optional[DataCacheManager] = None) -> str:
@@ -240,7 +343,7 @@ def cache_social_data(data: pd.DataFrame, alerta_id: int, origins: List[str],
     
     Args:
         data: DataFrame a cachear
-        alerta_id: ID de la alerta
+        alerta_id: ID de la alerta o lista de IDs
         origins: Lista de orígenes
         start_date: Fecha de inicio
         end_date: Fecha de fin
@@ -268,4 +371,21 @@ def invalidate_social_cache(alerta_id: Optional[int] = None,
     if cache_manager is None:
         cache_manager = DataCacheManager()
     
-    cache_manager.invalidate_cache(alerta_id)
\ No newline at end of file
+    cache_manager.invalidate_cache(alerta_id)
+
+def patch_social_cache(updates: pd.DataFrame,
+                       cache_manager: Optional[DataCacheManager] = None) -> int:
+    """
+    Función de conveniencia para parchear registros cacheados
+    
+    Args:
+        updates: DataFrame con los nuevos valores por (table_source, id)
+        cache_manager: Instancia del gestor de caché (opcional)
+        
+    Returns:
+        Número de entradas de caché modificadas
+    """
+    if cache_manager is None:
+        cache_manager = DataCacheManager()
+    
+    return cache_manager.patch_records(updates)
@@ -1,32 +1,31 @@
-import json
 import logging
 from datetime import datetime
 from pathlib import Path
 import streamlit as st
 
-from src.database.connection import DatabaseConnection
+from src.database.audit_writer import get_audit_writer
+from src.utils.activity_log import ActivityLog
 
 class UserLogger:
     def __init__(self):
         self.log_file = Path("logs/user_activity.log")
-        self.json_log_file = Path("logs/user_activity.json")
+        self.legacy_json_log_file = Path("logs/user_activity.json")
         self._ensure_log_directory()
         self._setup_logging()
-        self.db_connection = DatabaseConnection()
+        self.activity_log = ActivityLog(log_dir=str(self.log_file.parent))
+        self.audit_writer = get_audit_writer()
+        
+        # Migrar el log JSON anterior (arreglo completo) al log JSONL
+        self.activity_log.import_legacy_json(self.legacy_json_log_file)
     
     def _ensure_log_directory(self):
         """Crea el directorio de logs si no existe"""
         self.log_file.parent.mkdir(exist_ok=True)
-        
-        # Crear archivo JSON si no existe
-        if not self.json_log_file.exists():
-            with open(self.json_log_file, 'w') as f:
-                json.dump([], f)
     
     def _setup_logging(self):
         """Configura el sistema de logging"""
-        # Crear logger específico para evitar conflictos
-        self.logger = logging.getLogger(f"UserLogger_{id(self)}")
+        # Un único logger (y FileHandler) por proceso
+        self.logger = logging.getLogger("UserLogger")
         self.logger.setLevel(logging.INFO)
         
         # Evitar duplicar handlers
@@ -42,8 +41,8 @@ class UserLogger:
             self.logger.addHandler(file_handler)
     
     def log_login(self, username, user_info):
-        """Registra login en BD"""
-        self.db_connection.log_user_access(
+        """Encola el registro de login (no bloquea; el escritor inserta por lotes)"""
+        self.audit_writer.log_user_access(
             username=username,
             user_name=user_info['user']['name'],
             email=user_info['user']['email'],
@@ -51,11 +50,16 @@ class UserLogger:
             dashboard_id=user_info['dashboard_id'],
             dashboard_title=user_info['dashboard']['title']
         )
+        self._append_json_log({
+            'action': "LOGIN",
+            'username': username,
+            'dashboard_id': user_info['dashboard_id']
+        })
     
     def log_logout(self, username, user_info=None):
-        """Registra logout en BD"""
+        """Encola el registro de logout"""
         if user_info:
-            self.db_connection.log_user_access(
+            self.audit_writer.log_user_access(
                 username=username,
                 user_name=user_info['user']['name'],
                 email=user_info['user']['email'],
@@ -63,34 +67,47 @@ class UserLogger:
                 dashboard_id=user_info['dashboard_id'],
                 dashboard_title=user_info['dashboard'].get('title', '')
             )
+            self._append_json_log({
+                'action': "LOGOUT",
+                'username': username,
+                'dashboard_id': user_info['dashboard_id']
+            })
+    
+    def log_dashboard_switch(self, username, user_info):
+        """Encola el cambio de dashboard de un super usuario"""
+        self.audit_writer.log_user_access(
+            username=username,
+            user_name=user_info['user']['name'],
+            email=user_info['user']['email'],
+            action="DASHBOARD_SWITCH",
+            dashboard_id=user_info['dashboard_id'],
+            dashboard_title=user_info['dashboard'].get('title', '')
+        )
     
     def _append_json_log(self, log_entry):
-        """Agrega una entrada al log JSON"""
+        """Agrega una entrada al log JSONL (append de una línea)"""
         try:
-            # Leer logs existentes
-            with open(self.json_log_file, 'r') as f:
-                logs = json.load(f)
-            
-            # Agregar nueva entrada
-            logs.append(log_entry)
-            
-            # Mantener solo los últimos 1000 logs
-            if len(logs) > 1000:
-                logs = logs[-1000:]
-            
-            # Escribir de vuelta
-            with open(self.json_log_file, 'w') as f:
-                json.dump(logs, f, indent=2)
-                
+            self.activity_log.append(log_entry)
         except Exception as e:
             self.logger.error(f"Error escribiendo log JSON: {e}")
     
     def get_recent_logs(self, limit=50):
-        """Obtiene los logs más recientes"""
+        """Obtiene los logs más recientes leyendo desde el final del archivo"""
+        try:
+            return self.activity_log.tail(limit)
+        except Exception as e:
+            self.logger.error(f"Error leyendo logs: {e}")
+            return []
+    
+    def get_logs_between(self, start: datetime, end: datetime):
+        """Obtiene los logs de un rango de tiempo usando el índice temporal"""
         try:
-            with open(self.json_log_file, 'r') as f:
-                logs = json.load(f)
-            return logs[-limit:] if logs else []
+            return list(self.activity_log.query(start, end))
         except Exception as e:
             self.logger.error(f"Error leyendo logs: {e}")
-            return []
\ No newline at end of file
+            return []
+
+@st.cache_resource
+def get_user_logger() -> UserLogger:
+    """Instancia única por proceso del logger de usuarios"""
+    return UserLogger()
@@ -0,0 +1,150 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import pandas as pd
+import streamlit as st
+
+from src.database.sql_queries import SocialListeningQueryBuilder
+from src.utils.state_backends import StateBackend, get_state_backend
+
+
+class DataPrefetcher:
+    """Precarga en segundo plano de datos de dashboards, compartida por todo el proceso
+
+    Los resultados se guardan por (usuario, alertas, filtros) y se entregan una sola vez: la
+    primera renderización los toma y los pasa al caché de la sesión. Si una alerta cambió de
+    generación mientras corría la query, el resultado se descarta.
+    """
+
+    def __init__(self, max_workers: int = 2, ttl_seconds: float = 300,
+                 backend: Optional[StateBackend] = None):
+        """
+        Args:
+            max_workers: Queries de precarga simultáneas
+            ttl_seconds: Tiempo que se conserva un resultado no reclamado
+            backend: Backend con las generaciones de caché por alerta
+        """
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend or get_state_backend()
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def prefetch(self, db_connection, username: str, alerta_id, origins: List[str],
+                 start_date: datetime, end_date: datetime, sentiment: Optional[str] = None):
+        """Agenda la query de un set de filtros si no hay una precarga vigente"""
+        key = self._key(username, alerta_id, origins, start_date, end_date, sentiment)
+        alert_ids = SocialListeningQueryBuilder.normalize_alert_ids(alerta_id)
+
+        with self._lock:
+            self._purge_stale()
+
+            if key in self._entries:
+                return
+
+            generations = self.backend.get_alert_generations(alert_ids)
+            future = self._executor.submit(
+                db_connection.get_social_listening_data,
+                alerta_id=alert_ids,
+                origins=origins,
+                start_date=start_date,
+                end_date=end_date,
+                sentiment=sentiment,
+                limit=None
+            )
+            self._entries[key] = {'future': future, 'generations': generations, 'submitted_at': time.time()}
+
+    def submit(self, fn, *args, **kwargs):
+        """Ejecuta una tarea auxiliar de precarga en el mismo executor"""
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def take(self, username: str, alerta_id, origins: List[str], start_date: datetime,
+             end_date: datetime, sentiment: Optional[str] = None,
+             timeout: Optional[float] = None) -> Optional[pd.DataFrame]:
+        """
+        Retira el resultado precargado (esperando si la query sigue en curso)
+
+        Returns:
+            DataFrame precargado o None si no hay precarga válida
+        """
+        key = self._key(username, alerta_id, origins, start_date, end_date, sentiment)
+
+        with self._lock:
+            entry = self._entries.pop(key, None)
+
+        if entry is None:
+            return None
+
+        try:
+            data = entry['future'].result(timeout=timeout)
+        except Exception:
+            return None
+
+        # Descartar si alguna alerta fue modificada mientras se precargaba
+        if self.backend.get_alert_generations(entry['generations'].keys()) != entry['generations']:
+            return None
+
+        return data
+
+    def _key(self, username, alerta_id, origins, start_date, end_date, sentiment):
+        return (
+            username,
+            tuple(SocialListeningQueryBuilder.normalize_alert_ids(alerta_id)),
+            tuple(sorted(origins)),
+            start_date.isoformat(),
+            end_date.isoformat(),
+            sentiment
+        )
+
+    def _purge_stale(self):
+        cutoff = time.time() - self.ttl_seconds
+        stale = [key for key, entry in self._entries.items() if entry['submitted_at'] < cutoff]
+
+        for key in stale:
+            self._entries[key]['future'].cancel()
+            del self._entries[key]
+
+
+@st.cache_resource
+def get_prefetcher() -> DataPrefetcher:
+    """Instancia única por proceso del prefetcher"""
+    return DataPrefetcher()
+
+
+def start_login_prefetch(username: str, user_info: Dict, filters: Dict, db_connection,
+                         dashboards: Dict, max_extra_dashboards: int = 3):
+    """
+    Agenda la precarga de los filtros por defecto al iniciar sesión
+
+    Precarga el dashboard del usuario y, para super usuarios, sus dashboards más visitados
+    según ocdul.user_access_logs (la consulta de visitas también corre en segundo plano).
+    """
+    prefetcher = get_prefetcher()
+    origins = filters['origen']
+
+    prefetcher.prefetch(
+        db_connection, username, user_info['dashboard']['alert_ids'], origins,
+        filters['fecha_inicio'], filters['fecha_fin']
+    )
+
+    if not user_info['user'].get('super_user_access', False):
+        return
+
+    def prefetch_most_visited():
+        visited = db_connection.get_most_visited_dashboards(
+            username, exclude=user_info['dashboard_id'], limit=max_extra_dashboards
+        )
+
+        for dashboard_id in visited:
+            dashboard = dashboards.get(dashboard_id)
+            if dashboard and dashboard.get('alert_ids'):
+                prefetcher.prefetch(
+                    db_connection, username, dashboard['alert_ids'], origins,
+                    filters['fecha_inicio'], filters['fecha_fin']
+                )
+
+    prefetcher.submit(prefetch_most_visited)
@@ -0,0 +1,386 @@
+import heapq
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import streamlit as st
+
+
+class StateBackend:
+    """Interfaz de almacenamiento compartido para sesiones y metadatos de caché
+
+    Las sesiones se guardan como registros con user_info ya serializado; los metadatos de
+    caché son generaciones por alerta que se incrementan al invalidar, de modo que cualquier
+    réplica detecte que sus datos cacheados de esa alerta quedaron obsoletos.
+    """
+
+    def save_session(self, token: str, username: str, user_info: Dict,
+                     created_at: float, last_activity: float, ttl: float):
+        raise NotImplementedError
+
+    def load_session(self, token: str) -> Optional[Dict]:
+        raise NotImplementedError
+
+    def touch_session(self, token: str, last_activity: float, ttl: float) -> bool:
+        """Actualiza la actividad; retorna False si la sesión ya no existe"""
+        raise NotImplementedError
+
+    def delete_session(self, token: str):
+        raise NotImplementedError
+
+    def purge_expired_sessions(self, cutoff: float) -> int:
+        """Elimina sesiones con last_activity anterior a cutoff"""
+        raise NotImplementedError
+
+    def count_sessions(self) -> int:
+        raise NotImplementedError
+
+    def get_alert_generation(self, alerta_id: int) -> int:
+        raise NotImplementedError
+
+    def get_alert_generations(self, alert_ids: Iterable[int]) -> Dict[int, int]:
+        """Generaciones de varias alertas en una sola consulta al backend"""
+        return {int(alerta_id): self.get_alert_generation(alerta_id) for alerta_id in alert_ids}
+
+    def bump_alert_generation(self, alerta_id: int) -> int:
+        raise NotImplementedError
+
+
+class SQLiteStateBackend(StateBackend):
+    """Backend local: un archivo SQLite en modo WAL (sirve para un único nodo)"""
+
+    def __init__(self, db_path: str = "sessions/sessions.db"):
+        Path(db_path).parent.mkdir(exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            token TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            user_info TEXT NOT NULL,
+            created_at REAL NOT NULL,
+            last_activity REAL NOT NULL
+        )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_sessions_last_activity ON sessions (last_activity)"
+        )
+        self._conn.execute("""
+        CREATE TABLE IF NOT EXISTS cache_generations (
+            alerta_id INTEGER PRIMARY KEY,
+            generation INTEGER NOT NULL
+        )
+        """)
+
+    def save_session(self, token, username, user_info, created_at, last_activity, ttl):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (token, username, user_info, created_at, last_activity) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (token, username, json.dumps(user_info, default=str), created_at, last_activity)
+            )
+
+    def load_session(self, token):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT username, user_info, created_at, last_activity FROM sessions WHERE token = ?",
+                (token,)
+            ).fetchone()
+
+        if not row:
+            return None
+
+        return {
+            'token': token,
+            'username': row[0],
+            'user_info': json.loads(row[1]),
+            'created_at': row[2],
+            'last_activity': row[3]
+        }
+
+    def touch_session(self, token, last_activity, ttl):
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE sessions SET last_activity = ? WHERE token = ?",
+                (last_activity, token)
+            )
+            return cursor.rowcount > 0
+
+    def delete_session(self, token):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+
+    def purge_expired_sessions(self, cutoff):
+        # Rango sobre el índice de last_activity: solo toca filas expiradas
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM sessions WHERE last_activity < ?", (cutoff,))
+            return cursor.rowcount
+
+    def count_sessions(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def get_alert_generation(self, alerta_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT generation FROM cache_generations WHERE alerta_id = ?",
+                (int(alerta_id),)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def get_alert_generations(self, alert_ids):
+        alert_ids = sorted({int(alerta_id) for alerta_id in alert_ids})
+        if not alert_ids:
+            return {}
+
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT alerta_id, generation FROM cache_generations "
+                f"WHERE alerta_id IN ({', '.join('?' * len(alert_ids))})",
+                alert_ids
+            ).fetchall()
+
+        return {**dict.fromkeys(alert_ids, 0), **dict(rows)}
+
+    def bump_alert_generation(self, alerta_id):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO cache_generations (alerta_id, generation) VALUES (?, 1) "
+                "ON CONFLICT(alerta_id) DO UPDATE SET generation = generation + 1",
+                (int(alerta_id),)
+            )
+            return self._conn.execute(
+                "SELECT generation FROM cache_generations WHERE alerta_id = ?",
+                (int(alerta_id),)
+            ).fetchone()[0]
+
+
+class RedisStateBackend(StateBackend):
+    """Backend en red (Redis) para desplegar varias réplicas sin sesiones sticky"""
+
+    # Comprobar y actualizar en un solo paso: si la sesión expira o se borra entre ambos,
+    # un HSET separado recrearía un hash incompleto (solo last_activity)
+    TOUCH_SCRIPT = """
+    if redis.call('HEXISTS', KEYS[1], 'username') == 0 then
+        return 0
+    end
+    redis.call('HSET', KEYS[1], 'last_activity', ARGV[1])
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+    redis.call('ZADD', KEYS[2], ARGV[1], ARGV[3])
+    return 1
+    """
+
+    # Seleccionar y borrar en un solo paso: una sesión tocada entre ambos (score nuevo) no
+    # debe eliminarse
+    PURGE_SCRIPT = """
+    local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', '(' .. ARGV[1])
+    for _, token in ipairs(expired) do
+        redis.call('DEL', ARGV[2] .. token)
+        redis.call('ZREM', KEYS[1], token)
+    end
+    return #expired
+    """
+
+    SESSION_FIELDS = ('username', 'user_info', 'created_at', 'last_activity')
+
+    def __init__(self, url: str, prefix: str = "ocd"):
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("El backend 'redis' requiere el paquete redis")
+
+        self._client = redis.Redis.from_url(url, decode_responses=True)
+        self._touch = self._client.register_script(self.TOUCH_SCRIPT)
+        self._purge = self._client.register_script(self.PURGE_SCRIPT)
+        self.prefix = prefix
+
+    def _session_key(self, token):
+        return f"{self._session_key_prefix()}{token}"
+
+    def _session_key_prefix(self):
+        return f"{self.prefix}:session:"
+
+    def _expiry_key(self):
+        # Sorted set token -> last_activity: índice de expiración compartido
+        return f"{self.prefix}:sessions_by_activity"
+
+    def _generation_key(self, alerta_id):
+        return f"{self.prefix}:cache_generation:{int(alerta_id)}"
+
+    def save_session(self, token, username, user_info, created_at, last_activity, ttl):
+        pipe = self._client.pipeline()
+        pipe.hset(self._session_key(token), mapping={
+            'username': username,
+            'user_info': json.dumps(user_info, default=str),
+            'created_at': created_at,
+            'last_activity': last_activity
+        })
+        pipe.expire(self._session_key(token), int(ttl))
+        pipe.zadd(self._expiry_key(), {token: last_activity})
+        pipe.execute()
+
+    def load_session(self, token):
+        data = self._client.hgetall(self._session_key(token))
+
+        # Un hash sin todos los campos (p. ej. recreado solo con last_activity por un HSET
+        # posterior a su expiración) no es una sesión válida
+        if not data or any(field not in data for field in self.SESSION_FIELDS):
+            return None
+
+        return {
+            'token': token,
+            'username': data['username'],
+            'user_info': json.loads(data['user_info']),
+            'created_at': float(data['created_at']),
+            'last_activity': float(data['last_activity'])
+        }
+
+    def touch_session(self, token, last_activity, ttl):
+        touched = self._touch(
+            keys=[self._session_key(token), self._expiry_key()],
+            args=[last_activity, int(ttl), token]
+        )
+        return bool(touched)
+
+    def delete_session(self, token):
+        pipe = self._client.pipeline()
+        pipe.delete(self._session_key(token))
+        pipe.zrem(self._expiry_key(), token)
+        pipe.execute()
+
+    def purge_expired_sessions(self, cutoff):
+        # Los hashes expiran solos por TTL; aquí se limpia el índice en O(expiradas)
+        return int(self._purge(keys=[self._expiry_key()], args=[cutoff, self._session_key_prefix()]))
+
+    def count_sessions(self):
+        return self._client.zcard(self._expiry_key())
+
+    def get_alert_generation(self, alerta_id):
+        value = self._client.get(self._generation_key(alerta_id))
+        return int(value) if value else 0
+
+    def get_alert_generations(self, alert_ids):
+        alert_ids = sorted({int(alerta_id) for alerta_id in alert_ids})
+        if not alert_ids:
+            return {}
+
+        values = self._client.mget([self._generation_key(alerta_id) for alerta_id in alert_ids])
+        return {alerta_id: int(value) if value else 0 for alerta_id, value in zip(alert_ids, values)}
+
+    def bump_alert_generation(self, alerta_id):
+        return int(self._client.incr(self._generation_key(alerta_id)))
+
+
+class InMemoryStateBackend(StateBackend):
+    """Backend en memoria del proceso: reemplazo del backend en red para pruebas"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._expiry_heap = []
+        self._generations = {}
+
+    def save_session(self, token, username, user_info, created_at, last_activity, ttl):
+        with self._lock:
+            # Serializar igual que los backends reales para detectar datos no serializables
+            self._sessions[token] = {
+                'token': token,
+                'username': username,
+                'user_info': json.dumps(user_info, default=str),
+                'created_at': created_at,
+                'last_activity': last_activity
+            }
+            heapq.heappush(self._expiry_heap, (last_activity, token))
+
+    def load_session(self, token):
+        with self._lock:
+            record = self._sessions.get(token)
+            if record is None:
+                return None
+            return {**record, 'user_info': json.loads(record['user_info'])}
+
+    def touch_session(self, token, last_activity, ttl):
+        with self._lock:
+            record = self._sessions.get(token)
+            if record is None:
+                return False
+            record['last_activity'] = last_activity
+            heapq.heappush(self._expiry_heap, (last_activity, token))
+            return True
+
+    def delete_session(self, token):
+        with self._lock:
+            self._sessions.pop(token, None)
+
+    def purge_expired_sessions(self, cutoff):
+        evicted = 0
+
+        with self._lock:
+            while self._expiry_heap and self._expiry_heap[0][0] < cutoff:
+                last_activity, token = heapq.heappop(self._expiry_heap)
+                record = self._sessions.get(token)
+
+                # Entradas obsoletas del heap (sesión borrada o con actividad posterior)
+                if record is None or record['last_activity'] > last_activity:
+                    continue
+
+                del self._sessions[token]
+                evicted += 1
+
+        return evicted
+
+    def count_sessions(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def get_alert_generation(self, alerta_id):
+        with self._lock:
+            return self._generations.get(int(alerta_id), 0)
+
+    def get_alert_generations(self, alert_ids):
+        with self._lock:
+            return {int(alerta_id): self._generations.get(int(alerta_id), 0) for alerta_id in alert_ids}
+
+    def bump_alert_generation(self, alerta_id):
+        with self._lock:
+            self._generations[int(alerta_id)] = self._generations.get(int(alerta_id), 0) + 1
+            return self._generations[int(alerta_id)]
+
+
+def create_state_backend(config: Optional[Dict] = None) -> StateBackend:
+    """
+    Crea el backend configurado en la sección [state_backend] de los secrets
+
+    Args:
+        config: Diccionario con 'type' ('local', 'redis' o 'memory') y opciones del backend
+
+    Returns:
+        Instancia del backend
+    """
+    config = dict(config or {})
+    backend_type = config.get('type', 'local')
+
+    if backend_type == 'local':
+        return SQLiteStateBackend(config.get('path', "sessions/sessions.db"))
+    elif backend_type == 'redis':
+        return RedisStateBackend(config['url'], prefix=config.get('prefix', 'ocd'))
+    elif backend_type == 'memory':
+        return InMemoryStateBackend()
+
+    raise ValueError(f"Backend de estado no soportado: {backend_type}")
+
+
+@st.cache_resource
+def get_state_backend() -> StateBackend:
+    """Backend compartido del proceso (sesiones y metadatos de caché)"""
+    try:
+        config = st.secrets.get("state_backend", {})
+    except Exception:
+        config = {}
+
+    return create_state_backend(config)
@@ -0,0 +1,95 @@
+import json
+import multiprocessing
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.utils import activity_log
+from src.utils.activity_log import ActivityLog
+
+
+def make_log(tmp_path, **kwargs):
+    return ActivityLog(log_dir=str(tmp_path), **kwargs)
+
+
+def test_tail_returns_last_entries_in_order(tmp_path):
+    log = make_log(tmp_path)
+    for i in range(200):
+        log.append({'n': i, 'padding': 'x' * 100})
+
+    assert [entry['n'] for entry in log.tail(5)] == [195, 196, 197, 198, 199]
+    assert len(log.tail(500)) == 200
+
+
+def test_tail_reads_across_rotated_files(tmp_path):
+    log = make_log(tmp_path, max_bytes=2000)
+    for i in range(60):
+        log.append({'n': i})
+
+    assert len(log._rotated_files()) >= 1
+    assert [entry['n'] for entry in log.tail(60)] == list(range(60))
+
+
+def test_rotation_keeps_backup_count_files(tmp_path):
+    log = make_log(tmp_path, max_bytes=500, backup_count=2)
+    for i in range(100):
+        log.append({'n': i})
+
+    rotated = log._rotated_files()
+    assert len(rotated) == 2
+    # Los más nuevos se conservan: la cola sigue terminando en la última entrada
+    assert log.tail(1)[0]['n'] == 99
+    # Los índices de los rotados eliminados también se borran
+    assert {path.stem for path in tmp_path.glob("user_activity.*.idx")} <= {path.stem for path in rotated}
+
+
+def test_tail_skips_truncated_last_line(tmp_path):
+    log = make_log(tmp_path)
+    log.append({'n': 1})
+    with open(log.active_path, 'ab') as f:
+        f.write(b'{"n": 2, "trunc')
+
+    assert [entry['n'] for entry in log.tail(5)] == [1]
+
+
+def test_query_uses_entry_timestamps(tmp_path):
+    log = make_log(tmp_path, index_block=64)
+    base = datetime(2024, 1, 1)
+    for i in range(100):
+        log.append({'timestamp': (base + timedelta(minutes=i)).isoformat(), 'n': i})
+
+    found = [entry['n'] for entry in log.query(base + timedelta(minutes=40), base + timedelta(minutes=44))]
+    assert found == [40, 41, 42, 43, 44]
+
+
+def test_import_legacy_json(tmp_path):
+    legacy = tmp_path / "user_activity.json"
+    legacy.write_text(json.dumps([{'timestamp': '2024-01-01T10:00:00', 'n': i} for i in range(3)]))
+    log = make_log(tmp_path)
+
+    assert log.import_legacy_json(legacy) == 3
+    assert not legacy.exists()
+    assert log.import_legacy_json(legacy) == 0
+    assert [entry['n'] for entry in log.tail(10)] == [0, 1, 2]
+
+
+def _import_in_child(log_dir, legacy_path, barrier):
+    barrier.wait()
+    ActivityLog(log_dir=log_dir).import_legacy_json(legacy_path)
+
+
+@pytest.mark.skipif(activity_log.fcntl is None, reason="requiere flock")
+def test_concurrent_legacy_import_runs_once(tmp_path):
+    legacy = tmp_path / "user_activity.json"
+    legacy.write_text(json.dumps([{'timestamp': '2024-01-01T10:00:00', 'n': i} for i in range(500)]))
+
+    context = multiprocessing.get_context('fork')
+    barrier = context.Barrier(4)
+    workers = [context.Process(target=_import_in_child, args=(str(tmp_path), legacy, barrier))
+               for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=10)
+
+    assert len(make_log(tmp_path).tail(5000)) == 500
@@ -0,0 +1,94 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from src.database.audit_writer import AuditLogWriter
+
+
+EDITOR_ROW = ['ana', 'posts_x', 1, 'Positivo', 'Negativo', '2024-01-01 10:00:00']
+
+
+class FakeWriter(AuditLogWriter):
+    """Escritor que registra los lotes en memoria en lugar de insertarlos en la BD"""
+
+    def __init__(self, spool_path, fail_after=None, raise_once=False, **kwargs):
+        self.written = []
+        self.fail_after = fail_after
+        self.raise_once = raise_once
+        super().__init__("postgresql://unused", spool_path=str(spool_path), flush_interval=0.05, **kwargs)
+
+    def _write_batch(self, entries):
+        if self.raise_once:
+            self.raise_once = False
+            raise RuntimeError("fallo inesperado")
+        if self.fail_after is not None and len(self.written) >= self.fail_after:
+            return False
+        self.written.extend(entries)
+        self._count('written', len(entries))
+        return True
+
+
+def spool_line(record_id):
+    return json.dumps({'kind': 'editor', 'row': EDITOR_ROW[:2] + [record_id] + EDITOR_ROW[3:]}) + "\n"
+
+
+@pytest.fixture
+def spool_path(tmp_path):
+    return tmp_path / "audit_spool.jsonl"
+
+
+def test_replay_writes_spool_and_removes_it(spool_path):
+    spool_path.write_text(spool_line(1) + spool_line(2))
+
+    writer = FakeWriter(spool_path)
+
+    assert writer.flush(timeout=2)
+    assert [row[2] for _, row in writer.written] == [1, 2]
+    assert not spool_path.exists()
+    assert writer.get_stats()['replayed'] == 2
+
+
+def test_truncated_line_is_quarantined(spool_path):
+    spool_path.write_text(spool_line(1) + '{"kind": "editor", "row": ["an' + "\n" + spool_line(2))
+
+    writer = FakeWriter(spool_path)
+
+    assert writer.flush(timeout=2)
+    assert [row[2] for _, row in writer.written] == [1, 2]
+    assert writer.get_stats()['quarantined'] == 1
+    rejected = spool_path.with_name(spool_path.name + ".rejected")
+    assert rejected.read_text().startswith('{"kind": "editor", "row": ["an')
+    assert writer._thread.is_alive()
+
+
+def test_failed_replay_keeps_only_unwritten_lines(spool_path):
+    spool_path.write_text(''.join(spool_line(record_id) for record_id in range(1, 6)))
+
+    writer = FakeWriter(spool_path, fail_after=2, batch_size=2)
+
+    assert not writer.flush(timeout=0.5)
+    assert [row[2] for _, row in writer.written] == [1, 2]
+    remaining = [json.loads(line)['row'][2] for line in spool_path.read_text().splitlines()]
+    assert remaining == [3, 4, 5]
+
+
+def test_unexpected_error_does_not_kill_the_thread(spool_path):
+    writer = FakeWriter(spool_path, raise_once=True)
+    writer.log_editor_change('ana', 'posts_x', 7, 'Positivo', 'Negativo')
+
+    assert writer.flush(timeout=2)
+    assert writer._thread.is_alive()
+    assert [row[2] for _, row in writer.written] == [7]
+    assert writer.get_stats()['loop_errors'] == 1
+
+
+def test_access_rows_keep_enqueue_time(spool_path):
+    writer = FakeWriter(spool_path)
+    writer.log_user_access('ana', 'Ana', 'ana@example.com', 'LOGIN', 'd1', 'Dashboard')
+
+    assert writer.flush(timeout=2)
+    kind, row = writer.written[0]
+    assert kind == 'access'
+    assert len(row) == len(AuditLogWriter.TABLES['access'][1])
+    assert isinstance(row[-1], datetime)
@@ -0,0 +1,56 @@
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from src.utils.cache_warmer import CacheWarmer
+from src.utils.state_backends import InMemoryStateBackend
+
+
+class FakeDB:
+    """Conexión que filtra un DataFrame en memoria por created_time"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    def get_dashboard_usage_ranking(self, limit):
+        return ['principal']
+
+    def get_social_listening_data(self, alerta_id, origins, start_date, end_date, limit=None, sentiment=None):
+        self.queries.append((start_date, end_date))
+        data = pd.DataFrame(self.rows, columns=['table_source', 'id', 'created_time', 'sentiment_pred'])
+        created = pd.to_datetime(data['created_time'])
+        return data[(created >= start_date) & (created <= end_date)].reset_index(drop=True)
+
+
+def make_warmer(db, **kwargs):
+    return CacheWarmer(db, {'principal': {'alert_ids': [7]}}, threading.Semaphore(1),
+                       backend=InMemoryStateBackend(), **kwargs)
+
+
+def test_delta_picks_up_rows_ingested_late():
+    now = datetime.now()
+    db = FakeDB([('posts_x', 1, now - timedelta(minutes=1), 'Positivo')])
+    warmer = make_warmer(db, ingestion_lag_seconds=3600)
+    warmer.run_once()
+
+    # Fila ingerida después del refresco con un created_time anterior al último corte
+    db.rows.append(('posts_x', 2, now - timedelta(minutes=30), 'Negativo'))
+    warmer.run_once()
+
+    stats = warmer.get_stats()
+    assert stats['full_loads'] == 1
+    assert stats['delta_loads'] == 1
+    assert stats['warmed'][0]['rows'] == 2
+
+
+def test_full_reload_after_max_age():
+    db = FakeDB([('posts_x', 1, datetime.now() - timedelta(minutes=1), 'Positivo')])
+    warmer = make_warmer(db, full_reload_seconds=0)
+    warmer.run_once()
+    warmer.run_once()
+
+    stats = warmer.get_stats()
+    assert stats['full_loads'] == 2
+    assert stats['delta_loads'] == 0
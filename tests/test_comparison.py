@@ -0,0 +1,40 @@
+from datetime import datetime
+
+import pandas as pd
+
+from src.dashboard.comparison import PeriodComparison
+from src.dashboard.time_buckets import TimeBucketer
+
+
+def make_aggregate(rows):
+    aggregate = pd.DataFrame(rows, columns=['periodo', 'bucket', 'sentiment_pred', 'total'])
+    aggregate['bucket'] = pd.to_datetime(aggregate['bucket'])
+    aggregate['confidence_sum'] = 0.0
+    aggregate['confidence_count'] = 0
+    return aggregate
+
+
+def test_ghost_points_land_on_the_equivalent_bucket():
+    start, end = datetime(2024, 1, 8), datetime(2024, 1, 14, 23, 59, 59)
+    aggregate = make_aggregate([
+        ('previous', '2024-01-01 00:00', 'POS', 3),
+        ('previous', '2024-01-07 23:00', 'NEG', 2),
+        ('current', '2024-01-08 10:00', 'POS', 1)
+    ])
+    comparison = PeriodComparison(aggregate, start, end)
+
+    ghost = comparison.ghost_timeline(TimeBucketer(start, end, granularity='day'))
+
+    assert ghost['total'].tolist() == [3, 0, 0, 0, 0, 0, 2]
+    assert ghost['sentiment']['NEG'][-1] == 2
+
+
+def test_hourly_ghost_is_shifted_by_whole_hours():
+    start, end = datetime(2024, 1, 2), datetime(2024, 1, 2, 23, 59, 59)
+    aggregate = make_aggregate([('previous', '2024-01-01 05:00', 'NEU', 4)])
+    comparison = PeriodComparison(aggregate, start, end)
+
+    ghost = comparison.ghost_timeline(TimeBucketer(start, end, granularity='hour'))
+
+    assert ghost['total'][5] == 4
+    assert ghost['total'].sum() == 4
@@ -0,0 +1,83 @@
+import numpy as np
+
+from src.dashboard.downsampling import downsample_series, lttb_indices
+
+
+def reference_lttb(x, y, threshold):
+    """Implementación directa del algoritmo (un bucket a la vez, sin vectorizar)"""
+    n = len(y)
+    every = (n - 2) / (threshold - 2)
+    selected = 0
+    indices = [0]
+
+    for i in range(threshold - 2):
+        start = int(np.floor(i * every)) + 1
+        end = int(np.floor((i + 1) * every)) + 1 if i < threshold - 3 else n - 1
+        next_end = int(np.floor((i + 2) * every)) + 1 if i + 2 < threshold - 2 else n
+        avg_x = np.mean(x[end:next_end])
+        avg_y = np.mean(y[end:next_end])
+
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((x[selected] - avg_x) * (y[j] - y[selected])
+                       - (x[selected] - x[j]) * (avg_y - y[selected]))
+            if area > best_area:
+                best, best_area = j, area
+        indices.append(best)
+        selected = best
+
+    indices.append(n - 1)
+    return np.array(indices)
+
+
+def test_short_series_is_returned_unchanged():
+    x = np.arange(10)
+    assert list(lttb_indices(x, x * 2.0, 50)) == list(range(10))
+    assert list(lttb_indices(x, x * 2.0, 2)) == list(range(10))
+
+
+def test_keeps_endpoints_and_threshold_points():
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=1000)
+    indices = lttb_indices(np.arange(1000), y, 100)
+
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_matches_reference_implementation():
+    rng = np.random.default_rng(1)
+    x = np.cumsum(rng.uniform(0.5, 2.0, size=777))
+    y = rng.normal(size=777).cumsum()
+
+    for threshold in (3, 10, 64, 500):
+        np.testing.assert_array_equal(lttb_indices(x, y, threshold), reference_lttb(x, y, threshold))
+
+
+def test_preserves_isolated_spike():
+    y = np.zeros(5000)
+    y[3217] = 100.0
+    indices = lttb_indices(np.arange(5000), y, 50)
+
+    assert 3217 in indices
+
+
+def test_accepts_datetime_axis():
+    x = np.arange('2024-01-01', '2024-03-01', dtype='datetime64[h]')
+    y = np.sin(np.arange(len(x)) / 24.0)
+    indices = lttb_indices(x, y, 200)
+
+    assert len(indices) == 200
+    assert indices[-1] == len(x) - 1
+
+
+def test_shared_downsampling_uses_same_indices():
+    x = np.arange(2000)
+    rng = np.random.default_rng(2)
+    series = {'POS': rng.poisson(5, 2000), 'NEG': rng.poisson(3, 2000)}
+
+    result = downsample_series(x, series, 100, shared=True)
+
+    np.testing.assert_array_equal(result['POS'][0], result['NEG'][0])
+    assert len(result['POS'][0]) == 100
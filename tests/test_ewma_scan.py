@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+from src.utils.anomaly_detector import ewma_scan
+
+
+def reference_scan(mean, var, values, valid, alpha):
+    """Actualización EWMA clásica bucket por bucket"""
+    mean = mean.astype(float).copy()
+    var = var.astype(float).copy()
+    prev_mean = np.empty_like(values, dtype=float)
+    prev_var = np.empty_like(values, dtype=float)
+
+    for t in range(values.shape[1]):
+        prev_mean[:, t] = mean
+        prev_var[:, t] = var
+        update = valid[:, t]
+        diff = values[update, t] - mean[update]
+        var[update] = (1 - alpha) * (var[update] + alpha * diff ** 2)
+        mean[update] = mean[update] + alpha * diff
+
+    return prev_mean, prev_var, mean, var
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(7)
+    values = rng.poisson(20, size=(6, 500)).astype(float)
+    valid = rng.random((6, 500)) > 0.1
+    mean = rng.uniform(5, 30, size=6)
+    var = rng.uniform(1, 10, size=6)
+    return mean, var, values, valid
+
+
+@pytest.mark.parametrize("block", [1, 7, 128, 1000])
+def test_matches_loop_reference(series, block):
+    mean, var, values, valid = series
+    expected = reference_scan(mean, var, values, valid, alpha=0.1)
+
+    for got, want in zip(ewma_scan(mean, var, values, valid, 0.1, block=block), expected):
+        np.testing.assert_allclose(got, want, rtol=1e-9, atol=1e-9)
+
+
+def test_incremental_runs_equal_full_batch(series):
+    mean, var, values, valid = series
+    _, _, full_mean, full_var = ewma_scan(mean, var, values, valid, 0.2)
+
+    state_mean, state_var = mean, var
+    for start in range(0, values.shape[1], 37):
+        _, _, state_mean, state_var = ewma_scan(
+            state_mean, state_var, values[:, start:start + 37], valid[:, start:start + 37], 0.2
+        )
+
+    np.testing.assert_allclose(state_mean, full_mean, rtol=1e-9)
+    np.testing.assert_allclose(state_var, full_var, rtol=1e-9)
+
+
+def test_invalid_buckets_leave_state_unchanged():
+    mean = np.array([10.0])
+    var = np.array([4.0])
+    values = np.array([[1000.0, 1000.0, 12.0]])
+    valid = np.array([[False, False, True]])
+
+    prev_mean, prev_var, final_mean, _ = ewma_scan(mean, var, values, valid, 0.5)
+
+    assert prev_mean.tolist() == [[10.0, 10.0, 10.0]]
+    assert prev_var.tolist() == [[4.0, 4.0, 4.0]]
+    assert final_mean.tolist() == [11.0]
+
+
+def test_single_bucket_is_classic_update():
+    _, _, mean, var = ewma_scan(np.array([10.0]), np.array([2.0]), np.array([[14.0]]),
+                                np.array([[True]]), 0.25)
+
+    assert mean[0] == pytest.approx(11.0)
+    assert var[0] == pytest.approx(0.75 * (2.0 + 0.25 * 16.0))
@@ -0,0 +1,96 @@
+import random
+import re
+
+import pytest
+
+from src.database.sql_queries import SocialListeningQueryBuilder
+
+
+BRANCH_PATTERN = re.compile(r"FROM ocdul\.(\w+) t\s+WHERE t\.alerta_id = %s.*?NULL\s+(AND [^\n]*?)?\s+AND NOT EXISTS", re.S)
+
+
+def run_page(rows, query, params):
+    """Evalúa en memoria las ramas de la query keyset sobre filas (confianza, tabla, alerta, id)"""
+    params = list(params)
+    limit = int(re.search(r"LIMIT (\d+)\s*$", query.strip()).group(1))
+    page = []
+
+    for table, condition in BRANCH_PATTERN.findall(query):
+        alert_id = params.pop(0)
+        selected = [row for row in rows if row[1] == table and row[2] == alert_id]
+
+        if condition == "AND sentiment_confidence >= %s":
+            bound = params.pop(0)
+            selected = [row for row in selected if row[0] >= bound]
+        elif condition == "AND sentiment_confidence > %s":
+            bound = params.pop(0)
+            selected = [row for row in selected if row[0] > bound]
+        elif condition == "AND (sentiment_confidence, id) > (%s, %s)":
+            bound = (params.pop(0), params.pop(0))
+            selected = [row for row in selected if (row[0], row[3]) > bound]
+        else:
+            assert not condition
+
+        page.extend(sorted(selected, key=lambda row: (row[0], row[3]))[:limit])
+
+    assert not params, "quedaron parámetros sin placeholder"
+    return sorted(page, key=lambda row: (row[0], row[1], row[3]))[:limit]
+
+
+@pytest.fixture
+def builder():
+    return SocialListeningQueryBuilder()
+
+
+def test_first_page_has_no_keyset_condition(builder):
+    query, params = builder.build_review_queue_query(7, ['Facebook'], limit=20)
+
+    assert query.count("UNION ALL") == 1
+    assert params == [7, 7]
+    assert "sentiment_confidence >" not in query
+    assert "ANY(%s)" not in query
+
+
+def test_one_branch_per_table_and_alert(builder):
+    query, params = builder.build_review_queue_query([3, 1, 3], ['X (Twitter)'], limit=10)
+
+    assert query.count("UNION ALL") == 5
+    assert params == [1, 3, 1, 3, 1, 3]
+    assert query.count("%s") == len(params)
+
+
+def test_after_is_translated_per_branch(builder):
+    query, params = builder.build_review_queue_query(1, ['X (Twitter)'], after=(0.4, 'quotes_x', 12))
+    conditions = dict(BRANCH_PATTERN.findall(query))
+
+    assert conditions['posts_x'] == "AND sentiment_confidence > %s"
+    assert conditions['quotes_x'] == "AND (sentiment_confidence, id) > (%s, %s)"
+    assert conditions['respuestas_x'] == "AND sentiment_confidence >= %s"
+    assert query.count("%s") == len(params)
+
+
+def test_unknown_origins_return_empty_query(builder):
+    assert builder.build_review_queue_query(1, ['Myspace']) == ("", [])
+
+
+@pytest.mark.parametrize("limit", [1, 3, 7])
+def test_paging_visits_every_row_once_in_order(builder, limit):
+    rng = random.Random(limit)
+    tables = ['posts_x', 'quotes_x', 'respuestas_x']
+    # Confianzas con empates para ejercitar el desempate por tabla e id
+    rows = [(rng.choice([0.1, 0.2, 0.3, 0.5]), rng.choice(tables), rng.choice([1, 2]), record_id)
+            for record_id in range(60)]
+    expected = sorted(rows, key=lambda row: (row[0], row[1], row[3]))
+
+    seen = []
+    after = None
+    while True:
+        query, params = builder.build_review_queue_query([1, 2], ['X (Twitter)'], after=after, limit=limit)
+        page = run_page(rows, query, params)
+        if not page:
+            break
+        seen.extend(page)
+        last = page[-1]
+        after = (last[0], last[1], last[3])
+
+    assert seen == expected
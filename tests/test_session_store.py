@@ -0,0 +1,65 @@
+import pytest
+
+from src.auth.session_store import SessionStore
+from src.utils.state_backends import InMemoryStateBackend, SQLiteStateBackend
+
+
+TOKEN = "0123456789abcdef0123456789abcdef"
+OTHER = "fedcba9876543210fedcba9876543210"
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return InMemoryStateBackend()
+    return SQLiteStateBackend(str(tmp_path / "sessions.db"))
+
+
+@pytest.fixture
+def store(backend, tmp_path):
+    return SessionStore(sessions_dir=str(tmp_path), persist_threshold=60, session_timeout=600,
+                        backend=backend)
+
+
+def test_idle_session_is_purged(store):
+    store.save(TOKEN, "ana", {}, created_at=1000, last_activity=1000)
+
+    assert store.purge_expired(now=1000 + 600 + 60 + 1) == 1
+    assert store.load(TOKEN) is None
+
+
+def test_unpersisted_activity_survives_backend_sweep(store):
+    store.save(TOKEN, "ana", {}, created_at=1000, last_activity=1000)
+    # Por debajo del umbral: solo se actualiza la capa caliente
+    store.touch(TOKEN, now=1059)
+
+    # Expirado según el valor persistido, pero aún activo en memoria
+    store.purge_expired(now=1000 + 600 + 30)
+
+    assert store.backend.load_session(TOKEN) is not None
+    store.touch(TOKEN, now=1650)
+    assert store.get_last_activity(TOKEN) == 1650
+
+
+def test_sweep_keeps_active_and_removes_expired(store):
+    store.save(TOKEN, "ana", {}, created_at=1000, last_activity=1000)
+    store.save(OTHER, "luis", {}, created_at=1000, last_activity=1000)
+    store.touch(OTHER, now=1500)
+
+    assert store.purge_expired(now=1700) == 1
+    assert store.load(TOKEN) is None
+    assert store.load(OTHER)['last_activity'] == 1500
+
+
+def test_touch_on_session_closed_elsewhere_forgets_it(store):
+    store.save(TOKEN, "ana", {}, created_at=1000, last_activity=1000)
+    store.backend.delete_session(TOKEN)
+
+    store.touch(TOKEN, now=1100)
+
+    assert store.load(TOKEN) is None
+
+
+def test_invalid_tokens_are_rejected(store):
+    assert store.load("../../etc/passwd") is None
+    assert store.get_last_activity("") is None
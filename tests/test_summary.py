@@ -0,0 +1,19 @@
+import pandas as pd
+
+from src.dashboard import time_buckets
+from src.dashboard.summary import DashboardSummary
+
+
+def test_day_windows_use_display_timezone_range(monkeypatch):
+    monkeypatch.setattr(time_buckets, '_display_config',
+                        lambda: {'timezone': 'America/Santiago', 'source_timezone': 'UTC'})
+
+    # La primera fila (UTC) cae el 31/12 en Santiago: antes de min_date en la zona de origen
+    df = pd.DataFrame({
+        'created_time': pd.to_datetime(['2024-01-01 02:00', '2024-01-02 12:00']),
+        'sentiment_pred': ['NEG', 'POS']
+    })
+    summary = DashboardSummary(df)
+
+    assert summary.sentiment_delta('NEG', window='first_last_days', days=1) == -100
+    assert summary.sentiment_delta('POS', window='first_last_days', days=1) == 100
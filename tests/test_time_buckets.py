@@ -0,0 +1,90 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.dashboard.time_buckets import TimeBucketer
+
+
+@pytest.mark.parametrize("days, expected", [(1, 'hour'), (3, 'hour'), (30, 'day'), (200, 'week'), (1000, 'month')])
+def test_choose_granularity(days, expected):
+    start = datetime(2024, 1, 1)
+    assert TimeBucketer.choose_granularity(start, start + pd.Timedelta(days=days)) == expected
+
+
+def test_counts_include_empty_buckets():
+    bucketer = TimeBucketer(datetime(2024, 3, 1), datetime(2024, 3, 5, 23), granularity='day')
+    created = pd.Series(pd.to_datetime(['2024-03-01 10:00', '2024-03-01 23:59', '2024-03-04 00:00']))
+
+    counts = bucketer.count(bucketer.bucket_ids(created))
+
+    assert list(counts) == [2, 0, 0, 1, 0]
+    assert bucketer.edges[0] == np.datetime64('2024-03-01')
+    assert len(bucketer.edges) == 5
+
+
+def test_out_of_range_and_null_dates_are_ignored():
+    bucketer = TimeBucketer(datetime(2024, 3, 1), datetime(2024, 3, 2), granularity='day')
+    created = pd.Series(pd.to_datetime(['2024-02-29 23:00', None, '2024-03-03 00:00', '2024-03-02 12:00']))
+
+    ids = bucketer.bucket_ids(created)
+
+    assert list(ids) == [-1, -1, -1, 1]
+    assert list(bucketer.count(ids)) == [0, 1]
+
+
+def test_weeks_start_on_monday():
+    # 2024-03-06 es miércoles
+    bucketer = TimeBucketer(datetime(2024, 3, 6), datetime(2024, 3, 20), granularity='week')
+    created = pd.Series(pd.to_datetime(['2024-03-10 23:00', '2024-03-11 00:00']))
+
+    assert bucketer.edges[0] == np.datetime64('2024-03-04')
+    assert pd.Timestamp(bucketer.edges[0]).day_name() == 'Monday'
+    assert list(bucketer.bucket_ids(created)) == [0, 1]
+
+
+def test_month_buckets():
+    bucketer = TimeBucketer(datetime(2023, 11, 15), datetime(2024, 2, 10), granularity='month')
+    created = pd.Series(pd.to_datetime(['2023-11-30', '2023-12-01', '2024-02-29']))
+
+    assert list(bucketer.count(bucketer.bucket_ids(created))) == [1, 1, 0, 1]
+    assert bucketer.edges[2] == np.datetime64('2024-01-01')
+
+
+def test_naive_timestamps_are_converted_from_source_timezone():
+    # Ciudad de México: UTC-6 sin horario de verano
+    bucketer = TimeBucketer(datetime(2024, 3, 1), datetime(2024, 3, 2, 23), granularity='day',
+                            timezone='America/Mexico_City', source_timezone='UTC')
+    created = pd.Series(pd.to_datetime(['2024-03-02 05:00', '2024-03-02 06:00']))
+
+    assert list(bucketer.bucket_ids(created)) == [0, 1]
+
+
+def test_aware_timestamps_are_converted_to_display_timezone():
+    bucketer = TimeBucketer(datetime(2024, 3, 30), datetime(2024, 3, 31, 23), granularity='hour',
+                            timezone='Europe/Madrid')
+    # Cambio a horario de verano: 01:00 UTC del 31 de marzo son las 03:00 en Madrid
+    created = pd.Series(pd.to_datetime(['2024-03-31 00:30+00:00', '2024-03-31 01:30+00:00']))
+
+    localized = bucketer.localize(created)
+
+    assert list(localized) == [np.datetime64('2024-03-31T01:30'), np.datetime64('2024-03-31T03:30')]
+
+
+def test_without_timezone_timestamps_are_not_shifted():
+    bucketer = TimeBucketer(datetime(2024, 3, 1), datetime(2024, 3, 1, 23), granularity='hour')
+    created = pd.Series(pd.to_datetime(['2024-03-01 05:10']))
+
+    assert list(bucketer.bucket_ids(created)) == [5]
+
+
+def test_count_by_category_with_weights():
+    bucketer = TimeBucketer(datetime(2024, 3, 1), datetime(2024, 3, 3), granularity='day')
+    created = pd.Series(pd.to_datetime(['2024-03-01', '2024-03-01', '2024-03-03', '2024-03-02']))
+    codes = np.array([0, 1, 1, -1])
+    weights = np.array([3.0, 2.0, 5.0, 7.0])
+
+    counts = bucketer.count_by(bucketer.bucket_ids(created), codes, 2, weights=weights)
+
+    assert counts.tolist() == [[3, 0, 0], [2, 0, 5]]